@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Async Spawn Engine
+asyncio subprocess engine for driving many Depot sandbox sessions from one event loop.
+"""
+import asyncio
+import inspect
+import time
+from typing import Callable, Dict, List, Optional
+
+# How long a terminated process gets to exit before it is killed
+TERMINATE_GRACE_SECONDS = 5
+
+# Longest single output line read when streaming into a spooler
+STREAM_LINE_LIMIT = 1024 * 1024
+
+# How often a run with a stall timeout checks when its output last moved
+STALL_CHECK_SECONDS = 5.0
+
+
+class _OutputStalled(Exception):
+    """Raised inside _run when the spooled output stops moving"""
+
+
+class AsyncSpawnEngine:
+    """
+    Runs depot CLI processes with asyncio.create_subprocess_exec
+    Each in-flight session costs a coroutine instead of a blocked OS thread, and can
+    be cancelled individually by session ID.
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None):
+        self.max_concurrent = max_concurrent
+        self._semaphore = asyncio.Semaphore(max_concurrent) if max_concurrent else None
+        self._active: Dict[str, asyncio.Task] = {}
+
+    def active_sessions(self) -> List[str]:
+        """IDs of sessions currently running in this engine"""
+        return list(self._active)
+
+    def cancel(self, session_id: str) -> bool:
+        """
+        Cancel a running session; its process is terminated and its result reports "cancelled"
+
+        Safe to call from any thread (e.g. a daemon request handler): the cancellation
+        is scheduled on the loop running the session.
+
+        Returns:
+            True if the session was running and has been cancelled
+        """
+        task = self._active.get(session_id)
+        if task is None or task.done():
+            return False
+        try:
+            task.get_loop().call_soon_threadsafe(task.cancel)
+        except RuntimeError:
+            # The loop closed, so the session already finished
+            return False
+        return True
+
+    def cancel_all(self) -> int:
+        """Cancel every running session"""
+        return sum(1 for session_id in list(self._active) if self.cancel(session_id))
+
+    async def run(self, session_id: str, cmd: List[str], input_text: str = None, env: Dict = None,
+                  cwd: str = None, timeout: float = None, on_complete: Callable = None,
+                  spooler=None, stall_timeout: float = None) -> Dict:
+        """
+        Run one session's command to completion
+
+        Args:
+            session_id: Session identifier used for cancellation
+            cmd: Command and arguments to execute
+            input_text: Text written to the process stdin
+            env: Process environment
+            cwd: Working directory
+            timeout: Seconds before the process is terminated (None for no limit)
+            on_complete: Called (or awaited, if a coroutine function) with the result dict
+            spooler: Optional SessionLogSpooler; output is streamed into it line by line
+                and stdout/stderr in the result hold only its bounded tail
+            stall_timeout: With a spooler, seconds without an output line before the
+                process is terminated (status "timeout", reason "stalled")
+
+        Returns:
+            Dict with status ("completed", "failed", "timeout" or "cancelled"), returncode,
+            stdout, stderr and duration_seconds
+        """
+        if self._semaphore is not None:
+            async with self._semaphore:
+                return await self._run(session_id, cmd, input_text, env, cwd, timeout, on_complete, spooler,
+                                       stall_timeout)
+        return await self._run(session_id, cmd, input_text, env, cwd, timeout, on_complete, spooler, stall_timeout)
+
+    async def _run(self, session_id, cmd, input_text, env, cwd, timeout, on_complete, spooler,
+                   stall_timeout=None) -> Dict:
+        started = time.monotonic()
+        self._active[session_id] = asyncio.current_task()
+
+        result = {
+            "session_id": session_id,
+            "status": "failed",
+            "returncode": None,
+            "stdout": "",
+            "stderr": ""
+        }
+        cancelled = False
+        process = None
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE if input_text is not None else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=env,
+                cwd=cwd,
+                limit=STREAM_LINE_LIMIT
+            )
+            if spooler is None:
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(input_text.encode() if input_text is not None else None),
+                    timeout
+                )
+                result["stdout"] = stdout.decode(errors="replace")
+                result["stderr"] = stderr.decode(errors="replace")
+            else:
+                streaming = self._stream(process, input_text, spooler)
+                if stall_timeout:
+                    streaming = self._until_stalled(streaming, spooler, stall_timeout)
+                await asyncio.wait_for(streaming, timeout)
+                result["stdout"] = spooler.tail_text("stdout")
+                result["stderr"] = spooler.tail_text("stderr")
+            result["returncode"] = process.returncode
+            result["status"] = "completed" if process.returncode == 0 else "failed"
+        except asyncio.TimeoutError:
+            result["status"] = "timeout"
+            result["stderr"] = f"Session {session_id} timed out after {timeout}s"
+            await self._terminate(process)
+        except _OutputStalled:
+            result["status"] = "timeout"
+            result["reason"] = "stalled"
+            result["stderr"] = f"Session {session_id} stalled: no output for {stall_timeout}s"
+            await self._terminate(process)
+        except asyncio.CancelledError:
+            cancelled = True
+            result["status"] = "cancelled"
+            await self._terminate(process)
+        except (OSError, ValueError) as e:
+            # ValueError: an output line over STREAM_LINE_LIMIT; the process is still running
+            result["stderr"] = str(e)
+            await self._terminate(process)
+        finally:
+            self._active.pop(session_id, None)
+
+        result["duration_seconds"] = time.monotonic() - started
+
+        if on_complete is not None:
+            outcome = on_complete(result)
+            if inspect.isawaitable(outcome):
+                await outcome
+
+        if cancelled:
+            raise asyncio.CancelledError()
+        return result
+
+    @staticmethod
+    async def _stream(process, input_text, spooler):
+        """Feed stdin and copy stdout/stderr into the spooler line by line"""
+        async def pump(reader, stream):
+            async for raw in reader:
+                spooler.write_line(stream, raw.decode(errors="replace"))
+
+        async def feed():
+            if input_text is None:
+                return
+            try:
+                process.stdin.write(input_text.encode())
+                await process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                process.stdin.close()
+
+        await asyncio.gather(pump(process.stdout, "stdout"), pump(process.stderr, "stderr"), feed())
+        await process.wait()
+
+    @staticmethod
+    async def _until_stalled(streaming, spooler, stall_timeout: float):
+        """Await streaming, raising _OutputStalled if the spooler sees no output for stall_timeout seconds"""
+        task = asyncio.ensure_future(streaming)
+        started = time.time()
+        try:
+            while True:
+                idle = time.time() - (spooler.last_output_at or started)
+                if idle >= stall_timeout:
+                    raise _OutputStalled()
+                done, _ = await asyncio.wait({task}, timeout=min(STALL_CHECK_SECONDS, stall_timeout - idle))
+                if done:
+                    return task.result()
+        finally:
+            if not task.done():
+                task.cancel()
+
+    @staticmethod
+    async def _terminate(process):
+        if process is None or process.returncode is not None:
+            return
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), TERMINATE_GRACE_SECONDS)
+        except ProcessLookupError:
+            pass
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Fake depot CLI
+Local stand-in for the depot executable used by the orchestration benchmarks.
+
+Behaviour is tuned with environment variables:
+    FAKE_DEPOT_SPAWN_LATENCY   Seconds before a spawn produces output (default 0.05)
+    FAKE_DEPOT_RUN_DURATION    Seconds a --wait run or --resume probe takes (default 0.1)
+    FAKE_DEPOT_FAILURE_RATE    Probability (0-1) that a spawn fails (default 0)
+    FAKE_DEPOT_OUTPUT_LINES    Lines of agent output per spawn (default 20)
+    FAKE_DEPOT_SESSIONS_FILE   JSON file returned by `claude list-sessions`
+"""
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _arg_value(args, flag):
+    if flag in args:
+        index = args.index(flag)
+        if index + 1 < len(args):
+            return args[index + 1]
+    return None
+
+
+def install_fake_depot(bin_dir: Path) -> Path:
+    """Write a `depot` shim into bin_dir that runs this script with the current interpreter"""
+    bin_dir = Path(bin_dir)
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    shim = bin_dir / "depot"
+    shim.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{Path(__file__).resolve()}" "$@"\n')
+    shim.chmod(0o755)
+    return shim
+
+
+def main() -> int:
+    args = sys.argv[1:]
+
+    if "--version" in args:
+        print("depot 0.0.0-fake")
+        return 0
+
+    if not args or args[0] != "claude":
+        print(f"fake depot: unsupported command {' '.join(args)}", file=sys.stderr)
+        return 2
+
+    if "list-sessions" in args:
+        sessions_file = os.environ.get("FAKE_DEPOT_SESSIONS_FILE")
+        sessions = json.loads(Path(sessions_file).read_text()) if sessions_file and Path(sessions_file).exists() else []
+        print(json.dumps(sessions))
+        return 0
+
+    if "--resume" in args:
+        time.sleep(_env_float("FAKE_DEPOT_RUN_DURATION", 0.1))
+        print(f"Session {_arg_value(args, '--resume')} finished")
+        return 0
+
+    # Spawn: consume the prompt from stdin (spawn_dev_agent) or -p (orchestrator)
+    if not sys.stdin.isatty():
+        sys.stdin.read()
+
+    time.sleep(_env_float("FAKE_DEPOT_SPAWN_LATENCY", 0.05))
+
+    if random.random() < _env_float("FAKE_DEPOT_FAILURE_RATE", 0):
+        print("Error: rate limited by fake depot", file=sys.stderr)
+        return 1
+
+    session_id = _arg_value(args, "--session-id") or "fake-session"
+    print(f"Link: https://depot.dev/claude/sessions/{session_id}")
+    print(f"https://depot.dev/claude/sessions/{session_id}")
+
+    for line in range(int(_env_float("FAKE_DEPOT_OUTPUT_LINES", 20))):
+        print(f"[{session_id}] agent output line {line}")
+
+    if "--wait" in args:
+        time.sleep(_env_float("FAKE_DEPOT_RUN_DURATION", 0.1))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Orchestration Benchmarks
+Measures spawn throughput, scheduler dispatch latency, monitor sweep time,
+session-store query time and bridge CLI startup against a local fake depot CLI,
+and writes JSON results.
+"""
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Benchmarks import the orchestration modules from the parent scripts directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_depot import install_fake_depot
+from parallel_agent_orchestrator import ParallelAgentOrchestrator
+from session_coordinator import VibeLayerSessionCoordinator
+from session_store import SessionStore
+
+DEFAULT_STORE_SIZES = [100, 1000, 10000]
+
+# Days of history (and sessions per day) for the long-history store benchmark; a busy
+# year of sessions spreads over hundreds of day partitions rather than a handful
+DEFAULT_HISTORY_DAYS = 365
+HISTORY_SESSIONS_PER_DAY = 30
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+
+# Median time to first output allowed for read-only bridge CLI commands
+DEFAULT_STARTUP_BUDGET_MS = 100.0
+
+
+def _write_stories(stories_dir: Path, count: int) -> List[Path]:
+    """Write count independent story files"""
+    stories_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index in range(count):
+        story_file = stories_dir / f"bench{index:04d}.md"
+        story_file.write_text(
+            f"# Story: Benchmark Story {index}\n\n"
+            "## Context\nSynthetic story used by the orchestration benchmarks.\n\n"
+            "## Tasks\n- [ ] Implement the benchmark component\n- [ ] Add tests\n\n"
+            "## Acceptance Criteria\n- Component renders\n"
+        )
+        paths.append(story_file)
+    return paths
+
+
+def _percentiles(samples: List[float]) -> Dict:
+    """Summary statistics in milliseconds for samples given in seconds"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "min_ms": ordered[0] * 1000,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "max_ms": ordered[-1] * 1000
+    }
+
+
+def _time_repeated(fn: Callable, repeats: int) -> Dict:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return _percentiles(samples)
+
+
+def bench_spawn_throughput(work_dir: Path, stories: int, max_concurrent: int) -> Dict:
+    """Stories spawned per second through the coordinator and the fake depot CLI"""
+    project_root = work_dir / "spawn-throughput"
+    _write_stories(project_root / "stories", stories)
+    coordinator = VibeLayerSessionCoordinator(str(project_root), max_concurrent=max_concurrent)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = coordinator.coordinate_parallel_development(str(project_root / "stories"), poll_interval=1)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "stories": stories,
+        "max_concurrent": max_concurrent,
+        "sessions_spawned": result.get("sessions_spawned", 0),
+        "sessions_failed": result.get("sessions_failed", 0),
+        "elapsed_seconds": elapsed,
+        "spawns_per_second": result.get("sessions_spawned", 0) / elapsed if elapsed else 0
+    }
+
+
+def bench_dispatch_latency(work_dir: Path, stories: int, max_concurrent: int, spawn_seconds: float) -> Dict:
+    """
+    Delay between a spawn finishing and the scheduler filling its slot
+    Spawns are replaced with an in-process timer so only scheduling overhead is measured.
+    """
+    project_root = work_dir / "dispatch-latency"
+    _write_stories(project_root / "stories", stories)
+    coordinator = VibeLayerSessionCoordinator(str(project_root), max_concurrent=max_concurrent)
+
+    starts, ends = [], []
+    lock = threading.Lock()
+
+    def timed_spawn(story_file_path, story_id=None, force=False):
+        with lock:
+            starts.append(time.perf_counter())
+        time.sleep(spawn_seconds)
+        with lock:
+            ends.append(time.perf_counter())
+        return {"session_id": f"bench-{story_id}", "story_id": story_id}
+
+    coordinator.spawner.spawn_development_agent = timed_spawn
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        coordinator.coordinate_parallel_development(str(project_root / "stories"), poll_interval=1)
+
+    # The k-th dispatch after the initial fill is triggered by the k-th completion
+    starts.sort()
+    ends.sort()
+    latencies = [max(0.0, start - end) for start, end in zip(starts[max_concurrent:], ends)]
+
+    return {
+        "stories": stories,
+        "max_concurrent": max_concurrent,
+        "spawn_seconds": spawn_seconds,
+        "dispatch_latency": _percentiles(latencies)
+    }
+
+
+def bench_monitor_sweep(work_dir: Path, sessions: int, depot_path: Path) -> Dict:
+    """Wall-clock for one monitor sweep reconciling running sessions Depot reports finished"""
+    orchestrator = ParallelAgentOrchestrator(str(work_dir / "monitor-sweep"))
+    orchestrator.depot_path = str(depot_path)
+
+    now = datetime.utcnow().isoformat()
+    orchestrator.store.save_many({
+        "session_id": f"monitor-{index}",
+        "story_id": f"monitor{index}",
+        "status": "running",
+        "started_at": now
+    } for index in range(sessions))
+
+    sessions_file = work_dir / "monitor-sweep" / "depot-sessions.json"
+    sessions_file.write_text(json.dumps([
+        {"id": f"monitor-{index}", "status": "completed"} for index in range(sessions)
+    ]))
+    os.environ["FAKE_DEPOT_SESSIONS_FILE"] = str(sessions_file)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        statuses = orchestrator.monitor_sessions()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "sessions": sessions,
+        "sessions_resolved": len(statuses),
+        "sessions_completed": orchestrator.store.count("completed"),
+        "sweep_seconds": elapsed
+    }
+
+
+def bench_store_queries(work_dir: Path, size: int, repeats: int, spacing: timedelta = timedelta(minutes=1)) -> Dict:
+    """Session-store insert and query times with size sessions on disk, started spacing apart"""
+    store = SessionStore(work_dir / f"store-{size}-{int(spacing.total_seconds())}s")
+    statuses = ["completed", "running", "failed", "spawned"]
+    base = datetime(2026, 1, 1)
+
+    sessions = []
+    for index in range(size):
+        started_at = base + spacing * index
+        status = statuses[index % len(statuses)]
+        sessions.append({
+            "session_id": f"bench-{index}",
+            "story_id": f"story{index % max(1, size // 4)}",
+            "story_hash": f"{index:016x}",
+            "status": status,
+            "agent_type": "development",
+            "started_at": started_at.isoformat(),
+            "completed_at": (started_at + timedelta(minutes=20)).isoformat() if status == "completed" else None
+        })
+
+    start = time.perf_counter()
+    store.save_many(sessions)
+    insert_seconds = time.perf_counter() - start
+
+    revision = store.max_revision()
+    middle = f"bench-{size // 2}"
+    queries = {
+        "get": lambda: store.get(middle),
+        "list_running": lambda: store.list_sessions(status="running"),
+        "story_ids_completed": lambda: store.story_ids_with_status("completed", agent_type="development"),
+        "count_running": lambda: store.count("running"),
+        "story_durations": store.story_durations,
+        "latest_by_hash_miss": lambda: store.latest_by_hash("0" * 64, ("running", "completed")),
+        "changes_since_recent": lambda: store.changes_since(revision - 10),
+        "save_one": lambda: store.save(sessions[size // 2])
+    }
+
+    result = {
+        "sessions": size,
+        "partitions": len(store.partitions()),
+        "insert_seconds": insert_seconds,
+        "queries": {name: _time_repeated(query, repeats) for name, query in queries.items()}
+    }
+    
+    # Retention run that expires the oldest day
+    start = time.perf_counter()
+    store.delete_started_before((base + timedelta(days=1)).isoformat())
+    result["cleanup_oldest_day_seconds"] = time.perf_counter() - start
+    store.close()
+    return result
+
+
+def _time_first_output(cmd: List[str], repeats: int, env: Dict = None) -> Dict:
+    """Time from process start to its first stdout byte, and to exit"""
+    first_output, total = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=SCRIPTS_DIR, env=env)
+        process.stdout.read(1)
+        first_output.append(time.perf_counter() - start)
+        process.stdout.read()
+        process.wait()
+        total.append(time.perf_counter() - start)
+    return {"first_output": _percentiles(first_output), "total": _percentiles(total)}
+
+
+def bench_cli_startup(work_dir: Path, repeats: int, budget_ms: float = DEFAULT_STARTUP_BUDGET_MS) -> Dict:
+    """
+    Bridge CLI startup: module import time and time to first output for read-only commands
+    Each command's median time to first output is checked against budget_ms; a bare
+    interpreter start is reported alongside for reference. depot-status runs without a
+    depot binary on PATH so only the bridge itself is timed.
+    """
+    story_file = _write_stories(work_dir / "startup-stories", 1)[0]
+    bridge = str(SCRIPTS_DIR / "bmad_depot_bridge.py")
+
+    import_samples = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", "import time; start = time.perf_counter(); import bmad_depot_bridge; "
+                                   "print(time.perf_counter() - start)"],
+            capture_output=True, text=True, cwd=SCRIPTS_DIR, check=True
+        ).stdout
+        import_samples.append(float(output))
+
+    no_depot_env = {**os.environ, "PATH": str(Path(sys.executable).parent)}
+    commands = {
+        "validate-story": _time_first_output(
+            [sys.executable, bridge, "validate-story", "--story-file", str(story_file)], repeats),
+        "depot-status": _time_first_output([sys.executable, bridge, "depot-status"], repeats, no_depot_env)
+    }
+
+    return {
+        "import": _percentiles(import_samples),
+        "interpreter": _time_first_output([sys.executable, "-c", "print()"], repeats),
+        "commands": commands,
+        "budget_ms": budget_ms,
+        "within_budget": all(result["first_output"]["p50_ms"] <= budget_ms for result in commands.values())
+    }
+
+
+def run_benchmarks(sizes: List[int] = None, stories: int = 20, max_concurrent: int = 10,
+                   monitor_sessions: int = 50, repeats: int = 20,
+                   startup_budget_ms: float = DEFAULT_STARTUP_BUDGET_MS,
+                   history_days: int = DEFAULT_HISTORY_DAYS) -> Dict:
+    """
+    Run every benchmark against a fake depot CLI in a scratch directory
+
+    The fake depot's latency, duration, failure rate and output volume are taken
+    from the FAKE_DEPOT_* environment variables (see fake_depot.py).
+    """
+    sizes = sizes or DEFAULT_STORE_SIZES
+
+    with tempfile.TemporaryDirectory(prefix="vibelayer-bench-") as temp_dir:
+        work_dir = Path(temp_dir)
+        depot_path = install_fake_depot(work_dir / "bin")
+
+        saved_env = dict(os.environ)
+        os.environ["PATH"] = f"{depot_path.parent}:{os.environ.get('PATH', '')}"
+        os.environ.setdefault("GITHUB_TOKEN", "benchmark-token")
+        os.environ.setdefault("FAKE_DEPOT_SPAWN_LATENCY", "0.05")
+        os.environ.setdefault("FAKE_DEPOT_RUN_DURATION", "0.1")
+
+        try:
+            spawn_latency = float(os.environ["FAKE_DEPOT_SPAWN_LATENCY"])
+            return {
+                "generated_at": datetime.now().isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "fake_depot": {
+                    key: value for key, value in os.environ.items() if key.startswith("FAKE_DEPOT_")
+                },
+                "spawn_throughput": bench_spawn_throughput(work_dir, stories, max_concurrent),
+                "dispatch_latency": bench_dispatch_latency(work_dir, stories * 2, max_concurrent, spawn_latency),
+                "monitor_sweep": bench_monitor_sweep(work_dir, monitor_sessions, depot_path),
+                "store_queries": [bench_store_queries(work_dir, size, repeats) for size in sizes],
+                "store_history": bench_store_queries(work_dir, history_days * HISTORY_SESSIONS_PER_DAY, repeats,
+                                                     timedelta(days=1) / HISTORY_SESSIONS_PER_DAY),
+                "cli_startup": bench_cli_startup(work_dir, min(repeats, 10), startup_budget_ms)
+            }
+        finally:
+            os.environ.clear()
+            os.environ.update(saved_env)
+
+
+def main():
+    """CLI interface for the benchmarks"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark VibeLayer orchestration against a fake depot CLI")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_STORE_SIZES,
+                        help="Session-store sizes to measure query time at")
+    parser.add_argument("--stories", type=int, default=20, help="Stories to spawn in the throughput benchmark")
+    parser.add_argument("--max-concurrent", type=int, default=10, help="Concurrent spawns")
+    parser.add_argument("--monitor-sessions", type=int, default=50, help="Running sessions in the monitor sweep")
+    parser.add_argument("--repeats", type=int, default=20, help="Repetitions per store query")
+    parser.add_argument("--history-days", type=int, default=DEFAULT_HISTORY_DAYS,
+                        help=f"Days of history ({HISTORY_SESSIONS_PER_DAY} sessions each) in the long-history store benchmark")
+    parser.add_argument("--startup-budget-ms", type=float, default=DEFAULT_STARTUP_BUDGET_MS,
+                        help="Allowed median time to first output for read-only bridge CLI commands")
+    parser.add_argument("--output", help="Write JSON results to this file (stdout if omitted)")
+
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.stories, args.max_concurrent, args.monitor_sessions, args.repeats,
+                             args.startup_budget_ms, args.history_days)
+    output = json.dumps(results, indent=2)
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(output + "\n")
+        print(f"📊 Benchmark results written to {args.output}")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
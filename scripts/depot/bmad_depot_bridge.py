@@ -5,28 +5,166 @@ Python implementation to support the BMad Depot Bridge agent
 """
 import os
 import sys
+import glob
 import json
+import time
+from datetime import datetime
+from functools import cached_property
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
 
 # Add the depot scripts to path for imports
 depot_scripts_path = Path(__file__).parent
 sys.path.insert(0, str(depot_scripts_path))
 
-from spawn_dev_agent import VibeLayerDevAgentSpawner
-from session_coordinator import VibeLayerSessionCoordinator
+import metrics
+from story_parser import parse_story_file
+
+if TYPE_CHECKING:
+    from session_coordinator import VibeLayerSessionCoordinator
+    from spawn_dev_agent import VibeLayerDevAgentSpawner
+
+# Story files per process-pool task in validate-stories
+VALIDATION_BATCH_SIZE = 32
+# Below this many files, validating in-process beats starting worker processes
+PARALLEL_VALIDATION_THRESHOLD = 256
+
+# CLI commands that always run in-process, even when a coordinator daemon is running
+LOCAL_COMMANDS = {"depot-status", "validate-story", "validate-stories"}
+
+def validate_story_file(story_file_path: str) -> Dict:
+    """
+    Validate a story file for development agent spawning
+    Following BMAD story requirements; module-level so process-pool workers can run it
+    """
+    story_path = Path(story_file_path)
+    
+    validation_result = {
+        "valid": False,
+        "story_id": None,
+        "issues": [],
+        "context_present": False,
+        "dependencies": []
+    }
+    
+    # Check file exists
+    if not story_path.exists():
+        validation_result["issues"].append(f"Story file not found: {story_file_path}")
+        return validation_result
+    
+    try:
+        story = parse_story_file(story_path)
+        validation_result["story_id"] = story.story_id
+        
+        # Check for essential content sections
+        required_sections = [
+            ("## Context", "Story context and background"),
+            ("## Implementation", "Implementation details"),
+            ("## Acceptance Criteria", "Success criteria")
+        ]
+        
+        for section, description in required_sections:
+            if not story.has_section(section):
+                validation_result["issues"].append(f"Missing {description} section: {section}")
+            else:
+                validation_result["context_present"] = True
+        
+        validation_result["dependencies"] = story.dependencies
+        
+        # Check content length (stories should be substantial)
+        if story.size_estimate < 10:
+            validation_result["issues"].append("Story appears too brief - may lack implementation context")
+        
+        # Check if dependencies are met (basic check)
+        if validation_result["dependencies"]:
+            # This would be enhanced to check actual story completion status
+            validation_result["issues"].append(f"Dependencies found: {', '.join(validation_result['dependencies'])}")
+        
+        # Overall validation
+        if len(validation_result["issues"]) == 0:
+            validation_result["valid"] = True
+        elif validation_result["context_present"] and len(validation_result["issues"]) <= 1:
+            # Allow stories with minor issues if they have context
+            validation_result["valid"] = True
+            
+    except Exception as e:
+        validation_result["issues"].append(f"Error reading story file: {str(e)}")
+    
+    return validation_result
+
+
+def _validate_batch(story_file_paths: List[str]) -> List[Dict]:
+    return [{"story_file": path, **validate_story_file(path)} for path in story_file_paths]
+
+
+def find_story_files(stories: str) -> List[str]:
+    """Story files in a directory (*.md) or matching a glob pattern, sorted"""
+    stories_path = Path(stories)
+    if stories_path.is_dir():
+        return sorted(str(path) for path in stories_path.glob("*.md"))
+    return sorted(glob.glob(stories, recursive=True))
+
+
+def validate_stories(story_file_paths: List[str], max_workers: int = None,
+                     batch_size: int = VALIDATION_BATCH_SIZE,
+                     parallel_threshold: int = PARALLEL_VALIDATION_THRESHOLD) -> Iterator[Dict]:
+    """
+    Validate story files across a process pool, yielding results in completion order
+    
+    Files are sent to workers in batches so per-task overhead stays small next to
+    the validation itself. Small backlogs, and single-CPU hosts, are validated
+    in-process, where starting workers would cost more than it saves.
+    """
+    batches = [story_file_paths[i:i + batch_size] for i in range(0, len(story_file_paths), batch_size)]
+    workers = min(max_workers or os.cpu_count() or 1, len(batches))
+    if workers <= 1 or len(story_file_paths) < parallel_threshold:
+        for batch in batches:
+            yield from _validate_batch(batch)
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for future in as_completed([executor.submit(_validate_batch, batch) for batch in batches]):
+            yield from future.result()
+
+
+def summarize_validation(results: List[Dict], duration_seconds: float) -> Dict:
+    """Aggregate of a validate-stories run"""
+    invalid = [result for result in results if not result["valid"]]
+    return {
+        "total": len(results),
+        "valid": len(results) - len(invalid),
+        "invalid": len(invalid),
+        "with_issues": sum(1 for result in results if result["issues"]),
+        "invalid_stories": sorted(result["story_id"] or result["story_file"] for result in invalid),
+        "duration_seconds": duration_seconds
+    }
+
 
 class BMadDepotBridge:
     """
     Implementation bridge between BMAD orchestrator and Depot sandboxes
     Follows BMAD agent patterns while providing Python functionality
+    
+    The spawner and coordinator (and the asyncio/SQLite machinery behind them) are
+    imported and built on first use, so read-only commands like validate-story and
+    depot-status start fast and never touch .depot/.
     """
     
     def __init__(self, project_root: str = "/home/omar/Documents/VibeLayer"):
         self.project_root = Path(project_root)
-        self.spawner = VibeLayerDevAgentSpawner(str(project_root))
-        self.coordinator = VibeLayerSessionCoordinator(str(project_root))
-        
+    
+    @cached_property
+    def spawner(self) -> "VibeLayerDevAgentSpawner":
+        from spawn_dev_agent import VibeLayerDevAgentSpawner
+        return VibeLayerDevAgentSpawner(str(self.project_root))
+    
+    @cached_property
+    def coordinator(self) -> "VibeLayerSessionCoordinator":
+        from session_coordinator import VibeLayerSessionCoordinator
+        return VibeLayerSessionCoordinator(str(self.project_root))
+    
     def validate_depot_status(self) -> Dict:
         """Check if Depot CLI is installed and accessible"""
         try:
@@ -65,79 +203,29 @@ class BMadDepotBridge:
         Validate a story file for development agent spawning
         Following BMAD story requirements
         """
-        story_path = Path(story_file_path)
-        
-        validation_result = {
-            "valid": False,
-            "story_id": None,
-            "issues": [],
-            "context_present": False,
-            "dependencies": []
-        }
-        
-        # Check file exists
-        if not story_path.exists():
-            validation_result["issues"].append(f"Story file not found: {story_file_path}")
-            return validation_result
-        
-        try:
-            content = story_path.read_text(encoding='utf-8')
-            
-            # Extract story ID
-            story_id = story_path.stem.replace('story_', '').replace('.md', '')
-            validation_result["story_id"] = story_id
-            
-            # Check for essential content sections
-            required_sections = [
-                ("## Context", "Story context and background"),
-                ("## Implementation", "Implementation details"),
-                ("## Acceptance Criteria", "Success criteria")
-            ]
-            
-            for section, description in required_sections:
-                if section.lower() not in content.lower():
-                    validation_result["issues"].append(f"Missing {description} section: {section}")
-                else:
-                    validation_result["context_present"] = True
-            
-            # Extract dependencies
-            if "depends on:" in content.lower():
-                for line in content.split('\n'):
-                    if line.lower().startswith('depends on:'):
-                        deps_str = line.split(':', 1)[1].strip()
-                        validation_result["dependencies"] = [d.strip() for d in deps_str.split(',') if d.strip()]
-                        break
-            
-            # Check content length (stories should be substantial)
-            if len(content.split('\n')) < 10:
-                validation_result["issues"].append("Story appears too brief - may lack implementation context")
-            
-            # Check if dependencies are met (basic check)
-            if validation_result["dependencies"]:
-                # This would be enhanced to check actual story completion status
-                validation_result["issues"].append(f"Dependencies found: {', '.join(validation_result['dependencies'])}")
-            
-            # Overall validation
-            if len(validation_result["issues"]) == 0:
-                validation_result["valid"] = True
-            elif validation_result["context_present"] and len(validation_result["issues"]) <= 1:
-                # Allow stories with minor issues if they have context
-                validation_result["valid"] = True
-                
-        except Exception as e:
-            validation_result["issues"].append(f"Error reading story file: {str(e)}")
+        return validate_story_file(story_file_path)
+    
+    def validate_stories(self, stories: str, max_workers: int = None) -> Iterator[Dict]:
+        """
+        Validate many story files in parallel, yielding each result as it completes
         
-        return validation_result
+        Args:
+            stories: Story directory (its *.md files) or glob pattern (e.g. "docs/stories/**/*.md")
+            max_workers: Worker processes (CPU count if None)
+        """
+        yield from validate_stories(find_story_files(stories), max_workers)
     
-    def spawn_development_agent(self, story_file_path: str, story_id: str = None) -> Dict:
+    def spawn_development_agent(self, story_file_path: str, story_id: str = None, force: bool = False) -> Dict:
         """
         Spawn a development agent for a specific story
         Integrates with BMAD workflow patterns
         """
-        # First validate the story
+        # Prepare the spawn (prompt, credentials) in the background while the story is validated
+        self.spawner.prefetch(story_file_path, story_id)
         validation = self.validate_story_file(story_file_path)
         
         if not validation["valid"]:
+            self.spawner.prefetcher.discard(story_file_path, story_id)
             return {
                 "success": False,
                 "error": "Story validation failed",
@@ -146,14 +234,20 @@ class BMadDepotBridge:
         
         try:
             # Use the spawner to create the development agent
-            session_data = self.spawner.spawn_development_agent(story_file_path, story_id)
+            session_data = self.spawner.spawn_development_agent(story_file_path, story_id, force=force)
+            
+            if session_data.get("reused"):
+                message = f"Story unchanged; reusing existing session for story: {session_data['story_id']}"
+            else:
+                message = f"Development agent spawned for story: {session_data['story_id']}"
             
             return {
                 "success": True,
                 "session_id": session_data["session_id"],
                 "session_url": session_data.get("session_url"),
                 "story_id": session_data["story_id"],
-                "message": f"Development agent spawned for story: {session_data['story_id']}"
+                "reused": bool(session_data.get("reused")),
+                "message": message
             }
             
         except Exception as e:
@@ -162,15 +256,21 @@ class BMadDepotBridge:
                 "error": f"Failed to spawn development agent: {str(e)}"
             }
     
-    def coordinate_parallel_development(self, stories_dir: str = None, max_concurrent: int = 5) -> Dict:
+    def coordinate_parallel_development(self, stories_dir: str = None, max_concurrent: int = 5,
+                                        min_concurrent: int = 1, adaptive: bool = True, force: bool = False,
+                                        requeue_timed_out: bool = True) -> Dict:
         """
         Coordinate parallel development of multiple stories
         Follows BMAD orchestration patterns
         """
         try:
+            self.coordinator.min_concurrent = min_concurrent
+            self.coordinator.adaptive = adaptive
             result = self.coordinator.coordinate_parallel_development(
                 stories_dir=stories_dir,
-                batch_size=max_concurrent
+                batch_size=max_concurrent,
+                force=force,
+                requeue_timed_out=requeue_timed_out
             )
             
             return {
@@ -214,6 +314,23 @@ class BMadDepotBridge:
                 "error": f"Monitoring failed: {str(e)}"
             }
     
+    def plan_development(self, stories_dir: str = None) -> Dict:
+        """Dependency levels of the story backlog, rejecting cycles and missing dependencies"""
+        try:
+            result = self.coordinator.plan_development(stories_dir)
+            if "error" in result:
+                return {"success": False, "plan": result, "error": result["error"]}
+            return {
+                "success": True,
+                "plan": result,
+                "message": f"{result['total_stories']} stories in {len(result['levels'])} dependency levels"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Planning failed: {str(e)}"
+            }
+    
     def get_story_development_status(self, story_id: str) -> Dict:
         """Get development status for a specific story"""
         try:
@@ -250,14 +367,51 @@ class BMadDepotBridge:
                 "error": f"Status check failed: {str(e)}"
             }
     
-    def cleanup_old_sessions(self, days_old: int = 7) -> Dict:
-        """Clean up old session files"""
+    def cancel_session(self, session_id: str) -> Dict:
+        """
+        Cancel a development session
+        The session is stopped on Depot (terminating any in-flight spawn of it in this
+        process first). Only once Depot confirms it stopped is a running session record
+        marked cancelled, so its slot and dependents stop waiting on it.
+        """
+        try:
+            spawn_cancelled = self.spawner.cancel_session(session_id)
+            session = self.spawner.store.get(session_id)
+            if not spawn_cancelled:
+                if session is None:
+                    return {"success": False, "error": f"Session {session_id} not found"}
+                if session.get("status") != "running":
+                    return {"success": False, "session_id": session_id,
+                            "error": f"Session {session_id} is {session.get('status')}, not running"}
+            
+            if not self.spawner.cancel_remote_session(session_id):
+                return {"success": False, "session_id": session_id,
+                        "error": f"Depot did not confirm session {session_id} stopped"}
+            
+            session = self.spawner.store.get(session_id)
+            if session is not None and session.get("status") in ("starting", "running"):
+                session.update(status="cancelled", completed_at=datetime.utcnow().isoformat())
+                self.spawner.store.save(session)
+                metrics.observe_session_duration(session)
+            if spawn_cancelled:
+                return {"success": True, "session_id": session_id, "cancelled": "spawn",
+                        "message": f"Cancelled in-flight spawn {session_id} and its Depot session"}
+            return {"success": True, "session_id": session_id, "cancelled": "session",
+                    "message": f"Cancelled Depot session {session_id}"}
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Cancel failed: {str(e)}"
+            }
+    
+    def cleanup_old_sessions(self, days_old: int = 7, archive: bool = False) -> Dict:
+        """Clean up old session records (archiving them first if requested)"""
         try:
-            result = self.coordinator.cleanup_old_sessions(days_old)
+            result = self.coordinator.cleanup_old_sessions(days_old, archive)
             return {
                 "success": True,
                 "cleanup_result": result,
-                "message": f"Cleaned up {result.get('cleaned_files', 0)} old session files"
+                "message": f"Cleaned up {result.get('cleaned_sessions', 0)} old sessions"
             }
         except Exception as e:
             return {
@@ -271,28 +425,76 @@ def main():
     
     parser = argparse.ArgumentParser(description="BMAD-Depot Bridge - Coordinate development agents")
     parser.add_argument("command", help="Command to execute", choices=[
-        "depot-status", "spawn-dev", "coordinate", "monitor", "story-status", "cleanup", "validate-story"
+        "depot-status", "spawn-dev", "coordinate", "monitor", "story-status", "cleanup", "validate-story",
+        "validate-stories", "plan", "cancel"
     ])
     parser.add_argument("--story-file", help="Path to story file")
     parser.add_argument("--story-id", help="Story identifier")
+    parser.add_argument("--session-id", help="Session identifier (cancel)")
     parser.add_argument("--stories-dir", help="Directory containing story files") 
+    parser.add_argument("--pattern", help="Glob pattern for story files (validate-stories), e.g. 'docs/stories/**/*.md'")
+    parser.add_argument("--workers", type=int, help="Worker processes for validate-stories (default: CPU count)")
     parser.add_argument("--max-concurrent", type=int, default=5, help="Maximum concurrent sessions")
+    parser.add_argument("--min-concurrent", type=int, default=1, help="Lower bound for adaptive concurrency")
+    parser.add_argument("--fixed-concurrency", action="store_true",
+                        help="Always run --max-concurrent sessions instead of adapting to Depot latency and errors")
     parser.add_argument("--timeout", type=int, default=30, help="Monitoring timeout in minutes")
-    parser.add_argument("--days-old", type=int, default=7, help="Clean up files older than N days")
+    parser.add_argument("--force", action="store_true",
+                        help="Respawn unchanged stories that already have a running or completed session")
+    parser.add_argument("--no-requeue", action="store_true",
+                        help="coordinate: do not retry stories whose sessions overran their deadline or stalled")
+    parser.add_argument("--days-old", type=int, default=7, help="Clean up sessions older than N days")
+    parser.add_argument("--archive", action="store_true",
+                        help="Archive cleaned-up sessions to .depot/sessions/archive instead of deleting them")
+    parser.add_argument("--detach", action="store_true",
+                        help="coordinate: return once the coordinator daemon has started the run")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="Run in this process even if a coordinator daemon is running")
+    metrics.add_arguments(parser)
     
     args = parser.parse_args()
+    metrics.configure_from_args(args)
     
     bridge = BMadDepotBridge()
     
+    # A running coordinator daemon already holds the session index, story cache and
+    # credentials; forward to it. Validation and depot-status stay local.
+    remote = None
+    if args.command not in LOCAL_COMMANDS and not args.no_daemon:
+        from coordinator_daemon import DaemonError, RemoteBridge
+        remote = RemoteBridge.connect(bridge.project_root)
+    if args.detach and remote is None:
+        print("Error: --detach requires a running coordinator daemon (coordinator_daemon.py start)")
+        sys.exit(1)
+    
+    if remote is None:
+        result = run_command(bridge, args)
+    else:
+        with remote.client:
+            try:
+                result = run_command(remote, args)
+            except DaemonError as e:
+                result = {"success": False, "error": f"Coordinator daemon: {e}"}
+    
+    if result is not None:
+        print(json.dumps(result, indent=2))
+
+
+def run_command(bridge, args) -> Optional[Dict]:
+    """Run a CLI command against a local bridge or a RemoteBridge (None if it printed its own output)"""
     if args.command == "depot-status":
         result = bridge.validate_depot_status()
     elif args.command == "spawn-dev":
         if not args.story_file:
             print("Error: --story-file required for spawn-dev command")
             sys.exit(1)
-        result = bridge.spawn_development_agent(args.story_file, args.story_id)
+        result = bridge.spawn_development_agent(args.story_file, args.story_id, force=args.force)
     elif args.command == "coordinate":
-        result = bridge.coordinate_parallel_development(args.stories_dir, args.max_concurrent)
+        detach = {"detach": True} if args.detach else {}
+        result = bridge.coordinate_parallel_development(args.stories_dir, args.max_concurrent,
+                                                        args.min_concurrent, not args.fixed_concurrency,
+                                                        force=args.force, requeue_timed_out=not args.no_requeue,
+                                                        **detach)
     elif args.command == "monitor":
         result = bridge.monitor_active_sessions(args.timeout)
     elif args.command == "story-status":
@@ -301,14 +503,33 @@ def main():
             sys.exit(1)
         result = bridge.get_story_development_status(args.story_id)
     elif args.command == "cleanup":
-        result = bridge.cleanup_old_sessions(args.days_old)
+        result = bridge.cleanup_old_sessions(args.days_old, args.archive)
     elif args.command == "validate-story":
         if not args.story_file:
             print("Error: --story-file required for validate-story command")
             sys.exit(1)
         result = bridge.validate_story_file(args.story_file)
+    elif args.command == "plan":
+        result = bridge.plan_development(args.stories_dir)
+    elif args.command == "cancel":
+        if not args.session_id:
+            print("Error: --session-id required for cancel command")
+            sys.exit(1)
+        result = bridge.cancel_session(args.session_id)
+    elif args.command == "validate-stories":
+        if not (args.stories_dir or args.pattern):
+            print("Error: --stories-dir or --pattern required for validate-stories command")
+            sys.exit(1)
+        # One JSON line per story as workers finish, then the summary line
+        start = time.perf_counter()
+        results = []
+        for story_result in bridge.validate_stories(args.pattern or args.stories_dir, args.workers):
+            results.append(story_result)
+            print(json.dumps(story_result), flush=True)
+        print(json.dumps({"summary": summarize_validation(results, round(time.perf_counter() - start, 3))}))
+        return None
     
-    print(json.dumps(result, indent=2))
+    return result
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Concurrency Controller
+Adaptive (AIMD) limit on in-flight sandbox spawns driven by spawn latency, errors and timeouts.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+OUTCOMES = ("success", "error", "timeout")
+
+
+class AdaptiveConcurrencyController:
+    """
+    Additive-increase / multiplicative-decrease limit on concurrent spawns
+
+    Each healthy spawn raises the limit by 1/limit (about +1 per round of spawns).
+    A timeout, an error rate above error_threshold, or spawn latency drifting above
+    latency_tolerance x the best observed latency cuts the limit multiplicatively.
+    Decreases are spaced at least one round of spawns apart, so a burst of failures
+    from the same round only backs off once.
+    """
+
+    def __init__(self, min_limit: int = 1, max_limit: int = 10, initial_limit: int = None,
+                 decrease_factor: float = 0.5, latency_tolerance: float = 2.0,
+                 error_threshold: float = 0.2, error_window: int = 20, smoothing: float = 0.2):
+        if min_limit < 1 or max_limit < min_limit:
+            raise ValueError(f"Invalid concurrency bounds: min {min_limit}, max {max_limit}")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.error_threshold = error_threshold
+        self.smoothing = smoothing
+
+        # Start optimistic and back off on trouble
+        self._limit = float(min(max_limit, max(min_limit, initial_limit or max_limit)))
+        self._outcomes = deque(maxlen=error_window)
+        self._since_decrease = 0
+        self._lock = threading.Lock()
+
+        self.latency_ewma: Optional[float] = None
+        self.baseline_latency: Optional[float] = None
+        self.counts = {outcome: 0 for outcome in OUTCOMES}
+        self.increases = 0
+        self.decreases = 0
+        self.last_reason: Optional[str] = None
+        self.last_adjusted_at: Optional[float] = None
+
+    @property
+    def limit(self) -> int:
+        """Current number of spawns allowed in flight"""
+        with self._lock:
+            return int(self._limit)
+
+    @property
+    def adaptive(self) -> bool:
+        return self.min_limit != self.max_limit
+
+    def record(self, latency: Optional[float], outcome: str = "success"):
+        """
+        Feed back the result of one spawn
+
+        Args:
+            latency: Seconds the spawn took, or None when it carries no latency signal
+                (e.g. a wait-mode run whose duration reflects the story, not Depot)
+            outcome: "success", "error" or "timeout"
+        """
+        if outcome not in OUTCOMES:
+            raise ValueError(f"Unknown spawn outcome: {outcome}")
+
+        with self._lock:
+            self.counts[outcome] += 1
+            self._outcomes.append(outcome != "success")
+            self._since_decrease += 1
+
+            if outcome == "timeout":
+                self._decrease("timeout")
+                return
+
+            if outcome == "error":
+                if self._error_rate() >= self.error_threshold:
+                    self._decrease("error rate")
+                return
+
+            if latency is not None:
+                self.latency_ewma = latency if self.latency_ewma is None else (
+                    self.smoothing * latency + (1 - self.smoothing) * self.latency_ewma)
+                self.baseline_latency = min(self.baseline_latency or self.latency_ewma, self.latency_ewma)
+
+            if self.latency_ewma is not None and self.latency_ewma > self.baseline_latency * self.latency_tolerance:
+                self._decrease("latency")
+            elif self._limit < self.max_limit:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+                self.increases += 1
+                self.last_reason = "healthy"
+                self.last_adjusted_at = time.time()
+
+    def _error_rate(self) -> float:
+        return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def _decrease(self, reason: str):
+        # One backoff per round of in-flight spawns
+        if self._since_decrease < int(self._limit) and self.decreases:
+            return
+        new_limit = max(self.min_limit, self._limit * self.decrease_factor)
+        if new_limit < self._limit:
+            self._limit = new_limit
+            self.decreases += 1
+            self.last_reason = reason
+            self.last_adjusted_at = time.time()
+            self._since_decrease = 0
+        if reason == "latency":
+            # Re-measure the healthy latency at the lower concurrency (or accept the
+            # new level once already at min_limit, so the limit can grow again)
+            self.baseline_latency = None
+            self.latency_ewma = None
+
+    def snapshot(self) -> Dict:
+        """Controller state for inspection (results, logs, CLI output)"""
+        with self._lock:
+            return {
+                "limit": int(self._limit),
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "adaptive": self.adaptive,
+                "latency_ewma_seconds": self.latency_ewma,
+                "baseline_latency_seconds": self.baseline_latency,
+                "error_rate": self._error_rate(),
+                "successes": self.counts["success"],
+                "errors": self.counts["error"],
+                "timeouts": self.counts["timeout"],
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "last_reason": self.last_reason,
+                "last_adjusted_at": self.last_adjusted_at
+            }
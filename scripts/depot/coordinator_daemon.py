@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Coordinator Daemon
+Long-running coordinator that keeps the session index, story discovery cache and
+credential cache in memory, serving requests over a Unix domain socket.
+
+Protocol: one JSON object per line. A request is {"method": ..., "params": {...}};
+each gets one response line, {"ok": true, "result": ...} or {"ok": false, "error": ...}.
+After a "subscribe" request the connection streams session status transitions as
+JSON lines (with {"heartbeat": true} lines while idle) until the client disconnects.
+"""
+import inspect
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from bmad_depot_bridge import BMadDepotBridge
+
+# Overrides the socket location (default: <project root>/.depot/coordinator.sock)
+SOCKET_ENV = "VIBELAYER_DAEMON_SOCKET"
+
+# Seconds a client waits for the daemon to accept before treating it as not running
+CONNECT_TIMEOUT = 0.5
+
+# Idle subscriptions get a heartbeat line this often, which is also how quickly a
+# disconnected subscriber is noticed
+HEARTBEAT_INTERVAL = 15.0
+
+# Transitions buffered per subscriber; a subscriber that falls this far behind is dropped
+SUBSCRIBER_QUEUE_SIZE = 10_000
+
+
+class DaemonError(RuntimeError):
+    """The daemon could not be reached or rejected a request"""
+
+
+def socket_path(project_root) -> Path:
+    """Socket the daemon for a project listens on"""
+    override = os.environ.get(SOCKET_ENV)
+    return Path(override) if override else Path(project_root) / ".depot/coordinator.sock"
+
+
+class DaemonClient:
+    """
+    Client for a running coordinator daemon
+    One connection carries any number of requests; use connect() to find out
+    whether a daemon is running at all.
+    """
+
+    def __init__(self, path: Path, timeout: float = None):
+        self.path = Path(path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._sock.settimeout(CONNECT_TIMEOUT)
+            self._sock.connect(str(self.path))
+        except OSError as e:
+            self._sock.close()
+            raise DaemonError(f"Coordinator daemon not reachable at {self.path}: {e}") from e
+        self._sock.settimeout(timeout)
+        self._file = self._sock.makefile("rwb")
+
+    @classmethod
+    def connect(cls, project_root) -> Optional["DaemonClient"]:
+        """Client for the project's daemon, or None if none is running (a stale socket counts as none)"""
+        path = socket_path(project_root)
+        if not path.exists():
+            return None
+        try:
+            return cls(path)
+        except DaemonError:
+            return None
+
+    def _send(self, method: str, params: Dict):
+        self._file.write(json.dumps({"method": method, "params": params}).encode() + b"\n")
+        self._file.flush()
+
+    def _receive(self) -> Dict:
+        line = self._file.readline()
+        if not line:
+            raise DaemonError("Coordinator daemon closed the connection")
+        return json.loads(line)
+
+    def call(self, method: str, **params):
+        """
+        Make a request and wait for its result
+
+        Raises:
+            DaemonError: The daemon is unreachable or the request failed
+        """
+        self._send(method, params)
+        response = self._receive()
+        if not response.get("ok"):
+            raise DaemonError(response.get("error", "Unknown daemon error"))
+        return response["result"]
+
+    def subscribe(self, timeout: float = None) -> Iterator[Dict]:
+        """
+        Iterate over session status transitions as the daemon sees them
+
+        Args:
+            timeout: Stop after this many seconds without any transition (None waits forever)
+        """
+        # Subscribed by the time this returns, so nothing after it is missed
+        self.call("subscribe", timeout=timeout)
+        return self._events()
+
+    def _events(self) -> Iterator[Dict]:
+        while True:
+            line = self._file.readline()
+            if not line:
+                return
+            event = json.loads(line)
+            if not event.get("heartbeat"):
+                yield event
+
+    def close(self):
+        try:
+            self._file.close()
+        finally:
+            self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class RemoteBridge:
+    """
+    BMadDepotBridge stand-in that forwards to a running daemon
+    Lets the CLIs keep one code path: the same methods, arguments and results, with
+    the work done (and the state kept) in the daemon. Paths are made absolute since
+    the daemon does not share the caller's working directory.
+    """
+
+    def __init__(self, client: DaemonClient):
+        self.client = client
+
+    @classmethod
+    def connect(cls, project_root) -> Optional["RemoteBridge"]:
+        client = DaemonClient.connect(project_root)
+        return cls(client) if client else None
+
+    @staticmethod
+    def _absolute(path: Optional[str]) -> Optional[str]:
+        return os.path.abspath(path) if path else path
+
+    def spawn_development_agent(self, story_file_path: str, story_id: str = None, force: bool = False) -> Dict:
+        return self.client.call("spawn-dev", story_file_path=self._absolute(story_file_path),
+                                story_id=story_id, force=force)
+
+    def coordinate_parallel_development(self, stories_dir: str = None, max_concurrent: int = 5,
+                                        min_concurrent: int = 1, adaptive: bool = True, force: bool = False,
+                                        requeue_timed_out: bool = True, detach: bool = False) -> Dict:
+        return self.client.call("coordinate", stories_dir=self._absolute(stories_dir), max_concurrent=max_concurrent,
+                                min_concurrent=min_concurrent, adaptive=adaptive, force=force,
+                                requeue_timed_out=requeue_timed_out, detach=detach)
+
+    def monitor_active_sessions(self, timeout_minutes: int = 30) -> Dict:
+        return self.client.call("monitor", timeout_minutes=timeout_minutes)
+
+    def get_story_development_status(self, story_id: str) -> Dict:
+        return self.client.call("story-status", story_id=story_id)
+
+    def plan_development(self, stories_dir: str = None) -> Dict:
+        return self.client.call("plan", stories_dir=self._absolute(stories_dir))
+
+    def cancel_session(self, session_id: str) -> Dict:
+        return self.client.call("cancel", session_id=session_id)
+
+    def cleanup_old_sessions(self, days_old: int = 7, archive: bool = False) -> Dict:
+        return self.client.call("cleanup", days_old=days_old, archive=archive)
+
+
+class CoordinatorDaemon:
+    """
+    Coordinator that lives across CLI invocations
+
+    Holds one bridge (and with it the coordinator, spawner, session store, discovery
+    cache and credential cache) for the daemon's lifetime, plus an in-memory index
+    of development sessions kept current by a SessionWatcher. Status requests are
+    answered from the index without touching SQLite; coordination runs keep going
+    after the client that started them disconnects.
+    """
+
+    def __init__(self, project_root: str = "/home/omar/Documents/VibeLayer", path: Path = None):
+        from bmad_depot_bridge import BMadDepotBridge
+        from session_watcher import SessionWatcher
+
+        self.project_root = Path(project_root)
+        self.path = Path(path) if path else socket_path(project_root)
+        self.started_at = time.time()
+
+        self.bridge: "BMadDepotBridge" = BMadDepotBridge(str(self.project_root))
+        # Direct spawns and coordination share one spawner, so one credential cache
+        # and one engine whose in-flight spawns cancel requests can reach
+        self.bridge.spawner = self.bridge.coordinator.spawner
+        self.store = self.bridge.coordinator.store
+
+        self._lock = threading.Lock()
+        self._subscribers: List[queue.Queue] = []
+        self.coordination: Optional[Dict] = None
+        self._server = None
+
+        # Watcher first, so no write between loading the index and watching is missed
+        self._watcher = SessionWatcher(self.store)
+        self.sessions: Dict[str, Dict] = {}
+        self._latest_by_story: Dict[str, str] = {}
+        for session in self.store.list_sessions(agent_type="development"):
+            self._index(session)
+        self._watcher.start(self._on_transitions)
+
+        self.methods: Dict[str, Callable] = {
+            "ping": self.ping,
+            "status": self.status,
+            "story-status": self.story_status,
+            "spawn-dev": self.spawn_development_agent,
+            "coordinate": self.coordinate,
+            "monitor": self.bridge.monitor_active_sessions,
+            "cancel": self.cancel_session,
+            "plan": self.bridge.plan_development,
+            "cleanup": self.bridge.cleanup_old_sessions,
+            "shutdown": self.shutdown
+        }
+
+    def _index(self, session: Dict):
+        """Add or update a session in the in-memory index (caller holds the lock or is __init__)"""
+        session_id = session.get("session_id")
+        if not session_id or session.get("agent_type", "development") != "development":
+            return
+        self.sessions[session_id] = session
+        story_id = session.get("story_id")
+        latest = self.sessions.get(self._latest_by_story.get(story_id))
+        if latest is None or (session.get("started_at") or "") >= (latest.get("started_at") or ""):
+            self._latest_by_story[story_id] = session_id
+
+    def _on_transitions(self, events: List[Dict]):
+        """Watcher callback: refresh the index and fan events out to subscribers"""
+        sessions = [self.store.get(event["session_id"]) for event in events]
+        with self._lock:
+            for session in sessions:
+                if session is not None:
+                    self._index(session)
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            for event in events:
+                try:
+                    subscriber.put_nowait(event)
+                except queue.Full:
+                    # Too far behind; end its stream rather than buffer without bound
+                    self._drop_subscriber(subscriber)
+                    break
+
+    def _drop_subscriber(self, subscriber: queue.Queue):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+        while True:
+            try:
+                subscriber.get_nowait()
+            except queue.Empty:
+                break
+        subscriber.put_nowait(None)
+
+    def ping(self) -> Dict:
+        return {"pid": os.getpid(), "uptime_seconds": time.time() - self.started_at}
+
+    def status(self, session_id: str = None, story_id: str = None) -> Dict:
+        """
+        Daemon and session status from the in-memory index
+
+        Args:
+            session_id: Return this session's record
+            story_id: Return the latest session for this story
+        """
+        with self._lock:
+            if session_id is not None:
+                session = self.sessions.get(session_id)
+                return {"found": session is not None, "session": dict(session) if session else None}
+            if story_id is not None:
+                session = self.sessions.get(self._latest_by_story.get(story_id))
+                return {"found": session is not None, "session": dict(session) if session else None}
+
+            counts: Dict[str, int] = {}
+            running = []
+            for session in self.sessions.values():
+                status = session.get("status", "unknown")
+                counts[status] = counts.get(status, 0) + 1
+                if status == "running":
+                    running.append(session.get("story_id"))
+            coordination = dict(self.coordination) if self.coordination else None
+
+        if coordination:
+            coordination.pop("result", None)
+        return {
+            **self.ping(),
+            "socket": str(self.path),
+            "sessions": counts,
+            "running_stories": sorted(running),
+            "coordination": coordination,
+            "subscribers": len(self._subscribers)
+        }
+
+    def story_status(self, story_id: str) -> Dict:
+        """Same result as BMadDepotBridge.get_story_development_status, served from the index"""
+        session = self.status(story_id=story_id)["session"]
+        if session is None:
+            return {
+                "success": True,
+                "story_id": story_id,
+                "session_found": False,
+                "message": f"No active development session found for story: {story_id}"
+            }
+        return {
+            "success": True,
+            "story_id": story_id,
+            "session_found": True,
+            "session_status": session,
+            "message": f"Story {story_id} status: {session.get('status')}"
+        }
+
+    def _refresh(self, session_id: Optional[str]):
+        """Re-index one session now rather than when its watcher event arrives"""
+        session = self.store.get(session_id) if session_id else None
+        if session is not None:
+            with self._lock:
+                self._index(session)
+
+    def spawn_development_agent(self, story_file_path: str, story_id: str = None, force: bool = False) -> Dict:
+        """BMadDepotBridge.spawn_development_agent, with the new session visible to the next status request"""
+        result = self.bridge.spawn_development_agent(story_file_path, story_id=story_id, force=force)
+        self._refresh(result.get("session_id"))
+        return result
+
+    def cancel_session(self, session_id: str) -> Dict:
+        """BMadDepotBridge.cancel_session, with the cancellation visible to the next status request"""
+        result = self.bridge.cancel_session(session_id)
+        self._refresh(session_id)
+        return result
+
+    def coordinate(self, detach: bool = False, **params) -> Dict:
+        """
+        Run a coordination in the daemon (one at a time)
+
+        Args:
+            detach: Return as soon as coordination starts instead of when it finishes;
+                    progress shows up in status() and the event subscription
+            params: Passed to BMadDepotBridge.coordinate_parallel_development
+        """
+        with self._lock:
+            if self.coordination and self.coordination["status"] == "running":
+                raise DaemonError(f"A coordination is already running (started {self.coordination['started_at']})")
+            coordination = {"status": "running", "started_at": datetime.utcnow().isoformat(), "params": params}
+            self.coordination = coordination
+
+        def run():
+            try:
+                result = self.bridge.coordinate_parallel_development(**params)
+            except Exception as e:
+                result = {"success": False, "error": f"Coordination failed: {str(e)}"}
+            with self._lock:
+                coordination.update(status="finished", finished_at=datetime.utcnow().isoformat(), result=result)
+            return result
+
+        if not detach:
+            return run()
+        threading.Thread(target=run, name="coordination", daemon=True).start()
+        return {"success": True, "detached": True, "message": "Coordination started in the daemon",
+                "coordination": {key: value for key, value in coordination.items() if key != "result"}}
+
+    def dispatch(self, method: str, params: Dict) -> Dict:
+        """Run one request and wrap its outcome in a response"""
+        handler = self.methods.get(method)
+        if handler is None:
+            return {"ok": False, "error": f"Unknown method: {method}"}
+        try:
+            inspect.signature(handler).bind(**params)
+        except TypeError as e:
+            return {"ok": False, "error": f"Bad parameters for {method}: {e}"}
+        try:
+            return {"ok": True, "result": handler(**params)}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    def stream_events(self, send: Callable[[Dict], None], timeout: float = None):
+        """Send status transitions until the client disconnects or timeout seconds pass without one"""
+        subscriber: queue.Queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.append(subscriber)
+
+        try:
+            send({"ok": True, "result": {"subscribed": True}})
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                wait = HEARTBEAT_INTERVAL
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        return
+                try:
+                    event = subscriber.get(timeout=wait)
+                except queue.Empty:
+                    send({"heartbeat": True})
+                    continue
+                if event is None:
+                    return
+                send(event)
+                if timeout is not None:
+                    deadline = time.monotonic() + timeout
+        finally:
+            with self._lock:
+                if subscriber in self._subscribers:
+                    self._subscribers.remove(subscriber)
+
+    def serve_forever(self):
+        """Listen on the socket until shutdown() (or SIGTERM / Ctrl-C in the CLI)"""
+        import socketserver
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def send(self, message: Dict):
+                self.wfile.write(json.dumps(message, default=str).encode() + b"\n")
+                self.wfile.flush()
+
+            def handle(self):
+                try:
+                    for line in self.rfile:
+                        try:
+                            request = json.loads(line)
+                            method, params = request["method"], request.get("params") or {}
+                        except (ValueError, KeyError, TypeError):
+                            self.send({"ok": False, "error": "Requests are JSON objects with a method"})
+                            continue
+                        if method == "subscribe":
+                            daemon.stream_events(self.send, **params)
+                            return
+                        self.send(daemon.dispatch(method, params))
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    # Handler threads are short-lived; release their SQLite connection
+                    daemon.store.close()
+
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        self._claim_socket()
+        # The socket is created by bind(); a restrictive umask keeps other users out from the
+        # start instead of after a chmod
+        previous_umask = os.umask(0o077)
+        try:
+            self._server = Server(str(self.path), Handler)
+        finally:
+            os.umask(previous_umask)
+        print(f"🛰️  Coordinator daemon listening on {self.path} (pid {os.getpid()})")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            self._close()
+
+    def _claim_socket(self):
+        """Remove a stale socket left by a daemon that died; refuse to start next to a live one"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.path.exists():
+            return
+        try:
+            DaemonClient(self.path).close()
+        except DaemonError:
+            self.path.unlink()
+            return
+        raise DaemonError(f"A coordinator daemon is already listening on {self.path}")
+
+    def shutdown(self) -> Dict:
+        """Stop serving after this request; subscriptions end and the socket is removed"""
+        if self._server is not None:
+            threading.Thread(target=self._server.shutdown, name="daemon-shutdown", daemon=True).start()
+        return {"stopping": True, "pid": os.getpid()}
+
+    def _close(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            self._drop_subscriber(subscriber)
+        self._watcher.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def main():
+    """CLI interface: run the daemon, or talk to a running one"""
+    import argparse
+    import signal
+    import sys
+
+    sys.path.insert(0, str(Path(__file__).parent))
+    import metrics
+
+    parser = argparse.ArgumentParser(description="Long-running VibeLayer coordinator with a Unix-socket API")
+    parser.add_argument("command", choices=["start", "status", "stop", "subscribe", "call"],
+                        help="start runs the daemon in the foreground; the rest are client requests")
+    parser.add_argument("method", nargs="?", help="Method for the call command (e.g. story-status)")
+    parser.add_argument("--params", default="{}", help="JSON object of parameters for the call command")
+    parser.add_argument("--project-root", default="/home/omar/Documents/VibeLayer", help="Project root")
+    parser.add_argument("--timeout", type=float, help="subscribe: stop after this many idle seconds")
+    metrics.add_arguments(parser)
+
+    args = parser.parse_args()
+
+    if args.command == "start":
+        metrics.configure_from_args(args)
+        daemon = CoordinatorDaemon(args.project_root)
+        signal.signal(signal.SIGTERM, lambda signum, frame: daemon.shutdown())
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    client = DaemonClient.connect(args.project_root)
+    if client is None:
+        print(f"Error: no coordinator daemon running at {socket_path(args.project_root)}")
+        sys.exit(1)
+
+    with client:
+        try:
+            if args.command == "subscribe":
+                for event in client.subscribe(args.timeout):
+                    print(json.dumps(event), flush=True)
+                return
+            if args.command == "call":
+                if not args.method:
+                    print("Error: method required for call command")
+                    sys.exit(1)
+                result = client.call(args.method, **json.loads(args.params))
+            else:
+                result = client.call("status" if args.command == "status" else "shutdown")
+        except DaemonError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
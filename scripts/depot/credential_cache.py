@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Credential Cache
+Thread-safe, process-shareable TTL cache with single-flight refresh for CLI-resolved secrets.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+
+class SourceUnavailable(Exception):
+    """Raised by a resolver when its source (e.g. the doppler CLI) is not installed"""
+
+
+def default_shared_dir() -> Optional[Path]:
+    """
+    Per-user runtime directory for sharing cached credentials between processes
+    Only used when XDG_RUNTIME_DIR is set, so secrets stay on a private tmpfs.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if not runtime_dir or fcntl is None:
+        return None
+    return Path(runtime_dir) / "vibelayer"
+
+
+class TokenCache:
+    """
+    Caches the first token produced by an ordered list of resolvers
+
+    - Tokens are reused for ttl seconds; an empty result is cached for negative_ttl
+    - Only one caller resolves at a time; concurrent callers wait for its result
+    - Sources that raise SourceUnavailable are skipped for negative_ttl seconds
+    - With a shared directory, the cache and refresh lock are shared across processes
+    """
+
+    def __init__(self, name: str, resolvers: List[Tuple[str, Callable[[], Optional[str]]]],
+                 ttl: float = 900, negative_ttl: float = 300, shared_dir: Optional[Path] = None):
+        self.name = name
+        self.resolvers = resolvers
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.shared_file = Path(shared_dir) / f"{name}.json" if shared_dir else None
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._entry: Optional[Dict] = None
+        self._missing_sources: Dict[str, float] = {}
+
+    def get(self) -> str:
+        """Get the cached token, resolving it if the cache is empty or expired"""
+        start = time.perf_counter()
+        entry = self._fresh_entry()
+        if entry is not None:
+            metrics.TOKEN_FETCH_LATENCY.observe(time.perf_counter() - start, token=self.name, cache="hit")
+            return entry["token"]
+
+        # Single flight: one refresher per process, and per user with a shared file
+        with self._refresh_lock:
+            entry = self._fresh_entry()
+            if entry is not None:
+                # Another caller refreshed it while this one waited
+                metrics.TOKEN_FETCH_LATENCY.observe(time.perf_counter() - start, token=self.name, cache="wait")
+                return entry["token"]
+
+            with self._shared_lock():
+                entry = self._read_shared()
+                if entry is None:
+                    entry = self._resolve()
+                    self._write_shared(entry)
+
+            with self._lock:
+                self._entry = entry
+                self._missing_sources.update(entry.get("missing_sources", {}))
+            metrics.TOKEN_FETCH_LATENCY.observe(time.perf_counter() - start, token=self.name, cache="refresh")
+            return entry["token"]
+
+    def invalidate(self):
+        """Forget the cached token (e.g. after an auth failure)"""
+        with self._lock:
+            self._entry = None
+        if self.shared_file is not None:
+            try:
+                self.shared_file.unlink()
+            except FileNotFoundError:
+                pass
+
+    def snapshot(self) -> Dict:
+        """Cache state for inspection (never includes the token itself)"""
+        with self._lock:
+            entry = self._entry
+            now = time.time()
+            return {
+                "name": self.name,
+                "cached": entry is not None and entry["expires_at"] > now,
+                "source": entry.get("source") if entry else None,
+                "expires_in": max(0.0, entry["expires_at"] - now) if entry else 0.0,
+                "missing_sources": sorted(s for s, until in self._missing_sources.items() if until > now),
+                "shared_file": str(self.shared_file) if self.shared_file else None
+            }
+
+    def _fresh_entry(self) -> Optional[Dict]:
+        with self._lock:
+            if self._entry is not None and self._entry["expires_at"] > time.time():
+                return self._entry
+        return None
+
+    def _resolve(self) -> Dict:
+        now = time.time()
+        missing = {source: until for source, until in self._missing_sources.items() if until > now}
+
+        for source, resolver in self.resolvers:
+            if source in missing:
+                continue
+            try:
+                token = resolver()
+            except SourceUnavailable:
+                missing[source] = now + self.negative_ttl
+                continue
+            if token:
+                return {"token": token, "source": source, "expires_at": now + self.ttl,
+                        "missing_sources": missing}
+
+        # Nothing resolved: remember that briefly so every spawn doesn't retry every source
+        return {"token": "", "source": None, "expires_at": now + self.negative_ttl,
+                "missing_sources": missing}
+
+    def _shared_lock(self):
+        return _FileLock(self.shared_file.with_suffix(".lock")) if self.shared_file else _NullLock()
+
+    def _read_shared(self) -> Optional[Dict]:
+        if self.shared_file is None:
+            return None
+        try:
+            entry = json.loads(self.shared_file.read_text())
+        except (OSError, json.JSONDecodeError):
+            return None
+        if entry.get("expires_at", 0) > time.time() and "token" in entry:
+            return entry
+        return None
+
+    def _write_shared(self, entry: Dict):
+        if self.shared_file is None:
+            return
+        try:
+            self.shared_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp_file = self.shared_file.with_suffix(f".{os.getpid()}.tmp")
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_file, self.shared_file)
+        except OSError as e:
+            print(f"⚠️  Warning: Could not share {self.name} cache: {e}")
+
+
+class _NullLock:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _FileLock:
+    """Exclusive flock on a lock file, used for cross-process single-flight refresh"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        try:
+            self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError:
+            # Fall back to in-process single flight only
+            return self
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except OSError:
+            os.close(fd)
+            return self
+        self._fd = fd
+        return self
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        return False
+
+
+_caches: Dict[str, TokenCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_token_cache(name: str, resolvers: List[Tuple[str, Callable[[], Optional[str]]]],
+                    **kwargs) -> TokenCache:
+    """Get the process-wide cache for a credential, creating it on first use"""
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            kwargs.setdefault("shared_dir", default_shared_dir())
+            cache = _caches[name] = TokenCache(name, resolvers, **kwargs)
+        return cache
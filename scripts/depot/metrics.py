@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Metrics
+Prometheus-style counters, gauges and histograms for the orchestration layer, exported
+through a node_exporter textfile collector and/or a local HTTP endpoint.
+"""
+import atexit
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Spawns and token fetches take milliseconds to minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Agent sessions take minutes to hours
+SESSION_BUCKETS = (60, 300, 600, 1200, 1800, 3600, 7200, 14400, 28800)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class _Metric:
+    """Base for a metric family; children are keyed by their label values"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._values[()] = self._new_value()
+
+    def _new_value(self):
+        return 0.0
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        return _format_labels(tuple(zip(self.labelnames, key)) + extra)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{self._labels(key)} {_format_value(value)}"
+                    for key, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    type_name = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        super().__init__(name, documentation, labelnames)
+
+    def _new_value(self):
+        return {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = self._new_value()
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["buckets"][index] += 1
+                    break
+            entry["sum"] += value
+            entry["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of a with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry["count"] if entry else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, entry in sorted(self._values.items()):
+                cumulative = 0
+                for bound, hits in zip(self.buckets, entry["buckets"]):
+                    cumulative += hits
+                    lines.append(f"{self.name}_bucket{self._labels(key, (('le', _format_value(bound)),))} {cumulative}")
+                lines.append(f"{self.name}_sum{self._labels(key)} {_format_value(entry['sum'])}")
+                lines.append(f"{self.name}_count{self._labels(key)} {entry['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metric families rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_type, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_type(name, *args, **kwargs)
+            elif type(metric) is not metric_type:
+                raise ValueError(f"Metric {name} already registered as a {metric.type_name}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+    def write_textfile(self, path: Path):
+        """
+        Write the metrics for node_exporter's textfile collector
+        The file is replaced atomically so the collector never reads a partial write.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        temp_path.write_text(self.render(), encoding="utf-8")
+        os.replace(temp_path, path)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> "ThreadingHTTPServer":
+        """Serve /metrics from a daemon thread (port 0 picks a free port)"""
+        # Imported here: http.server is costly and most CLI runs never serve metrics
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="vibelayer-metrics", daemon=True).start()
+        return server
+
+
+REGISTRY = MetricsRegistry()
+
+STORIES_DISCOVERED = REGISTRY.gauge(
+    "vibelayer_stories_discovered", "Stories found by the most recent discovery")
+READY_QUEUE_DEPTH = REGISTRY.gauge(
+    "vibelayer_ready_queue_depth", "Stories with dependencies met that are waiting for a spawn slot")
+SESSIONS_IN_FLIGHT = REGISTRY.gauge(
+    "vibelayer_sessions_in_flight", "Spawns currently occupying a concurrency slot")
+SPAWNS = REGISTRY.counter(
+    "vibelayer_spawns_total", "Finished spawn attempts by result (spawned, reused, failed)", ("result",))
+SPAWN_LATENCY = REGISTRY.histogram(
+    "vibelayer_spawn_latency_seconds", "Time from starting a spawn until Depot accepted or rejected it", ("result",))
+SPAWN_FAILURES = REGISTRY.counter(
+    "vibelayer_spawn_failures_total", "Failed spawn attempts by cause (timeout, transient, permanent)", ("reason",))
+TOKEN_FETCH_LATENCY = REGISTRY.histogram(
+    "vibelayer_token_fetch_seconds", "Time to obtain a credential, by cache outcome (hit, wait, refresh)", ("token", "cache"))
+MONITOR_SWEEP_DURATION = REGISTRY.histogram(
+    "vibelayer_monitor_sweep_seconds", "Wall-clock time of one status sweep over running sessions")
+SESSIONS_RECLAIMED = REGISTRY.counter(
+    "vibelayer_sessions_reclaimed_total", "Running sessions timed out by cause (deadline, stalled)", ("reason",))
+SESSIONS_RECONCILED = REGISTRY.counter(
+    "vibelayer_sessions_reconciled_total", "Running sessions moved to the status Depot reported for them", ("status",))
+SESSION_DURATION = REGISTRY.histogram(
+    "vibelayer_session_duration_seconds", "Agent session run time from start to a terminal status", ("status",),
+    buckets=SESSION_BUCKETS)
+
+
+def observe_session_duration(session_data: Dict):
+    """Record a finished session's run time from its started_at/completed_at timestamps"""
+    try:
+        started = datetime.fromisoformat(session_data["started_at"])
+        completed = datetime.fromisoformat(session_data["completed_at"])
+    except (KeyError, TypeError, ValueError):
+        return
+    SESSION_DURATION.observe(max(0.0, (completed - started).total_seconds()),
+                             status=session_data.get("status", "unknown"))
+
+
+# Export configuration for this process (set by configure())
+_textfile: Optional[Path] = None
+_server: Optional["ThreadingHTTPServer"] = None
+_last_flush = 0.0
+_flush_interval = 5.0
+_export_lock = threading.Lock()
+
+
+def configure(textfile: str = None, port: int = None, host: str = "127.0.0.1",
+              flush_interval: float = 5.0) -> Dict:
+    """
+    Enable metric export for this process
+
+    Args:
+        textfile: .prom file rewritten by flush() and at exit (for node_exporter's textfile collector)
+        port: Serve /metrics on this local port while the process runs
+        host: Interface for the HTTP endpoint
+        flush_interval: Minimum seconds between textfile rewrites from periodic flush() calls
+
+    Returns:
+        Export settings, including the bound HTTP address
+    """
+    global _textfile, _server, _flush_interval
+
+    with _export_lock:
+        _flush_interval = flush_interval
+        if textfile and _textfile is None:
+            atexit.register(flush, True)
+        _textfile = Path(textfile) if textfile else _textfile
+        if port is not None and _server is None:
+            _server = REGISTRY.serve(port, host)
+
+    return export_settings()
+
+
+def export_settings() -> Dict:
+    return {
+        "textfile": str(_textfile) if _textfile else None,
+        "http": "http://{}:{}/metrics".format(*_server.server_address[:2]) if _server else None
+    }
+
+
+def flush(force: bool = False):
+    """Rewrite the textfile if export is configured (at most every flush_interval unless forced)"""
+    global _last_flush
+
+    if _textfile is None:
+        return
+    with _export_lock:
+        now = time.monotonic()
+        if not force and now - _last_flush < _flush_interval:
+            return
+        _last_flush = now
+        try:
+            REGISTRY.write_textfile(_textfile)
+        except OSError as e:
+            print(f"⚠️  Warning: Could not write metrics textfile {_textfile}: {e}")
+
+
+def add_arguments(parser):
+    """Add --metrics-textfile/--metrics-port to a CLI parser (defaults from VIBELAYER_METRICS_*)"""
+    port = os.environ.get("VIBELAYER_METRICS_PORT")
+    parser.add_argument("--metrics-textfile", default=os.environ.get("VIBELAYER_METRICS_TEXTFILE"),
+                        help="Write Prometheus metrics to this .prom file (node_exporter textfile collector)")
+    parser.add_argument("--metrics-port", type=int, default=int(port) if port else None,
+                        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics while running")
+
+
+def configure_from_args(args):
+    """Enable export from the options added by add_arguments()"""
+    if args.metrics_textfile or args.metrics_port is not None:
+        settings = configure(args.metrics_textfile, args.metrics_port)
+        if settings["http"]:
+            print(f"📈 Metrics at {settings['http']}")
+
+
+def main():
+    """CLI interface: print this process's (empty) metrics, or serve them for inspection"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect the VibeLayer metric families")
+    parser.add_argument("--port", type=int, help="Serve metrics on this port until interrupted")
+
+    args = parser.parse_args()
+
+    if args.port is None:
+        print(REGISTRY.render(), end="")
+        return
+
+    configure(port=args.port)
+    print(f"📈 Metrics at {export_settings()['http']} (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -11,25 +11,67 @@ import time
 import asyncio
 import argparse
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import metrics
+from async_spawn_engine import AsyncSpawnEngine
+from concurrency_controller import AdaptiveConcurrencyController
+from prompt_compactor import DEFAULT_PROMPT_BUDGET, compact_story
+from session_deadlines import DeadlinePolicy
+from session_logs import SessionLogSpooler, run_with_spooling
+from session_reconciler import LIST_TIMEOUT, ReconcileError, SessionReconciler, fetch_depot_sessions
+from session_store import REUSABLE_STATUSES, SessionStore
+from spawn_retry import failure_reason
+from story_parser import story_id_from_path
 
 class ParallelAgentOrchestrator:
-    def __init__(self, project_root: str = "/home/omar/Documents/VibeLayer"):
+    def __init__(self, project_root: str = "/home/omar/Documents/VibeLayer", prompt_budget: int = DEFAULT_PROMPT_BUDGET):
         self.project_root = Path(project_root)
+        self.prompt_budget = prompt_budget
         self.session_store = self.project_root / ".depot/sessions"
-        self.session_store.mkdir(parents=True, exist_ok=True)
+        self.artifacts_dir = self.project_root / ".depot/artifacts"
+        self.store = SessionStore(self.session_store)
         self.depot_path = "/home/omar/.depot/bin/depot"
+        self.engine = AsyncSpawnEngine()
+        self.concurrency: Optional[AdaptiveConcurrencyController] = None
+        self.deadlines = DeadlinePolicy()
+        self.reconciler = SessionReconciler(self.store, self._list_depot_sessions)
         
     def generate_session_id(self, story_id: str) -> str:
         """Generate session ID for story-based development"""
         timestamp = int(time.time())
         return f"vibelayer-{story_id.replace('.', '-')}-{timestamp}"
     
-    def create_story_prompt(self, story_file: Path, story_id: str) -> str:
-        """Create development prompt from story file"""
-        story_content = story_file.read_text(encoding='utf-8')
+    def get_story_hash(self, story_content: str) -> str:
+        """Hash of story content (same scheme as the development agent spawner)"""
+        return hashlib.sha256(story_content.encode()).hexdigest()
+    
+    def _reusable_session(self, story_hash: str, story_id: str) -> Optional[Dict]:
+        """Running or completed session for identical story content, if any"""
+        existing = self.store.latest_by_hash(story_hash, REUSABLE_STATUSES)
+        if existing:
+            print(f"♻️  Story {story_id} unchanged; reusing session {existing['session_id']} (use --force to respawn)")
+            return {**existing, "reused": True}
+        return None
+    
+    def story_deadline(self, story_id: str, story_content: str) -> float:
+        """Seconds a story's agent run may take, from its size and completed-session history"""
+        return self.deadlines.story_deadline(story_id, story_content.count('\n') + 1, self.store.story_durations())
+    
+    def compact_story(self, story_file: Path, story_content: str) -> Tuple[str, Dict]:
+        """Story content with completed tasks and run history summarized, within the prompt budget"""
+        try:
+            location = str(story_file.resolve().relative_to(self.project_root.resolve()))
+        except ValueError:
+            location = str(story_file)
+        return compact_story(story_content, self.prompt_budget, location)
+    
+    def create_story_prompt(self, story_file: Path, story_id: str, story_content: str = None) -> str:
+        """Create development prompt from story file (compacting it unless story_content is given)"""
+        if story_content is None:
+            story_content, _ = self.compact_story(story_file, story_file.read_text(encoding='utf-8'))
         
         prompt = f"""You are a development agent working on Story {story_id} for VibeLayer.
 
@@ -49,12 +91,8 @@ Then implement each task systematically."""
         
         return prompt
     
-    def spawn_agent(self, story_file: Path, story_id: str, wait: bool = False) -> Dict:
-        """Spawn a single Claude agent for a story"""
-        session_id = self.generate_session_id(story_id)
-        prompt = self.create_story_prompt(story_file, story_id)
-        
-        # Build depot claude command
+    def _build_spawn_command(self, session_id: str, prompt: str, wait: bool) -> List[str]:
+        """Build the depot claude command for a story session"""
         cmd = [
             self.depot_path, "claude",
             "--session-id", session_id,
@@ -67,11 +105,59 @@ Then implement each task systematically."""
         if wait:
             cmd.insert(2, "--wait")  # Add wait flag after 'claude'
         
+        return cmd
+    
+    def _depot_env(self) -> Dict:
+        """Environment with the depot CLI directory on PATH"""
+        return {**os.environ, "PATH": f"{os.path.dirname(self.depot_path)}:{os.environ.get('PATH', '')}"}
+    
+    @staticmethod
+    def _extract_session_url(output: str) -> Optional[str]:
+        """Extract the session link from depot CLI output"""
+        for line in output.split('\n'):
+            if 'Link:' in line:
+                return line.split('Link:')[1].strip()
+        return None
+    
+    def _create_spooler(self, session_id: str) -> SessionLogSpooler:
+        """Stream agent output to .depot/artifacts/<session_id>/ instead of memory"""
+        return SessionLogSpooler(self.artifacts_dir, session_id, url_extractor=self._extract_session_url)
+    
+    def _record_spooled_output(self, session_data: Dict, spooler: SessionLogSpooler):
+        """Store the bounded output tail and log location in the session data"""
+        session_data["output"] = spooler.tail_text("stdout")
+        session_data["error"] = spooler.tail_text("stderr")
+        session_data["log"] = spooler.summary()
+        if spooler.session_url:
+            session_data["session_url"] = spooler.session_url
+    
+    def spawn_agent(self, story_file: Path, story_id: str, wait: bool = False, force: bool = False) -> Dict:
+        """
+        Spawn a single Claude agent for a story
+        Unchanged stories with a running or completed session are not respawned unless force is set.
+        """
+        raw_content = story_file.read_text(encoding='utf-8')
+        story_hash = self.get_story_hash(raw_content)
+        if not force:
+            existing = self._reusable_session(story_hash, story_id)
+            if existing:
+                return existing
+        
+        session_id = self.generate_session_id(story_id)
+        story_content, prompt_stats = self.compact_story(story_file, raw_content)
+        prompt = self.create_story_prompt(story_file, story_id, story_content)
+        
+        # Build depot claude command
+        cmd = self._build_spawn_command(session_id, prompt, wait)
+        
         session_data = {
             "session_id": session_id,
             "story_id": story_id,
             "story_file": str(story_file),
-            "started_at": datetime.now().isoformat(),
+            "story_hash": story_hash,
+            "prompt_stats": prompt_stats,
+            "agent_type": "orchestrator",
+            "started_at": datetime.utcnow().isoformat(),
             "status": "starting"
         }
         
@@ -80,24 +166,31 @@ Then implement each task systematically."""
             
             # Start the process
             if wait:
-                # Synchronous execution with wait
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=3600,  # 1 hour timeout for wait mode
-                    env={**os.environ, "PATH": f"{os.path.dirname(self.depot_path)}:{os.environ.get('PATH', '')}"}
-                )
-                
-                session_data["status"] = "completed" if result.returncode == 0 else "failed"
-                session_data["output"] = result.stdout
-                session_data["error"] = result.stderr
+                # Synchronous execution with wait, streaming output to the session log.
+                # Print mode (-p) writes its output at the end, so only the deadline applies.
+                spooler = self._create_spooler(session_id)
+                try:
+                    returncode = run_with_spooling(
+                        cmd,
+                        spooler,
+                        timeout=self.story_deadline(story_id, raw_content),
+                        env=self._depot_env()
+                    )
+                except subprocess.TimeoutExpired as e:
+                    returncode = None
+                    session_data["timeout_reason"] = "deadline"
+                    timeout_error = f"Session {session_id} timed out after {e.timeout:.0f}s"
+                finally:
+                    spooler.close()
+                    self._record_spooled_output(session_data, spooler)
                 
-                # Extract session URL from output
-                for line in result.stdout.split('\n'):
-                    if 'Link:' in line:
-                        session_data["session_url"] = line.split('Link:')[1].strip()
-                        break
+                if returncode is None:
+                    session_data["status"] = "timeout"
+                    session_data["error"] = timeout_error
+                else:
+                    session_data["status"] = "completed" if returncode == 0 else "failed"
+                session_data["completed_at"] = datetime.utcnow().isoformat()
+                metrics.observe_session_duration(session_data)
                 
             else:
                 # Asynchronous spawn without waiting
@@ -106,7 +199,7 @@ Then implement each task systematically."""
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
                     text=True,
-                    env={**os.environ, "PATH": f"{os.path.dirname(self.depot_path)}:{os.environ.get('PATH', '')}"}
+                    env=self._depot_env()
                 )
                 
                 # Wait briefly for session to start
@@ -120,19 +213,17 @@ Then implement each task systematically."""
                     session_data["status"] = "running"
                     
                     # Extract session URL
-                    for line in stdout.split('\n'):
-                        if 'Link:' in line:
-                            session_data["session_url"] = line.split('Link:')[1].strip()
-                            break
-                            
+                    session_url = self._extract_session_url(stdout)
+                    if session_url:
+                        session_data["session_url"] = session_url
+                    
                 except subprocess.TimeoutExpired:
                     # Process is still running (expected for non-wait mode)
                     session_data["status"] = "running"
                     session_data["output"] = "Agent spawned and running in background"
             
             # Save session data
-            session_file = self.session_store / f"{session_id}.json"
-            session_file.write_text(json.dumps(session_data, indent=2))
+            self.store.save(session_data)
             
             if session_data.get("session_url"):
                 print(f"✅ Agent for Story {story_id} started: {session_data['session_url']}")
@@ -146,8 +237,169 @@ Then implement each task systematically."""
         
         return session_data
     
-    def spawn_parallel_agents(self, story_files: List[Path], max_concurrent: int = 5) -> Dict:
-        """Spawn multiple agents in parallel"""
+    async def spawn_agent_async(self, story_file: Path, story_id: str, timeout: float = None,
+                                on_complete: Callable = None, force: bool = False) -> Dict:
+        """
+        Async counterpart of spawn_agent(wait=True) built on the asyncio spawn engine
+        The session can be cancelled with cancel_session() while it runs. It is
+        terminated after timeout seconds (the story's deadline if None).
+        """
+        raw_content = story_file.read_text(encoding='utf-8')
+        story_hash = self.get_story_hash(raw_content)
+        if not force:
+            existing = self._reusable_session(story_hash, story_id)
+            if existing:
+                return existing
+        
+        session_id = self.generate_session_id(story_id)
+        story_content, prompt_stats = self.compact_story(story_file, raw_content)
+        prompt = self.create_story_prompt(story_file, story_id, story_content)
+        cmd = self._build_spawn_command(session_id, prompt, wait=True)
+        timeout = timeout or self.story_deadline(story_id, raw_content)
+        
+        session_data = {
+            "session_id": session_id,
+            "story_id": story_id,
+            "story_file": str(story_file),
+            "story_hash": story_hash,
+            "prompt_stats": prompt_stats,
+            "agent_type": "orchestrator",
+            "started_at": datetime.utcnow().isoformat(),
+            "status": "running"
+        }
+        self.store.save(session_data)
+        
+        print(f"🚀 Spawning agent for Story {story_id} (Session: {session_id})")
+        
+        spooler = self._create_spooler(session_id)
+        try:
+            result = await self.engine.run(session_id, cmd, env=self._depot_env(),
+                                           timeout=timeout, on_complete=on_complete, spooler=spooler)
+        except asyncio.CancelledError:
+            session_data["status"] = "cancelled"
+            self._record_spooled_output(session_data, spooler)
+            self.store.save(session_data)
+            raise
+        finally:
+            spooler.close()
+        
+        session_data["status"] = {"completed": "completed", "timeout": "timeout"}.get(result["status"], "failed")
+        session_data["completed_at"] = datetime.utcnow().isoformat()
+        self._record_spooled_output(session_data, spooler)
+        if result["status"] == "timeout":
+            session_data["error"] = result["stderr"]
+        metrics.observe_session_duration(session_data)
+        
+        self.store.save(session_data)
+        
+        if session_data["status"] == "completed":
+            print(f"✅ Agent for Story {story_id} completed (Session: {session_id})")
+        else:
+            print(f"❌ Agent for Story {story_id} {session_data['status']}: {result['stderr'][:200]}")
+        
+        return session_data
+    
+    @staticmethod
+    def _spawn_outcome(session_data: Dict) -> str:
+        """Classify a spawn result for the concurrency controller"""
+        status = session_data.get("status")
+        if status in ("running", "completed"):
+            return "success"
+        return "timeout" if status == "timeout" else "error"
+    
+    @staticmethod
+    def _record_spawn_metrics(session_data: Dict, latency: float = None):
+        """Count a finished spawn (and its latency, when it reflects Depot rather than the story)"""
+        if session_data.get("status") in ("running", "completed"):
+            spawn_result = "reused" if session_data.get("reused") else "spawned"
+        else:
+            spawn_result = "failed"
+            reason = "timeout" if session_data.get("status") == "timeout" else failure_reason(session_data.get("error", ""))
+            metrics.SPAWN_FAILURES.inc(reason=reason)
+        metrics.SPAWNS.inc(result=spawn_result)
+        if latency is not None:
+            metrics.SPAWN_LATENCY.observe(latency, result=spawn_result)
+    
+    def _start_concurrency(self, max_concurrent: int, min_concurrent: int, adaptive: bool) -> AdaptiveConcurrencyController:
+        """Fresh controller for one parallel run (fixed at max_concurrent unless adaptive)"""
+        self.concurrency = AdaptiveConcurrencyController(
+            min_limit=min(min_concurrent, max_concurrent) if adaptive else max_concurrent,
+            max_limit=max_concurrent
+        )
+        return self.concurrency
+    
+    async def spawn_parallel_agents_async(self, story_files: List[Path], max_concurrent: int = 5,
+                                          timeout: float = None, min_concurrent: int = 1,
+                                          adaptive: bool = True, force: bool = False) -> Dict:
+        """
+        Run agents for many stories concurrently from a single event loop
+        Agents in flight are capped by the adaptive concurrency controller, which
+        backs off on errors and timeouts and recovers while runs succeed.
+        """
+        results = {
+            "sessions": [],
+            "successful": 0,
+            "failed": 0,
+            "total": len(story_files)
+        }
+        
+        print(f"\n🎯 Running {len(story_files)} agents (max {max_concurrent} concurrent)")
+        concurrency = self._start_concurrency(max_concurrent, min_concurrent, adaptive)
+        slot_freed = asyncio.Condition()
+        in_flight = 0
+        
+        async def run_one(story_file: Path) -> Dict:
+            nonlocal in_flight
+            story_id = story_id_from_path(story_file)
+            async with slot_freed:
+                await slot_freed.wait_for(lambda: in_flight < concurrency.limit)
+                in_flight += 1
+                metrics.SESSIONS_IN_FLIGHT.set(in_flight)
+            try:
+                try:
+                    session_data = await self.spawn_agent_async(story_file, story_id, timeout=timeout, force=force)
+                except Exception as e:
+                    session_data = {"story_id": story_id, "status": "exception", "error": str(e)}
+                # Run duration reflects the story, not Depot, so only outcomes steer the limit
+                if not session_data.get("reused"):
+                    concurrency.record(None, self._spawn_outcome(session_data))
+                self._record_spawn_metrics(session_data)
+                return session_data
+            finally:
+                async with slot_freed:
+                    in_flight -= 1
+                    metrics.SESSIONS_IN_FLIGHT.set(in_flight)
+                    metrics.flush()
+                    slot_freed.notify_all()
+        
+        for session_data in await asyncio.gather(*(run_one(f) for f in story_files)):
+            results["sessions"].append(session_data)
+            if session_data["status"] == "completed":
+                results["successful"] += 1
+            else:
+                results["failed"] += 1
+        
+        results["concurrency"] = concurrency.snapshot()
+        metrics.flush(force=True)
+        print(f"📊 Results: {results['successful']} successful, {results['failed']} failed")
+        return results
+    
+    def cancel_session(self, session_id: str) -> bool:
+        """Cancel an in-flight async agent by session ID"""
+        return self.engine.cancel(session_id)
+    
+    def _timed_spawn(self, story_file: Path, story_id: str, force: bool = False) -> Tuple[Dict, float]:
+        start = time.monotonic()
+        session_data = self.spawn_agent(story_file, story_id, wait=False, force=force)
+        return session_data, time.monotonic() - start
+    
+    def spawn_parallel_agents(self, story_files: List[Path], max_concurrent: int = 5,
+                              min_concurrent: int = 1, adaptive: bool = True, force: bool = False) -> Dict:
+        """
+        Spawn multiple agents in parallel
+        The number of spawns in flight follows the adaptive concurrency controller,
+        bounded by min_concurrent and max_concurrent.
+        """
         results = {
             "sessions": [],
             "successful": 0,
@@ -158,125 +410,169 @@ Then implement each task systematically."""
         print(f"\n🎯 Spawning {len(story_files)} agents (max {max_concurrent} concurrent)")
         print("=" * 60)
         
+        concurrency = self._start_concurrency(max_concurrent, min_concurrent, adaptive)
+        pending = [(story_file, story_id_from_path(story_file)) for story_file in story_files]
+        in_flight = {}
+        
         with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
-            # Submit all tasks
-            future_to_story = {}
-            for story_file in story_files:
-                story_id = story_file.stem.replace('story_', '')
-                future = executor.submit(self.spawn_agent, story_file, story_id, wait=False)
-                future_to_story[future] = (story_file, story_id)
-                time.sleep(2)  # Stagger spawns slightly
-            
-            # Collect results
-            for future in as_completed(future_to_story):
-                story_file, story_id = future_to_story[future]
-                try:
-                    session_data = future.result(timeout=60)
-                    results["sessions"].append(session_data)
-                    
-                    if session_data["status"] in ["running", "completed"]:
-                        results["successful"] += 1
-                    else:
-                        results["failed"] += 1
+            while pending or in_flight:
+                # Submit while the controller has free slots
+                while pending and len(in_flight) < concurrency.limit:
+                    story_file, story_id = pending.pop(0)
+                    in_flight[executor.submit(self._timed_spawn, story_file, story_id, force)] = (story_file, story_id)
+                    metrics.SESSIONS_IN_FLIGHT.set(len(in_flight))
+                    if pending:
+                        time.sleep(2)  # Stagger spawns slightly
+                
+                # Collect results
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    story_file, story_id = in_flight.pop(future)
+                    try:
+                        session_data, latency = future.result()
+                        if not session_data.get("reused"):
+                            # A reused session never reached Depot; its near-zero latency would skew the baseline
+                            concurrency.record(latency, self._spawn_outcome(session_data))
+                        self._record_spawn_metrics(session_data, latency)
+                        results["sessions"].append(session_data)
                         
-                except Exception as e:
-                    print(f"❌ Exception for Story {story_id}: {e}")
-                    results["failed"] += 1
-                    results["sessions"].append({
-                        "story_id": story_id,
-                        "status": "exception",
-                        "error": str(e)
-                    })
+                        if session_data["status"] in ["running", "completed"]:
+                            results["successful"] += 1
+                        else:
+                            results["failed"] += 1
+                            
+                    except Exception as e:
+                        print(f"❌ Exception for Story {story_id}: {e}")
+                        concurrency.record(None, "error")
+                        self._record_spawn_metrics({"status": "exception", "error": str(e)})
+                        results["failed"] += 1
+                        results["sessions"].append({
+                            "story_id": story_id,
+                            "status": "exception",
+                            "error": str(e)
+                        })
+                
+                metrics.SESSIONS_IN_FLIGHT.set(len(in_flight))
+                metrics.flush()
         
+        results["concurrency"] = concurrency.snapshot()
+        metrics.flush(force=True)
         print("\n" + "=" * 60)
         print(f"📊 Results: {results['successful']} successful, {results['failed']} failed")
         
         return results
     
-    def monitor_sessions(self, session_ids: List[str] = None) -> Dict:
-        """Monitor running sessions"""
+    def _list_depot_sessions(self, timeout: float = LIST_TIMEOUT) -> List[Dict]:
+        """Every session Depot knows about, from one depot claude list-sessions call"""
+        return fetch_depot_sessions(timeout, self.depot_path, self._depot_env())
+    
+    def iter_session_statuses(self, session_ids: List[str] = None,
+                              deadline: float = None) -> Iterator[Tuple[str, Dict]]:
+        """
+        Reconcile sessions with Depot and yield (session_id, status) for each
+        
+        One depot claude list-sessions call covers the whole sweep; running sessions
+        Depot reports finished are updated in the store (one transaction) before
+        anything is yielded.
+        
+        Args:
+            session_ids: Sessions to report (all running sessions if None)
+            deadline: Optional deadline in seconds for the Depot listing; if it is
+                exceeded (or the listing fails) every session is reported with
+                status "unknown"
+        """
+        running = {data["session_id"]: data for data in self.store.list_sessions(status="running")}
         if session_ids is None:
-            # Get all running sessions
-            session_ids = []
-            for session_file in self.session_store.glob("*.json"):
-                try:
-                    data = json.loads(session_file.read_text())
-                    if data.get("status") == "running":
-                        session_ids.append(data["session_id"])
-                except:
-                    continue
+            session_ids = list(running)
+        
+        if not session_ids:
+            return
+        
+        try:
+            swept = self.reconciler.reconcile([running[sid] for sid in session_ids if sid in running],
+                                              timeout=deadline or LIST_TIMEOUT)
+        except ReconcileError as e:
+            for session_id in session_ids:
+                yield session_id, {"status": "unknown", "error": str(e)}
+            return
+        
+        changed = {data["session_id"]: data for data in swept["transitions"]}
+        for session_id in session_ids:
+            reported = swept["remote"].get(session_id)
+            if session_id in changed:
+                yield session_id, {"status": changed[session_id]["status"], "depot_state": reported["state"],
+                                   "changed": True}
+            elif reported is not None:
+                yield session_id, {"status": reported["status"] or reported["state"], "depot_state": reported["state"]}
+            else:
+                local = running.get(session_id) or self.store.get(session_id)
+                yield session_id, {"status": local.get("status", "unknown") if local else "unknown",
+                                   "error": "Not listed by Depot"}
+    
+    def monitor_sessions(self, session_ids: List[str] = None, deadline: float = None,
+                         on_status: Callable[[str, Dict], None] = None) -> Dict:
+        """
+        Monitor running sessions
+        
+        A sweep is a single Depot listing however many sessions are running, so it
+        takes about as long as one CLI call. on_status is called for each session.
+        """
+        if session_ids is None:
+            session_ids = [data["session_id"] for data in self.store.list_sessions(status="running")]
         
         print(f"\n📊 Monitoring {len(session_ids)} sessions...")
         
         statuses = {}
-        for session_id in session_ids:
-            # Check depot session status
-            cmd = [self.depot_path, "claude", "--resume", session_id, "--wait"]
-            
-            try:
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=10,
-                    env={**os.environ, "PATH": f"{os.path.dirname(self.depot_path)}:{os.environ.get('PATH', '')}"}
-                )
-                
-                statuses[session_id] = {
-                    "status": "completed" if result.returncode == 0 else "running",
-                    "output": result.stdout[:500]  # First 500 chars
-                }
-                
-            except subprocess.TimeoutExpired:
-                statuses[session_id] = {"status": "running"}
-            except Exception as e:
-                statuses[session_id] = {"status": "error", "error": str(e)}
+        with metrics.MONITOR_SWEEP_DURATION.time():
+            for session_id, status in self.iter_session_statuses(session_ids, deadline):
+                statuses[session_id] = status
+                if on_status is not None:
+                    on_status(session_id, status)
+        metrics.flush()
         
         return statuses
     
     def list_sessions(self) -> List[Dict]:
-        """List all sessions"""
-        sessions = []
-        
-        # Get depot sessions list
-        cmd = [self.depot_path, "claude", "list-sessions", "--output", "json"]
+        """
+        List all sessions, one entry per session
         
+        Local records are first reconciled with Depot's listing, then sessions only
+        Depot knows about (e.g. started elsewhere) are added from that same listing.
+        """
+        remote = {}
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=10,
-                env={**os.environ, "PATH": f"{os.path.dirname(self.depot_path)}:{os.environ.get('PATH', '')}"}
-            )
-            
-            if result.returncode == 0 and result.stdout:
-                depot_sessions = json.loads(result.stdout)
-                sessions.extend(depot_sessions)
-                
-        except Exception as e:
+            remote = self.reconciler.reconcile()["remote"]
+        except ReconcileError as e:
             print(f"Warning: Could not get depot sessions: {e}")
         
-        # Also check local session files
-        for session_file in self.session_store.glob("*.json"):
-            try:
-                data = json.loads(session_file.read_text())
-                sessions.append({
-                    "session_id": data.get("session_id"),
-                    "story_id": data.get("story_id"),
-                    "status": data.get("status"),
-                    "started_at": data.get("started_at"),
-                    "url": data.get("session_url")
-                })
-            except:
-                continue
-        
-        return sessions
+        sessions = {}
+        for data in self.store.list_sessions():
+            reported = remote.get(data.get("session_id"), {})
+            sessions[data.get("session_id")] = {
+                "session_id": data.get("session_id"),
+                "story_id": data.get("story_id"),
+                "status": data.get("status"),
+                "started_at": data.get("started_at"),
+                "url": data.get("session_url") or reported.get("url")
+            }
+        
+        for session_id, reported in remote.items():
+            if session_id not in sessions:
+                sessions[session_id] = {
+                    "session_id": session_id,
+                    "story_id": reported["story_id"],
+                    "status": reported["status"] or reported["state"],
+                    "started_at": reported["started_at"],
+                    "url": reported["url"]
+                }
+        
+        return list(sessions.values())
 
 
 def main():
     """CLI interface for parallel agent orchestrator"""
     parser = argparse.ArgumentParser(description="Orchestrate parallel Claude agents for story development")
+    metrics.add_arguments(parser)
     
     subparsers = parser.add_subparsers(dest="command", help="Commands")
     
@@ -285,16 +581,23 @@ def main():
     spawn_parser.add_argument("--stories", nargs="+", help="Story file paths")
     spawn_parser.add_argument("--all", action="store_true", help="Spawn for all stories in docs/stories/")
     spawn_parser.add_argument("--max-concurrent", type=int, default=5, help="Max concurrent agents")
+    spawn_parser.add_argument("--min-concurrent", type=int, default=1, help="Lower bound for adaptive concurrency")
+    spawn_parser.add_argument("--fixed-concurrency", action="store_true",
+                              help="Always run --max-concurrent agents instead of adapting to Depot latency and errors")
+    spawn_parser.add_argument("--force", action="store_true", help="Respawn stories that already have a running or completed session")
     spawn_parser.add_argument("--epic", help="Spawn all stories for specific epic (e.g., 1)")
     
     # Monitor command
     monitor_parser = subparsers.add_parser("monitor", help="Monitor running sessions")
     monitor_parser.add_argument("--sessions", nargs="+", help="Specific session IDs to monitor")
+    monitor_parser.add_argument("--deadline", type=float, help="Deadline in seconds for the Depot session listing")
+    monitor_parser.add_argument("--aggregate", action="store_true", help="Print one JSON object at the end instead of streaming JSON lines")
     
     # List command
     list_parser = subparsers.add_parser("list", help="List all sessions")
     
     args = parser.parse_args()
+    metrics.configure_from_args(args)
     
     orchestrator = ParallelAgentOrchestrator()
     
@@ -331,7 +634,9 @@ def main():
             print(f"  - {f.name}")
         
         # Spawn agents
-        results = orchestrator.spawn_parallel_agents(story_files, args.max_concurrent)
+        results = orchestrator.spawn_parallel_agents(story_files, args.max_concurrent,
+                                                     args.min_concurrent, not args.fixed_concurrency,
+                                                     force=args.force)
         
         # Save results
         results_file = orchestrator.project_root / ".depot/orchestration-results.json"
@@ -340,8 +645,14 @@ def main():
         print(f"\n✅ Results saved to {results_file}")
         
     elif args.command == "monitor":
-        statuses = orchestrator.monitor_sessions(args.sessions)
-        print(json.dumps(statuses, indent=2))
+        if args.aggregate:
+            statuses = orchestrator.monitor_sessions(args.sessions, args.deadline)
+            print(json.dumps(statuses, indent=2))
+        else:
+            # One JSON line per session
+            with metrics.MONITOR_SWEEP_DURATION.time():
+                for session_id, status in orchestrator.iter_session_statuses(args.sessions, args.deadline):
+                    print(json.dumps({"session_id": session_id, **status}), flush=True)
         
     elif args.command == "list":
         sessions = orchestrator.list_sessions()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Prompt Compactor
+Shrinks story content before it is embedded in agent prompts: completed tasks and
+historical record sections are summarized, and the result is held to a size budget.
+"""
+import re
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+# Prompt budget in characters for the story portion of an agent prompt
+DEFAULT_PROMPT_BUDGET = 32_000
+
+# Sections written by previous agent runs; the agent updates them in the story file
+# itself, so their history adds cost to the prompt without adding context
+HISTORY_SECTIONS = {
+    "dev agent record",
+    "change log",
+    "debug log",
+    "debug log references",
+    "completion notes",
+    "completion notes list",
+    "agent model used",
+    "qa results"
+}
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+CHECKED_TASK = re.compile(r"^(\s*)[-*+]\s+\[[xX]\]")
+OPEN_TASK = re.compile(r"^\s*[-*+]\s+\[ \]")
+FENCE = re.compile(r"^\s*(```|~~~)")
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def _checked_with_open_subtasks(lines: List[str]) -> Set[int]:
+    """Indexes of checked tasks with an unchecked task somewhere beneath them"""
+    keep = set()
+    in_fence = False
+    checked: List[Tuple[int, int]] = []  # (indent, index) of the checked tasks enclosing this line
+    for index, line in enumerate(lines):
+        was_in_fence = in_fence
+        if FENCE.match(line):
+            in_fence = not in_fence
+        if was_in_fence or not line.strip():
+            continue
+        indent = _indent(line)
+        while checked and checked[-1][0] >= indent:
+            checked.pop()
+        if OPEN_TASK.match(line):
+            keep.update(task_index for _, task_index in checked)
+        elif CHECKED_TASK.match(line):
+            checked.append((indent, index))
+    return keep
+
+
+def compact_story(content: str, budget_chars: int = DEFAULT_PROMPT_BUDGET,
+                  source_path: str = None) -> Tuple[str, Dict]:
+    """
+    Compact story markdown for use in an agent prompt
+
+    Args:
+        content: Raw story file content
+        budget_chars: Maximum size of the compacted story (None for no limit)
+        source_path: Story file path mentioned in summaries so the agent can read the original
+
+    Returns:
+        (compacted content, stats) where stats records before/after sizes and what was dropped
+    """
+    lines = content.split("\n")
+    output: List[str] = []
+    stats = {
+        "original_chars": len(content),
+        "compacted_chars": 0,
+        "budget_chars": budget_chars,
+        "completed_tasks_dropped": 0,
+        "sections_dropped": [],
+        "truncated": False
+    }
+
+    # Checked tasks with open work beneath them stay, as context for that work
+    keep_checked = _checked_with_open_subtasks(lines)
+
+    in_fence = False
+    drop_level = None          # heading level of the history section being dropped
+    dropped_lines = 0
+    task_indent = None         # indent of the checked task whose subtasks are being dropped
+    pending_tasks = 0          # checked tasks dropped since the last summary line
+    pending_indent = ""
+
+    def flush_tasks():
+        nonlocal pending_tasks
+        if pending_tasks:
+            plural = "s" if pending_tasks != 1 else ""
+            output.append(f"{pending_indent}- _({pending_tasks} completed task{plural} omitted)_")
+            pending_tasks = 0
+
+    def flush_section():
+        nonlocal dropped_lines
+        if drop_level is not None:
+            where = f" (see {source_path})" if source_path else ""
+            output.append(f"_{stats['sections_dropped'][-1]}: {dropped_lines} lines from previous runs omitted{where}_")
+            output.append("")
+            dropped_lines = 0
+
+    for index, line in enumerate(lines):
+        was_in_fence = in_fence
+        heading = None if in_fence else HEADING.match(line)
+        if FENCE.match(line):
+            in_fence = not in_fence
+
+        if heading:
+            level = len(heading.group(1))
+            title = heading.group(2).strip()
+            if drop_level is not None and level <= drop_level:
+                flush_section()
+                drop_level = None
+            if drop_level is None and title.lower().rstrip(":") in HISTORY_SECTIONS:
+                flush_tasks()
+                task_indent = None
+                stats["sections_dropped"].append(title)
+                output.append(line)
+                drop_level = level
+                continue
+
+        if drop_level is not None:
+            dropped_lines += 1
+            continue
+
+        # Subtasks and continuation lines of a dropped checked task go with it
+        if task_indent is not None:
+            if was_in_fence or not line.strip() or _indent(line) > task_indent:
+                continue
+            task_indent = None
+
+        checked = None if was_in_fence or index in keep_checked else CHECKED_TASK.match(line)
+        if checked:
+            if not pending_tasks:
+                pending_indent = checked.group(1)
+            pending_tasks += 1
+            stats["completed_tasks_dropped"] += 1
+            task_indent = _indent(line)
+            continue
+
+        if pending_tasks and line.strip():
+            flush_tasks()
+        output.append(line)
+
+    flush_tasks()
+    flush_section()
+
+    compacted = re.sub(r"\n{3,}", "\n\n", "\n".join(output)).strip() + "\n"
+    if len(compacted) >= len(content):
+        # Summary lines can outweigh what they replace in small stories
+        compacted = content
+        stats["completed_tasks_dropped"] = 0
+        stats["sections_dropped"] = []
+
+    if budget_chars is not None and len(compacted) > budget_chars:
+        where = f"; read the full story at {source_path}" if source_path else ""
+        markers = ("\n\n_[{} more characters omitted to fit the prompt budget" + where + "]_\n",
+                   "\n\n_[{} more characters omitted]_\n")
+        # The first marker that fits with the widest possible count; none in a tiny budget
+        marker = next((marker for marker in markers if len(marker.format(len(compacted))) <= budget_chars), None)
+        if marker is None:
+            compacted = compacted[:budget_chars]
+        else:
+            keep = budget_chars - len(marker.format(len(compacted)))
+            cut = compacted.rfind("\n", 0, keep)
+            kept = compacted[:cut if cut > 0 else keep].rstrip()
+            compacted = kept + marker.format(len(compacted) - len(kept))
+        stats["truncated"] = True
+
+    stats["compacted_chars"] = len(compacted)
+    return compacted, stats
+
+
+def main():
+    """CLI interface for the prompt compactor"""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Show the compacted form of a story as sent to agents")
+    parser.add_argument("story_file", help="Path to story file")
+    parser.add_argument("--budget", type=int, default=DEFAULT_PROMPT_BUDGET, help="Size budget in characters")
+    parser.add_argument("--stats", action="store_true", help="Print size statistics instead of the compacted story")
+
+    args = parser.parse_args()
+
+    story_path = Path(args.story_file)
+    compacted, stats = compact_story(story_path.read_text(encoding="utf-8"), args.budget, str(story_path))
+
+    if args.stats:
+        print(json.dumps(stats, indent=2))
+    else:
+        print(compacted, end="")
+
+if __name__ == "__main__":
+    main()
@@ -5,23 +5,49 @@ Manages multiple concurrent development agent sessions and coordinates parallel
 """
 import os
 import json
+import sys
+import heapq
 import subprocess
-import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 import threading
+import time
 
+import metrics
+from concurrency_controller import AdaptiveConcurrencyController
+from coordinator_daemon import DaemonError, RemoteBridge
+from spawn_retry import CircuitBreaker, RetryPolicy, SpawnError
 from spawn_dev_agent import VibeLayerDevAgentSpawner
+from spawn_prefetch import DEFAULT_PREFETCH_DEPTH
+from session_deadlines import SessionReaper
+from session_reconciler import ReconcileError, SessionReconciler
+from session_watcher import SessionWatcher
+from story_cache import StoryDiscoveryCache
+from story_graph import DependencyGraphError, StoryGraph, estimate_durations
+from story_parser import StoryRecord, parse_story
 
 class VibeLayerSessionCoordinator:
-    def __init__(self, project_root: str = "/home/omar/Documents/VibeLayer", max_concurrent: int = 10):
+    def __init__(self, project_root: str = "/home/omar/Documents/VibeLayer", max_concurrent: int = 10,
+                 min_concurrent: int = 1, adaptive: bool = True, prefetch_depth: int = DEFAULT_PREFETCH_DEPTH):
         self.project_root = Path(project_root)
         self.session_store = self.project_root / ".depot/sessions"
         self.artifacts_dir = self.project_root / ".depot/artifacts"
         self.max_concurrent = max_concurrent
+        self.min_concurrent = min_concurrent
+        self.adaptive = adaptive
+        self.prefetch_depth = prefetch_depth
+        self.concurrency: Optional[AdaptiveConcurrencyController] = None
+        self.retry_policy = RetryPolicy()
+        self.circuit_breaker = CircuitBreaker()
         self.spawner = VibeLayerDevAgentSpawner(project_root)
+        self.store = self.spawner.store
+        self.reaper = SessionReaper(self.store, self.artifacts_dir, self.spawner.deadlines,
+                                    self.spawner.cancel_remote_session)
+        self.reconciler = SessionReconciler(self.store)
+        self.discovery_cache = StoryDiscoveryCache(self.project_root / ".depot/discovery-cache.json")
         
         # Ensure directories exist
         self.session_store.mkdir(parents=True, exist_ok=True)
@@ -30,7 +56,7 @@ class VibeLayerSessionCoordinator:
         # Thread lock for session management
         self._lock = threading.Lock()
     
-    def discover_stories(self, stories_dir: str = None) -> List[Dict]:
+    def discover_stories(self, stories_dir: str = None) -> List[StoryRecord]:
         """
         Discover all available story files for development
         
@@ -38,7 +64,7 @@ class VibeLayerSessionCoordinator:
             stories_dir: Directory containing story files (auto-discover if None)
             
         Returns:
-            List of story metadata dictionaries
+            List of parsed story records (indexable like dictionaries)
         """
         if stories_dir is None:
             # Look for stories in common BMAD locations
@@ -64,86 +90,98 @@ class VibeLayerSessionCoordinator:
             print(f"❌ Stories directory not found: {stories_dir}")
             return []
         
-        stories = []
-        for story_file in stories_path.glob("*.md"):
+        # The discovery cache is shared by concurrent requests in the coordinator daemon
+        with self._lock:
+            stories = []
+            seen_paths = []
+            self.discovery_cache.hits = self.discovery_cache.parsed = 0
+            for story_file in stories_path.glob("*.md"):
+                try:
+                    stories.append(self.discovery_cache.get(story_file, self._parse_story))
+                    seen_paths.append(str(story_file))
+                except Exception as e:
+                    print(f"⚠️  Warning: Could not process story file {story_file}: {e}")
+                    continue
+        
+            # Forget deleted or renamed files, then persist for the next run
+            self.discovery_cache.prune(stories_path, seen_paths)
             try:
-                content = story_file.read_text(encoding='utf-8')
-                
-                # Extract story metadata
-                story_id = story_file.stem.replace('story_', '')
-                
-                # Look for priority in story content
-                priority = 5  # default
-                if "priority:" in content.lower():
-                    for line in content.split('\n'):
-                        if line.lower().startswith('priority:'):
-                            try:
-                                priority = int(line.split(':')[1].strip())
-                            except:
-                                priority = 5
-                            break
-                
-                # Look for dependencies
-                dependencies = []
-                if "depends on:" in content.lower():
-                    for line in content.split('\n'):
-                        if line.lower().startswith('depends on:'):
-                            deps_str = line.split(':', 1)[1].strip()
-                            dependencies = [d.strip() for d in deps_str.split(',') if d.strip()]
-                            break
-                
-                stories.append({
-                    "story_id": story_id,
-                    "file_path": str(story_file),
-                    "priority": priority,
-                    "dependencies": dependencies,
-                    "size_estimate": len(content.split('\n'))  # rough complexity
-                })
-                
-            except Exception as e:
-                print(f"⚠️  Warning: Could not process story file {story_file}: {e}")
-                continue
+                self.discovery_cache.save()
+            except OSError as e:
+                print(f"⚠️  Warning: Could not write discovery cache: {e}")
         
         # Sort by priority (lower number = higher priority)
         stories.sort(key=lambda x: (x['priority'], x['story_id']))
         
-        print(f"📚 Discovered {len(stories)} stories for development")
+        print(f"📚 Discovered {len(stories)} stories for development ({self.discovery_cache.parsed} parsed)")
+        metrics.STORIES_DISCOVERED.set(len(stories))
         return stories
     
+    def _parse_story(self, story_file: Path, content: str) -> StoryRecord:
+        """Extract story metadata from story file content"""
+        return parse_story(content, story_file)
+    
+    def build_story_graph(self, stories: List[Dict]) -> StoryGraph:
+        """Build the dependency graph, weighting stories by historical duration or size_estimate"""
+        return StoryGraph(stories, estimate_durations(stories, self.store.story_durations()))
+    
     def get_ready_stories(self, stories: List[Dict]) -> List[Dict]:
         """
         Filter stories that are ready for development (dependencies met)
+        Ready stories keep the order of the input list.
         """
-        # Get completed story IDs
-        completed_stories = set()
-        active_sessions = self.spawner.list_active_sessions()
-        
-        for session in active_sessions["active_sessions"]:
-            if session["status"] == "completed":
-                completed_stories.add(session["story_id"])
+        # Indexed lookups instead of scanning every session record
+        completed_stories = self.store.story_ids_with_status("completed", agent_type="development")
+        running_stories = self.store.story_ids_with_status("running", agent_type="development")
         
         ready_stories = []
         for story in stories:
-            # Check if all dependencies are completed
+            # Check if all dependencies are completed and the story is not already in progress
             if all(dep in completed_stories for dep in story["dependencies"]):
-                # Check if not already in progress
-                story_in_progress = any(
-                    session["story_id"] == story["story_id"] and session["status"] in ["running"]
-                    for session in active_sessions["active_sessions"]
-                )
-                
-                if not story_in_progress:
+                if story["story_id"] not in running_stories:
                     ready_stories.append(story)
         
         return ready_stories
     
-    def coordinate_parallel_development(self, stories_dir: str = None, batch_size: int = None) -> Dict:
+    def coordinate_parallel_development(self, stories_dir: str = None, batch_size: int = None,
+                                        poll_interval: float = 30, force: bool = False,
+                                        requeue_timed_out: bool = True) -> Dict:
         """
         Coordinate parallel development of multiple stories
         
+        Stories are dispatched continuously: every free slot is filled with the next
+        ready story as soon as a spawn finishes or a session status changes, instead of
+        waiting for a whole batch. With adaptive concurrency the number of slots moves
+        between min_concurrent and batch_size based on spawn latency, errors and timeouts.
+        While every slot is busy, the next prefetch_depth ready stories have their
+        spawns prepared in the background, so a freed slot only has to launch.
+        
+        Transient spawn failures (timeouts, rate limits) are requeued with jittered
+        exponential backoff, so their dependents still become ready; permanent ones
+        (invalid story, auth) are not retried. While the circuit breaker is open no
+        new spawns start.
+        
+        Dependency cycles and dependencies on stories that neither exist nor have
+        completed are reported before anything is spawned. During the run, stories are
+        unlocked incrementally as session status changes report their dependencies
+        completed, rather than re-checking the backlog on every tick.
+        
+        Each spawn is bounded by its story's deadline (estimated duration with slack)
+        and killed if its output stalls. Running sessions that pass their deadline, or
+        stop sending heartbeats, are marked timed out so they stop blocking the run;
+        Each is cancelled on Depot first; with requeue_timed_out its story is dispatched
+        again within the retry budget, but only once Depot confirms the old session stopped.
+        
+        Remote completions come from one Depot session listing per check (at most every
+        poll_interval): running sessions Depot reports finished are updated in a single
+        transaction, and the resulting status changes unlock their dependents.
+        
         Args:
             stories_dir: Directory containing story files
             batch_size: Maximum number of concurrent sessions (uses max_concurrent if None)
+            poll_interval: Fallback re-check interval when no change notification arrives
+            force: Respawn stories whose unchanged content already has a running or completed session
+            requeue_timed_out: Dispatch a story again when its session is reclaimed as timed out
             
         Returns:
             Summary of coordination results
@@ -151,6 +189,11 @@ class VibeLayerSessionCoordinator:
         if batch_size is None:
             batch_size = self.max_concurrent
         
+        self.concurrency = AdaptiveConcurrencyController(
+            min_limit=min(self.min_concurrent, batch_size) if self.adaptive else batch_size,
+            max_limit=batch_size
+        )
+        
         print(f"🚀 Starting parallel development coordination (max {batch_size} concurrent)")
         
         # Discover available stories
@@ -158,84 +201,385 @@ class VibeLayerSessionCoordinator:
         if not all_stories:
             return {"error": "No stories found for development", "stories_processed": 0}
         
+        # Session status transitions (e.g. a dependency completing) wake the scheduler;
+        # started before reading completed stories so no completion falls in between
+        completions = deque()
+        wakeup = threading.Event()
+        
+        def on_transitions(events: List[Dict]):
+            completions.extend(event["story_id"] for event in events
+                               if event["status"] == "completed" and event["agent_type"] == "development")
+            wakeup.set()
+        
+        watcher = SessionWatcher(self.store, poll_interval=min(poll_interval, 5.0))
+        completed_stories = self.store.story_ids_with_status("completed", agent_type="development")
+        
+        graph = self.build_story_graph(all_stories)
+        try:
+            graph.validate(satisfied=completed_stories)
+        except DependencyGraphError as e:
+            watcher.close()
+            print(f"❌ {e}")
+            return {"error": str(e), "stories_processed": 0,
+                    "cycles": e.cycles, "missing_dependencies": e.missing}
+        
+        # Stories on the longest dependency chains go first; priority breaks ties
+        all_stories = graph.order(all_stories)
+        # Spawn deadlines scale with the same estimates the schedule is built on
+        self.spawner.duration_estimates.update(graph.durations)
+        makespan = graph.predicted_makespan(batch_size, completed_stories)
+        print(f"🧭 Predicted makespan: {makespan['predicted_makespan_seconds'] / 60:.1f} min "
+              f"(critical path {makespan['critical_path_seconds'] / 60:.1f} min)")
+        
         coordination_results = {
             "total_stories": len(all_stories),
             "sessions_spawned": 0,
+            "sessions_reused": 0,
             "sessions_completed": 0,
             "sessions_failed": 0,
+            "sessions_timed_out": 0,
+            "predicted_makespan": makespan,
+            "retries": 0,
+            "concurrency": None,
+            "circuit_breaker": None,
             "errors": []
         }
         
-        # Process stories in batches
-        remaining_stories = all_stories.copy()
+        # Stories not yet dispatched, and spawns currently occupying a slot
+        position = {story["story_id"]: index for index, story in enumerate(all_stories)}
+        remaining = set(position)
+        in_flight = {}
         
-        while remaining_stories:
-            # Get stories ready for development
-            ready_stories = self.get_ready_stories(remaining_stories)
-            
-            if not ready_stories:
-                # Check if we have any running sessions
-                active_sessions = self.spawner.list_active_sessions()
-                running_count = sum(1 for s in active_sessions["active_sessions"] if s["status"] == "running")
+        # Dispatch positions of undispatched stories whose dependencies are met; a
+        # story enters when its last dependency completes and leaves when dispatched
+        tracker = graph.tracker(completed_stories)
+        ready_queue = [position[story_id] for story_id in tracker.ready()]
+        heapq.heapify(ready_queue)
+        
+        # Spawn attempts per story, and the earliest time a failed story may be retried
+        attempts: Dict[str, int] = {}
+        retry_at: Dict[str, float] = {}
+        # When running sessions are next checked against their deadlines
+        next_reap = time.monotonic()
+        
+        watcher.start(on_transitions)
+        
+        with watcher, ThreadPoolExecutor(max_workers=batch_size) as executor:
+            while remaining or in_flight:
+                wakeup.clear()
+                now = time.monotonic()
+                held_by_breaker = False
                 
-                if running_count == 0:
-                    print("📋 No more stories ready and no sessions running. Coordination complete.")
-                    break
-                else:
-                    print(f"⏳ Waiting for {running_count} running sessions to complete dependencies...")
-                    time.sleep(30)  # Wait before checking again
+                # Unlock dependents of stories completed since the last tick
+                while completions:
+                    for story_id in tracker.complete(completions.popleft()):
+                        if story_id in remaining and story_id not in retry_at:
+                            heapq.heappush(ready_queue, position[story_id])
+                for story_id in [story_id for story_id, due in retry_at.items() if due <= now]:
+                    del retry_at[story_id]
+                    heapq.heappush(ready_queue, position[story_id])
+                
+                # Pick up sessions Depot reports finished; reclaim ones that overran or stalled
+                if now >= next_reap:
+                    next_reap = now + self._reclaim_timed_out(coordination_results, remaining, attempts, retry_at,
+                                                              position, poll_interval, requeue_timed_out)
+                
+                # Fill every free slot with the next ready story
+                slots = self.concurrency.limit
+                free_slots = slots - len(in_flight)
+                if free_slots > 0 and ready_queue:
+                    running_stories = self.store.story_ids_with_status("running", agent_type="development")
+                    already_running = []
+                    dispatch = []
+                    while ready_queue and len(dispatch) < free_slots:
+                        story = all_stories[ready_queue[0]]
+                        if story['story_id'] in running_stories:
+                            # Left over from an earlier run; reconsidered once it finishes
+                            already_running.append(heapq.heappop(ready_queue))
+                            continue
+                        if not self.circuit_breaker.allow():
+                            held_by_breaker = True
+                            break
+                        heapq.heappop(ready_queue)
+                        dispatch.append(story)
+                    for index in already_running:
+                        heapq.heappush(ready_queue, index)
+                    
+                    for story in dispatch:
+                        remaining.discard(story['story_id'])
+                        attempts[story['story_id']] = attempts.get(story['story_id'], 0) + 1
+                        future = executor.submit(self._process_story_safe, story, force)
+                        future.add_done_callback(lambda _future: wakeup.set())
+                        in_flight[future] = story
+                        print(f"🚚 Dispatched story {story['story_id']} ({len(in_flight)}/{slots} slots busy)")
+                
+                # Stories still queued are waiting on a slot (or the breaker); prepare the
+                # next ones in line now
+                if ready_queue and self.prefetch_depth:
+                    for index in heapq.nsmallest(self.prefetch_depth, ready_queue):
+                        self.spawner.prefetch(all_stories[index]['file_path'], all_stories[index]['story_id'])
+                
+                metrics.READY_QUEUE_DEPTH.set(len(ready_queue))
+                metrics.SESSIONS_IN_FLIGHT.set(len(in_flight))
+                metrics.flush()
+                
+                # Collect finished spawns; each one frees a slot for the next ready story
+                finished = [future for future in in_flight if future.done()]
+                for future in finished:
+                    story = in_flight.pop(future)
+                    retry_delay = self._record_spawn_result(future, story, coordination_results,
+                                                            attempts[story['story_id']])
+                    if retry_delay is not None:
+                        # Back into the ready queue (at its dispatch position) once the backoff expires
+                        retry_at[story['story_id']] = time.monotonic() + retry_delay
+                        remaining.add(story['story_id'])
+                
+                if finished:
+                    metrics.SESSIONS_IN_FLIGHT.set(len(in_flight))
                     continue
+                
+                # Sleep no longer than the next backoff or breaker cooldown; a half-open
+                # breaker waits on its trial spawn, which wakes us when it finishes
+                timeout = poll_interval
+                if retry_at:
+                    timeout = min(timeout, max(0.0, min(retry_at.values()) - time.monotonic()))
+                cooldown = self.circuit_breaker.retry_after() if held_by_breaker else None
+                if cooldown is not None:
+                    timeout = min(timeout, cooldown)
+                timeout = min(timeout, max(0.0, next_reap - time.monotonic()))
+                
+                if not in_flight and not retry_at and not held_by_breaker:
+                    # Nothing spawning: remaining stories wait on running sessions' dependencies.
+                    # The watcher reports completions asynchronously, so catch up first.
+                    caught_up = (self.store.story_ids_with_status("completed", agent_type="development")
+                                 & tracker.waiting_on.keys()) - tracker.completed
+                    if caught_up:
+                        completions.extend(caught_up)
+                        continue
+                    
+                    running_count = self.store.count("running", agent_type="development")
+                    
+                    if running_count == 0:
+                        print("📋 No more stories ready and no sessions running. Coordination complete.")
+                        break
+                    
+                    print(f"⏳ Waiting for {running_count} running sessions to complete dependencies...")
+                elif held_by_breaker and cooldown is None:
+                    print("🔌 Circuit breaker half-open; holding spawns until the trial spawn finishes")
+                elif held_by_breaker:
+                    print(f"🔌 Circuit breaker open; holding spawns for {timeout:.0f}s")
+                
+                # Wake up as soon as a spawn finishes or a session changes status
+                wakeup.wait(timeout=timeout)
+        
+        coordination_results["concurrency"] = self.concurrency.snapshot()
+        coordination_results["circuit_breaker"] = self.circuit_breaker.snapshot()
+        coordination_results["spawn_prefetch"] = self.spawner.prefetcher.snapshot()
+        # Untaken specs hold credentials
+        self.spawner.prefetcher.clear()
+        metrics.READY_QUEUE_DEPTH.set(0)
+        metrics.SESSIONS_IN_FLIGHT.set(0)
+        metrics.flush(force=True)
+        print(f"🎉 Coordination complete. Spawned {coordination_results['sessions_spawned']} sessions.")
+        return coordination_results
+    
+    def _reclaim_timed_out(self, coordination_results: Dict, remaining: set, attempts: Dict[str, int],
+                           retry_at: Dict[str, float], position: Dict[str, int], poll_interval: float,
+                           requeue: bool) -> float:
+        """
+        Reconcile running sessions with Depot, then time out overdue ones; optionally
+        put their stories back in line
+        
+        Returns:
+            Seconds until the next check is due
+        """
+        running = self.store.list_sessions(status="running", agent_type="development")
+        finished = self._reconcile(running)
+        running = [session for session in running if session["session_id"] not in finished]
+        reclaimed = self.reaper.reap(running)
+        
+        for session in reclaimed:
+            story_id = session.get("story_id")
+            coordination_results["sessions_timed_out"] += 1
+            print(f"⏰ Reclaimed session {session['session_id']} for story {story_id} ({session['timeout_reason']})")
+            # Stories left over from an earlier run are still undispatched here and go out
+            # on their own once nothing is running for them
+            if story_id not in position or story_id in remaining:
+                continue
+            if not session.get("remote_cancelled"):
+                # A second sandbox for the story would race the one that may still be running
+                coordination_results["errors"].append(
+                    f"Story {story_id}: {session['error']}; not retried, its Depot session could not be confirmed stopped")
+            elif requeue and attempts.get(story_id, 0) < self.retry_policy.max_attempts:
+                remaining.add(story_id)
+                retry_at[story_id] = time.monotonic()
+            else:
+                coordination_results["errors"].append(f"Story {story_id}: {session['error']}")
+        
+        reclaimed_ids = {session["session_id"] for session in reclaimed}
+        next_check = self.reaper.next_check_in(s for s in running if s["session_id"] not in reclaimed_ids)
+        return poll_interval if next_check is None else min(poll_interval, next_check)
+    
+    def _reconcile(self, running: List[Dict]) -> set:
+        """Apply Depot's reported status to running sessions; ids of those that finished"""
+        if not running:
+            return set()
+        try:
+            transitions = self.reconciler.reconcile(running)["transitions"]
+        except ReconcileError as e:
+            print(f"⚠️  Could not reconcile sessions with Depot: {e}")
+            return set()
+        return {session["session_id"] for session in transitions}
+    
+    def plan_development(self, stories_dir: str = None) -> Dict:
+        """
+        Dependency levels of the backlog, without spawning anything
+        
+        Every story in a level depends only on earlier levels (or on stories that have
+        already completed), so a level's stories can all run in parallel. Stories
+        within a level are in dispatch order.
+        
+        Args:
+            stories_dir: Directory containing story files
             
-            # Spawn sessions for ready stories (up to batch_size)
-            batch = ready_stories[:batch_size]
-            print(f"📦 Processing batch of {len(batch)} stories")
+        Returns:
+            Levels, critical path and already completed stories, or an error listing
+            dependency cycles and missing dependencies
+        """
+        all_stories = self.discover_stories(stories_dir)
+        if not all_stories:
+            return {"error": "No stories found for planning", "stories_processed": 0}
+        
+        graph = self.build_story_graph(all_stories)
+        completed = self.store.story_ids_with_status("completed", agent_type="development")
+        try:
+            graph.validate(satisfied=completed)
+        except DependencyGraphError as e:
+            return {"error": str(e), "stories_processed": 0,
+                    "cycles": e.cycles, "missing_dependencies": e.missing}
+        
+        position = {story["story_id"]: index for index, story in enumerate(graph.order(all_stories))}
+        levels = [sorted(level, key=position.get) for level in graph.levels()]
+        return {
+            "total_stories": len(all_stories),
+            "levels": levels,
+            "max_parallelism": max(len(level) for level in levels),
+            "critical_path": graph.critical_path(),
+            "completed_stories": sorted(completed & graph.stories.keys())
+        }
+    
+    def simulate_development(self, stories_dir: str = None, concurrency_levels: List[int] = None) -> Dict:
+        """
+        Dry-run the backlog on a virtual clock at one or more concurrency levels
+        
+        Uses the same discovery, dependency graph, duration estimates and dispatch
+        order as coordinate_parallel_development, but spawns nothing.
+        
+        Args:
+            stories_dir: Directory containing story files
+            concurrency_levels: max_concurrent values to simulate (uses max_concurrent if None)
             
-            # Spawn development agents in parallel
-            with ThreadPoolExecutor(max_workers=batch_size) as executor:
-                # Submit all story processing tasks
-                future_to_story = {}
-                for story in batch:
-                    future = executor.submit(self._process_story_safe, story)
-                    future_to_story[future] = story
-                
-                # Process completed tasks
-                for future in as_completed(future_to_story):
-                    story = future_to_story[future]
-                    try:
-                        result = future.result()
-                        if result["success"]:
-                            coordination_results["sessions_spawned"] += 1
-                            print(f"✅ Session spawned for story: {story['story_id']}")
-                        else:
-                            coordination_results["sessions_failed"] += 1
-                            coordination_results["errors"].append(f"Story {story['story_id']}: {result['error']}")
-                            print(f"❌ Failed to spawn session for story: {story['story_id']}")
-                    except Exception as e:
-                        coordination_results["sessions_failed"] += 1
-                        coordination_results["errors"].append(f"Story {story['story_id']}: {str(e)}")
-                        print(f"💥 Unexpected error for story {story['story_id']}: {e}")
+        Returns:
+            Per-level predicted makespan, slot utilization and critical path
+        """
+        concurrency_levels = concurrency_levels or [self.max_concurrent]
+        
+        all_stories = self.discover_stories(stories_dir)
+        if not all_stories:
+            return {"error": "No stories found for simulation", "stories_processed": 0}
+        
+        graph = self.build_story_graph(all_stories)
+        ordered = graph.order(all_stories)
+        completed = self.store.story_ids_with_status("completed", agent_type="development")
+        
+        return {
+            "total_stories": len(ordered),
+            "simulations": [graph.simulate(ordered, level, completed) for level in concurrency_levels]
+        }
+    
+    def _record_spawn_result(self, future, story: Dict, coordination_results: Dict,
+                             attempt: int = 1) -> Optional[float]:
+        """
+        Record the outcome of a finished spawn in the coordination results
+        
+        Returns:
+            Seconds to wait before retrying the story, or None if it is done (spawned
+            or permanently failed)
+        """
+        try:
+            result = future.result()
+            self._record_spawn_outcome(result)
+            if result["success"] and result["session_data"].get("reused"):
+                coordination_results["sessions_reused"] += 1
+                print(f"♻️  Reused existing session for unchanged story: {story['story_id']}")
+                return None
+            if result["success"]:
+                coordination_results["sessions_spawned"] += 1
+                print(f"✅ Session spawned for story: {story['story_id']}")
+                return None
             
-            # Remove processed stories from remaining list
-            processed_ids = {story['story_id'] for story in batch}
-            remaining_stories = [s for s in remaining_stories if s['story_id'] not in processed_ids]
+            if self.retry_policy.should_retry(result["transient"], attempt):
+                delay = self.retry_policy.delay(attempt)
+                coordination_results["retries"] += 1
+                print(f"🔁 Retrying story {story['story_id']} in {delay:.1f}s "
+                      f"(attempt {attempt}/{self.retry_policy.max_attempts} failed: {result['reason']})")
+                return delay
             
-            # Brief pause between batches
-            if remaining_stories:
-                time.sleep(5)
+            coordination_results["sessions_failed"] += 1
+            coordination_results["errors"].append(f"Story {story['story_id']}: {result['error']}")
+            print(f"❌ Failed to spawn session for story: {story['story_id']}")
+        except Exception as e:
+            coordination_results["sessions_failed"] += 1
+            coordination_results["errors"].append(f"Story {story['story_id']}: {str(e)}")
+            print(f"💥 Unexpected error for story {story['story_id']}: {e}")
+        return None
+    
+    def _record_spawn_outcome(self, result: Dict):
+        """Feed a spawn's outcome back into the concurrency controller, circuit breaker and metrics"""
+        if not result["success"]:
+            spawn_result = "failed"
+            metrics.SPAWN_FAILURES.inc(reason=result["reason"])
+        else:
+            spawn_result = "reused" if result["session_data"].get("reused") else "spawned"
+        metrics.SPAWNS.inc(result=spawn_result)
+        metrics.SPAWN_LATENCY.observe(result.get("duration_seconds", 0.0), result=spawn_result)
         
-        print(f"🎉 Coordination complete. Spawned {coordination_results['sessions_spawned']} sessions.")
-        return coordination_results
+        if spawn_result == "reused":
+            # Nothing reached Depot, so its near-zero time says nothing about Depot's latency or health
+            self.circuit_breaker.release()
+            return
+        if result["success"]:
+            outcome = "success"
+            self.circuit_breaker.record_success()
+        elif result["transient"]:
+            outcome = "timeout" if result["reason"] == "timeout" else "error"
+            self.circuit_breaker.record_failure()
+        else:
+            # Permanent failures (bad story, bad credentials) say nothing about Depot's capacity
+            self.circuit_breaker.release()
+            return
+        
+        limit = self.concurrency.limit
+        # duration_seconds spans the story's whole run (up to its deadline), not Depot's
+        # response time, so only the outcome steers the limit
+        self.concurrency.record(None, outcome)
+        if self.concurrency.limit != limit:
+            print(f"🎚️  Concurrency {limit} → {self.concurrency.limit} ({self.concurrency.last_reason})")
     
-    def _process_story_safe(self, story: Dict) -> Dict:
+    def _process_story_safe(self, story: Dict, force: bool = False) -> Dict:
         """Safely process a single story with error handling"""
+        start = time.monotonic()
         try:
             session_data = self.spawner.spawn_development_agent(
                 story_file_path=story["file_path"],
-                story_id=story["story_id"]
+                story_id=story["story_id"],
+                force=force
             )
-            return {"success": True, "session_data": session_data}
+            return {"success": True, "session_data": session_data, "duration_seconds": time.monotonic() - start}
         except Exception as e:
-            return {"success": False, "error": str(e)}
+            error = e if isinstance(e, SpawnError) else SpawnError(str(e))
+            return {"success": False, "error": str(e), "transient": error.transient, "reason": error.reason,
+                    "duration_seconds": time.monotonic() - start}
     
     def monitor_sessions(self, timeout_minutes: int = 60) -> Dict:
         """
@@ -260,23 +604,46 @@ class VibeLayerSessionCoordinator:
             "final_status": {}
         }
         
-        while datetime.utcnow() < timeout_time:
-            active_sessions = self.spawner.list_active_sessions()
-            
-            running_sessions = [s for s in active_sessions["active_sessions"] if s["status"] == "running"]
-            
-            if not running_sessions:
-                print("✅ All sessions completed or no active sessions")
-                break
-            
-            print(f"⏳ Monitoring {len(running_sessions)} active sessions...")
-            for session in running_sessions[:5]:  # Show first 5
-                print(f"   - {session['story_id']}: {session['status']} (started: {session['started_at']})")
-            
-            if len(running_sessions) > 5:
-                print(f"   ... and {len(running_sessions) - 5} more")
-            
-            time.sleep(30)  # Check every 30 seconds
+        def record_transitions(watcher: SessionWatcher):
+            for event in watcher.poll_transitions():
+                print(f"   🔔 {event['story_id']}: {event['old_status'] or 'new'} → {event['status']}")
+                if event["status"] == "completed":
+                    monitoring_results["sessions_completed"] += 1
+                elif event["status"] in ("failed", "error"):
+                    monitoring_results["sessions_failed"] += 1
+                elif event["status"] == "timeout":
+                    monitoring_results["sessions_timeout"] += 1
+        
+        with SessionWatcher(self.store) as watcher:
+            while datetime.utcnow() < timeout_time:
+                record_transitions(watcher)
+                
+                running_sessions = self.store.list_sessions(status="running", agent_type="development")
+                # Sessions Depot reports finished, and overdue ones, are updated here and
+                # counted from their transition event
+                finished = self._reconcile(running_sessions)
+                running_sessions = [s for s in running_sessions if s["session_id"] not in finished]
+                reclaimed = {session["session_id"] for session in self.reaper.reap(running_sessions)}
+                running_sessions = [s for s in running_sessions if s["session_id"] not in reclaimed]
+                
+                if not running_sessions:
+                    # Count the transitions just written before stopping
+                    record_transitions(watcher)
+                    print("✅ All sessions completed or no active sessions")
+                    break
+                
+                print(f"⏳ Monitoring {len(running_sessions)} active sessions...")
+                for session in running_sessions[:5]:  # Show first 5
+                    print(f"   - {session['story_id']}: {session['status']} (started: {session['started_at']})")
+                
+                if len(running_sessions) > 5:
+                    print(f"   ... and {len(running_sessions) - 5} more")
+                
+                metrics.flush()
+                
+                # Sleep until a session changes (or the fallback poll fires)
+                remaining = (timeout_time - datetime.utcnow()).total_seconds()
+                watcher.wait_for_change(timeout=max(0, min(30, remaining)))
         
         # Final status
         final_sessions = self.spawner.list_active_sessions()
@@ -286,27 +653,44 @@ class VibeLayerSessionCoordinator:
         print(f"📊 Monitoring completed after {monitoring_results['monitoring_duration_minutes']:.1f} minutes")
         return monitoring_results
     
-    def cleanup_old_sessions(self, days_old: int = 7) -> Dict:
-        """Clean up session files older than specified days"""
+    def watch_sessions(self, timeout_minutes: int = 60) -> Iterator[Dict]:
+        """Yield session status transitions as they happen, until timeout_minutes pass without one"""
+        with SessionWatcher(self.store) as watcher:
+            yield from watcher.subscribe(timeout=timeout_minutes * 60)
+    
+    def cleanup_old_sessions(self, days_old: int = 7, archive: bool = False) -> Dict:
+        """
+        Clean up session records older than specified days
+        Whole days are dropped from the store; with archive they are first appended to
+        gzip JSON-lines files under .depot/sessions/archive.
+        """
         cutoff_time = datetime.utcnow() - timedelta(days=days_old)
+        archive_dir = self.session_store / "archive" if archive else None
         
-        cleaned = 0
-        for session_file in self.session_store.glob("*.json"):
-            try:
-                session_data = json.loads(session_file.read_text())
-                session_time = datetime.fromisoformat(session_data["started_at"].replace('Z', '+00:00'))
-                
-                if session_time < cutoff_time:
-                    session_file.unlink()
-                    cleaned += 1
-                    
-            except (json.JSONDecodeError, KeyError, ValueError):
-                # Remove corrupted session files
-                session_file.unlink()
-                cleaned += 1
+        # Sessions without a start time are treated as corrupted and removed too
+        cleaned = self.store.delete_started_before(cutoff_time.isoformat(), archive_dir)
         
-        print(f"🧹 Cleaned up {cleaned} old session files")
-        return {"cleaned_files": cleaned}
+        print(f"🧹 Cleaned up {cleaned} old sessions" + (f" (archived to {archive_dir})" if archive else ""))
+        result = {"cleaned_sessions": cleaned}
+        if archive_dir is not None:
+            result["archive_dir"] = str(archive_dir)
+        return result
+
+def run_on_daemon(remote: RemoteBridge, args) -> Dict:
+    """Run a coordinator CLI command in the coordinator daemon, returning the coordinator-shaped result"""
+    if args.cleanup:
+        result = remote.cleanup_old_sessions(args.cleanup_days, args.archive)
+        return result.get("cleanup_result", result)
+    if args.monitor:
+        result = remote.monitor_active_sessions(args.monitor_timeout)
+        return result.get("monitoring_result", result)
+    if args.plan:
+        result = remote.plan_development(args.stories_dir)
+        return result.get("plan", result)
+    result = remote.coordinate_parallel_development(args.stories_dir, args.max_concurrent, args.min_concurrent,
+                                                    not args.fixed_concurrency, args.force,
+                                                    requeue_timed_out=not args.no_requeue)
+    return result.get("coordination_result", result)
 
 def main():
     """CLI interface for session coordinator"""
@@ -315,18 +699,61 @@ def main():
     parser = argparse.ArgumentParser(description="Coordinate BMAD development agent sessions")
     parser.add_argument("--stories-dir", help="Directory containing story files")
     parser.add_argument("--max-concurrent", type=int, default=10, help="Maximum concurrent sessions")
+    parser.add_argument("--min-concurrent", type=int, default=1, help="Lower bound for adaptive concurrency")
+    parser.add_argument("--fixed-concurrency", action="store_true",
+                        help="Always run --max-concurrent sessions instead of adapting to Depot latency and errors")
     parser.add_argument("--coordinate", action="store_true", help="Start coordination of parallel development")
+    parser.add_argument("--force", action="store_true",
+                        help="Respawn unchanged stories that already have a running or completed session")
+    parser.add_argument("--prefetch", type=int, default=DEFAULT_PREFETCH_DEPTH,
+                        help="Ready stories whose spawns are prepared ahead while all slots are busy (0 disables)")
+    parser.add_argument("--no-requeue", action="store_true",
+                        help="Do not retry stories whose sessions overran their deadline or stalled")
     parser.add_argument("--monitor", action="store_true", help="Monitor active sessions")
     parser.add_argument("--monitor-timeout", type=int, default=60, help="Monitoring timeout in minutes")
-    parser.add_argument("--cleanup", action="store_true", help="Clean up old session files")
-    parser.add_argument("--cleanup-days", type=int, default=7, help="Clean up files older than N days")
+    parser.add_argument("--watch", action="store_true", help="Stream session status transitions as JSON lines")
+    parser.add_argument("--plan", action="store_true",
+                        help="Show dependency levels (stories that can run in parallel) without spawning")
+    parser.add_argument("--simulate", type=int, nargs="*", metavar="N",
+                        help="Predict makespan on a virtual clock at these concurrency levels (default: --max-concurrent)")
+    parser.add_argument("--cleanup", action="store_true", help="Clean up old sessions")
+    parser.add_argument("--cleanup-days", type=int, default=7, help="Clean up sessions older than N days")
+    parser.add_argument("--archive", action="store_true",
+                        help="Archive cleaned-up sessions to .depot/sessions/archive instead of deleting them")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="Run in this process even if a coordinator daemon is running")
+    metrics.add_arguments(parser)
     
     args = parser.parse_args()
+    metrics.configure_from_args(args)
+    
+    # A running coordinator daemon keeps sessions, stories and credentials in memory;
+    # forward to it instead of rebuilding that state here
+    forwardable = args.cleanup or args.monitor or args.watch or args.plan or args.coordinate
+    remote = RemoteBridge.connect("/home/omar/Documents/VibeLayer") if forwardable and not args.no_daemon else None
+    if remote is not None:
+        with remote.client:
+            try:
+                if args.watch:
+                    for event in remote.client.subscribe(args.monitor_timeout * 60):
+                        print(json.dumps(event), flush=True)
+                    return
+                result = run_on_daemon(remote, args)
+            except DaemonError as e:
+                print(f"Error: coordinator daemon: {e}")
+                sys.exit(1)
+        for index, level in enumerate(result.get("levels", []) if args.plan else []):
+            print(f"🧱 Level {index}: {', '.join(level)}")
+        print(json.dumps(result, indent=2, default=str))
+        return
     
-    coordinator = VibeLayerSessionCoordinator(max_concurrent=args.max_concurrent)
+    coordinator = VibeLayerSessionCoordinator(max_concurrent=args.max_concurrent,
+                                              min_concurrent=args.min_concurrent,
+                                              adaptive=not args.fixed_concurrency,
+                                              prefetch_depth=args.prefetch)
     
     if args.cleanup:
-        result = coordinator.cleanup_old_sessions(args.cleanup_days)
+        result = coordinator.cleanup_old_sessions(args.cleanup_days, args.archive)
         print(json.dumps(result, indent=2))
         return
     
@@ -335,24 +762,54 @@ def main():
         print(json.dumps(result, indent=2, default=str))
         return
     
+    if args.watch:
+        for event in coordinator.watch_sessions(args.monitor_timeout):
+            print(json.dumps(event), flush=True)
+        return
+    
+    if args.plan:
+        result = coordinator.plan_development(args.stories_dir)
+        for index, level in enumerate(result.get("levels", [])):
+            print(f"🧱 Level {index}: {', '.join(level)}")
+        print(json.dumps(result, indent=2))
+        return
+    
+    if args.simulate is not None:
+        result = coordinator.simulate_development(args.stories_dir, args.simulate or None)
+        for simulation in result.get("simulations", []):
+            print(f"🧮 {simulation['max_concurrent']} concurrent: "
+                  f"makespan {simulation['makespan_seconds'] / 60:.1f} min, "
+                  f"utilization {simulation['utilization']:.0%}, "
+                  f"{len(simulation['blocked_stories'])} blocked")
+        print(json.dumps(result, indent=2))
+        return
+    
     if args.coordinate:
-        result = coordinator.coordinate_parallel_development(args.stories_dir)
+        result = coordinator.coordinate_parallel_development(args.stories_dir, force=args.force,
+                                                             requeue_timed_out=not args.no_requeue)
         print(json.dumps(result, indent=2))
         return
     
     # Default: show discovery results
     stories = coordinator.discover_stories(args.stories_dir)
-    ready_stories = coordinator.get_ready_stories(stories)
+    graph = coordinator.build_story_graph(stories)
+    ready_stories = coordinator.get_ready_stories(graph.order(stories))
+    critical_paths = graph.critical_path_lengths()
+    makespan = graph.predicted_makespan(args.max_concurrent)
     
     print(f"\n📚 Story Discovery Results:")
     print(f"Total stories found: {len(stories)}")
     print(f"Stories ready for development: {len(ready_stories)}")
+    print(f"Predicted makespan at {args.max_concurrent} concurrent: {makespan['predicted_makespan_seconds'] / 60:.1f} min")
+    if makespan["critical_path"]:
+        print(f"Critical path: {' → '.join(makespan['critical_path'])}")
     
     if ready_stories:
         print("\n🚀 Ready stories:")
         for story in ready_stories[:10]:  # Show first 10
             deps = ", ".join(story["dependencies"]) if story["dependencies"] else "none"
-            print(f"  - {story['story_id']} (priority: {story['priority']}, deps: {deps})")
+            print(f"  - {story['story_id']} (priority: {story['priority']}, deps: {deps}, "
+                  f"critical path: {critical_paths[story['story_id']] / 60:.1f} min)")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Session Deadlines
+Per-story run deadlines from size and history, and stall detection that reclaims hung sessions.
+"""
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import metrics
+from session_logs import LOG_NAME
+from session_store import SessionStore
+from story_graph import estimate_durations
+
+
+class DeadlinePolicy:
+    """
+    How long a session may run, and how long it may go without progress
+
+    A story's deadline is its estimated duration (historical mean, or size_estimate
+    scaled by seconds-per-line) times factor, clamped to [min_seconds, max_seconds].
+    Progress is any output line or heartbeat; stall_seconds without one means the
+    sandbox is stuck regardless of how much of the deadline is left.
+    """
+
+    def __init__(self, factor: float = 2.0, min_seconds: float = 900.0, max_seconds: float = 4 * 3600.0,
+                 stall_seconds: float = 900.0):
+        self.factor = factor
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.stall_seconds = stall_seconds
+
+    def deadline(self, estimate_seconds: Optional[float]) -> float:
+        """Seconds a session estimated to take estimate_seconds may run"""
+        if not estimate_seconds:
+            return self.min_seconds
+        return min(self.max_seconds, max(self.min_seconds, estimate_seconds * self.factor))
+
+    def story_deadline(self, story_id: str, size_estimate: int, history: Dict[str, float] = None) -> float:
+        """Deadline for one story from its size and any completed-session history"""
+        story = {"story_id": story_id, "size_estimate": size_estimate}
+        return self.deadline(estimate_durations([story], history)[story_id])
+
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+class SessionReaper:
+    """
+    Times out running sessions that passed their deadline or stopped making progress
+
+    Once a spawn returns, the agent runs remotely and writes nothing locally, so
+    only sessions that send heartbeats (last_progress_at) are checked for stalls;
+    their last progress is the later of the heartbeat and the last write to their
+    output log. Every session is held to its deadline_at (the policy maximum for
+    records without one). Reclaimed sessions are marked "timeout" with completed_at
+    set, in one transaction per sweep, so their story can be retried.
+
+    With cancel, each reclaimed session is first stopped on Depot, so a hung sandbox
+    does not keep running (and pushing) next to a retry; remote_cancelled records
+    whether that was confirmed, and only then is the story safe to retry.
+    """
+
+    def __init__(self, store: SessionStore, artifacts_dir: Path, policy: DeadlinePolicy = None,
+                 cancel: Callable[[str], bool] = None):
+        self.store = store
+        self.artifacts_dir = Path(artifacts_dir)
+        self.policy = policy or DeadlinePolicy()
+        self.cancel = cancel
+
+    def last_progress(self, session: Dict) -> Optional[datetime]:
+        """Latest heartbeat or output log write, or None for sessions that never sent a heartbeat"""
+        last_progress = _timestamp(session.get("last_progress_at"))
+        if last_progress is None:
+            return None
+        try:
+            mtime = os.stat(self.artifacts_dir / session["session_id"] / LOG_NAME).st_mtime
+            return max(last_progress, datetime.utcfromtimestamp(mtime))
+        except (OSError, KeyError):
+            return last_progress
+
+    def deadline_at(self, session: Dict) -> Optional[datetime]:
+        """When the session must have finished"""
+        deadline_at = _timestamp(session.get("deadline_at"))
+        if deadline_at is None:
+            started = _timestamp(session.get("started_at"))
+            if started is not None:
+                deadline_at = started + timedelta(seconds=self.policy.max_seconds)
+        return deadline_at
+
+    def overdue_reason(self, session: Dict, now: datetime = None) -> Optional[str]:
+        """"deadline" or "stalled" if the session should be reclaimed, else None"""
+        now = now or datetime.utcnow()
+        deadline_at = self.deadline_at(session)
+        if deadline_at is not None and now >= deadline_at:
+            return "deadline"
+        last_progress = self.last_progress(session)
+        if last_progress is not None and (now - last_progress).total_seconds() >= self.policy.stall_seconds:
+            return "stalled"
+        return None
+
+    def next_check_in(self, sessions: Iterable[Dict], now: datetime = None) -> Optional[float]:
+        """Seconds until the earliest of these sessions could become overdue"""
+        now = now or datetime.utcnow()
+        due = []
+        for session in sessions:
+            deadline_at = self.deadline_at(session)
+            if deadline_at is not None:
+                due.append(deadline_at)
+            last_progress = self.last_progress(session)
+            if last_progress is not None:
+                due.append(last_progress + timedelta(seconds=self.policy.stall_seconds))
+        if not due:
+            return None
+        return max(0.0, (min(due) - now).total_seconds())
+
+    def reap(self, sessions: List[Dict] = None, now: datetime = None) -> List[Dict]:
+        """
+        Mark overdue running sessions as timed out
+
+        Args:
+            sessions: Running sessions to check (all running development sessions if None)
+
+        Returns:
+            The reclaimed session records, with timeout_reason (and remote_cancelled
+            when cancelling) set
+        """
+        now = now or datetime.utcnow()
+        if sessions is None:
+            sessions = self.store.list_sessions(status="running", agent_type="development")
+
+        reclaimed = []
+        for session in sessions:
+            reason = self.overdue_reason(session, now)
+            if reason is None:
+                continue
+            # Overdue sessions are rare; re-read so a status that just changed is not overwritten
+            session = self.store.get(session["session_id"])
+            if session is None or session.get("status") != "running":
+                continue
+            if reason == "deadline":
+                error = f"Exceeded its deadline ({self.deadline_at(session).isoformat()})"
+            else:
+                error = f"Stalled: no output or heartbeat since {self.last_progress(session).isoformat()}"
+            session = {**session, "status": "timeout", "timeout_reason": reason,
+                       "completed_at": now.isoformat(), "error": error}
+            if self.cancel is not None:
+                session["remote_cancelled"] = bool(self.cancel(session["session_id"]))
+            reclaimed.append(session)
+
+        if reclaimed:
+            self.store.save_many(reclaimed)
+            for session in reclaimed:
+                metrics.observe_session_duration(session)
+                metrics.SESSIONS_RECLAIMED.inc(reason=session["timeout_reason"])
+        return reclaimed
+
+    def heartbeat(self, session_id: str) -> bool:
+        """Record progress for a running session; from then on it is also checked for stalls"""
+        session = self.store.get(session_id)
+        if session is None or session.get("status") != "running":
+            return False
+        self.store.save({**session, "last_progress_at": datetime.utcnow().isoformat()})
+        return True
+
+
+def main():
+    """CLI interface for session deadlines"""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Reclaim VibeLayer sessions that overran their deadline or stalled")
+    parser.add_argument("--project-root", default="/home/omar/Documents/VibeLayer", help="Project root directory")
+    parser.add_argument("--heartbeat", metavar="SESSION_ID", help="Record progress for a running session")
+    parser.add_argument("--stall-minutes", type=float, default=15, help="Minutes without progress before a session is stalled")
+    parser.add_argument("--dry-run", action="store_true", help="List overdue sessions without reclaiming them")
+
+    args = parser.parse_args()
+    from session_reconciler import cancel_depot_session
+
+    project_root = Path(args.project_root)
+    reaper = SessionReaper(SessionStore(project_root / ".depot/sessions"), project_root / ".depot/artifacts",
+                           DeadlinePolicy(stall_seconds=args.stall_minutes * 60), cancel_depot_session)
+
+    if args.heartbeat:
+        if not reaper.heartbeat(args.heartbeat):
+            print(f"Error: no running session {args.heartbeat}")
+            raise SystemExit(1)
+        print(f"💓 Recorded progress for {args.heartbeat}")
+        return
+
+    if args.dry_run:
+        sessions = reaper.store.list_sessions(status="running", agent_type="development")
+        overdue = [{"session_id": session["session_id"], "story_id": session.get("story_id"),
+                    "reason": reaper.overdue_reason(session)} for session in sessions]
+        print(json.dumps([entry for entry in overdue if entry["reason"]], indent=2))
+        return
+
+    reclaimed = reaper.reap()
+    for session in reclaimed:
+        stopped = "stopped on Depot" if session["remote_cancelled"] else "could not be confirmed stopped on Depot"
+        print(f"⏰ Reclaimed {session['session_id']} (story {session.get('story_id')}): {session['error']}; {stopped}")
+    print(f"Reclaimed {len(reclaimed)} sessions")
+
+if __name__ == "__main__":
+    main()
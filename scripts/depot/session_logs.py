@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Session Logs
+Streams agent output line by line into rotating log files under .depot/artifacts/<session_id>/.
+"""
+import gzip
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+LOG_NAME = "output.log"
+
+# How often a run with a stall timeout checks when its output last moved
+STALL_CHECK_SECONDS = 5.0
+
+
+class SessionLogSpooler:
+    """
+    Writes a session's output to rotating (optionally gzip-compressed) log files
+    Memory is bounded to a ring buffer of the last tail_lines lines; the session URL
+    is extracted as lines stream past.
+    """
+
+    def __init__(self, artifacts_dir: Path, session_id: str, max_bytes: int = 10 * 1024 * 1024,
+                 backup_count: int = 5, compress: bool = True, tail_lines: int = 200,
+                 url_extractor: Callable[[str], Optional[str]] = None):
+        self.log_dir = Path(artifacts_dir) / session_id
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.log_path = self.log_dir / LOG_NAME
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self.url_extractor = url_extractor
+
+        self.session_url: Optional[str] = None
+        self.lines_written = 0
+        self.bytes_written = 0
+        self.last_output_at: Optional[float] = None
+
+        # Each stream keeps its own tail so chatty stdout cannot push stderr out
+        self.tail_lines = tail_lines
+        self._tail = deque(maxlen=tail_lines)
+        self._stream_tails: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._file = open(self.log_path, "a", encoding="utf-8")
+        self._file_size = self.log_path.stat().st_size
+
+    def write_line(self, stream: str, line: str):
+        """Append one line of output from the given stream ("stdout" or "stderr")"""
+        line = line.rstrip("\n")
+        record = line if stream == "stdout" else f"[{stream}] {line}"
+
+        with self._lock:
+            if self._file is None:
+                return
+            self._tail.append((stream, line))
+            self._stream_tails.setdefault(stream, deque(maxlen=self.tail_lines)).append(line)
+            self._file.write(record + "\n")
+            self._file_size += len(record) + 1
+            self.bytes_written += len(record) + 1
+            self.lines_written += 1
+            self.last_output_at = time.time()
+
+            if self.session_url is None and self.url_extractor is not None:
+                self.session_url = self.url_extractor(line)
+
+            if self._file_size >= self.max_bytes:
+                self._rotate()
+
+    def pump(self, pipe, stream: str):
+        """Copy lines from a text pipe until EOF (run in a thread per stream)"""
+        try:
+            for line in pipe:
+                self.write_line(stream, line)
+        finally:
+            pipe.close()
+
+    def tail(self, stream: str = None) -> List[str]:
+        """Buffered tail lines, optionally for one stream only"""
+        with self._lock:
+            if stream is None:
+                return [line for _, line in self._tail]
+            return list(self._stream_tails.get(stream, ()))
+
+    def tail_text(self, stream: str = None, max_chars: int = None) -> str:
+        text = "\n".join(self.tail(stream))
+        return text[-max_chars:] if max_chars else text
+
+    def summary(self) -> Dict:
+        """Log details recorded in the session data"""
+        return {
+            "log_dir": str(self.log_dir),
+            "lines_written": self.lines_written,
+            "bytes_written": self.bytes_written
+        }
+
+    def _rotate(self):
+        self._file.close()
+        suffix = ".gz" if self.compress else ""
+
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.log_dir / f"{LOG_NAME}.{index}{suffix}"
+            if source.exists():
+                os.replace(source, self.log_dir / f"{LOG_NAME}.{index + 1}{suffix}")
+
+        if self.backup_count > 0:
+            target = self.log_dir / f"{LOG_NAME}.1{suffix}"
+            if self.compress:
+                with open(self.log_path, "rb") as src, gzip.open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+            else:
+                shutil.copyfile(self.log_path, target)
+
+        self._file = open(self.log_path, "w", encoding="utf-8")
+        self._file_size = 0
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class OutputStalled(subprocess.TimeoutExpired):
+    """The process wrote no output for stall_timeout seconds and was killed"""
+
+    def __str__(self):
+        return f"Command '{self.cmd[0]}' produced no output for {self.timeout:.0f} seconds"
+
+
+def run_with_spooling(cmd: List[str], spooler: SessionLogSpooler, input_text: str = None,
+                      env: Dict = None, cwd=None, timeout: float = None, stall_timeout: float = None) -> int:
+    """
+    Run a command, streaming stdout/stderr into the spooler instead of memory
+
+    Args:
+        timeout: Seconds before the process is killed
+        stall_timeout: Seconds without an output line before the process is killed
+
+    Returns:
+        Process return code
+
+    Raises:
+        subprocess.TimeoutExpired: The process was killed after timeout seconds
+        OutputStalled: The process was killed after stall_timeout seconds of silence
+            (a TimeoutExpired, so callers that only care about timeouts catch it too)
+    """
+    process = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE if input_text is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+        env=env,
+        cwd=cwd
+    )
+
+    threads = [
+        threading.Thread(target=spooler.pump, args=(process.stdout, "stdout"), daemon=True),
+        threading.Thread(target=spooler.pump, args=(process.stderr, "stderr"), daemon=True)
+    ]
+    if input_text is not None:
+        threads.append(threading.Thread(target=_feed_stdin, args=(process.stdin, input_text), daemon=True))
+    for thread in threads:
+        thread.start()
+
+    started = time.time()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while True:
+            wait = min(STALL_CHECK_SECONDS, stall_timeout) if stall_timeout else None
+            if deadline is not None:
+                remaining = max(0.0, deadline - time.monotonic())
+                wait = remaining if wait is None else min(wait, remaining)
+            try:
+                returncode = process.wait(timeout=wait)
+                break
+            except subprocess.TimeoutExpired:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+                if time.time() - (spooler.last_output_at or started) >= stall_timeout:
+                    raise OutputStalled(cmd, stall_timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        for thread in threads:
+            thread.join(timeout=5)
+
+    return returncode
+
+
+def _feed_stdin(stdin, input_text: str):
+    try:
+        stdin.write(input_text)
+    except (BrokenPipeError, OSError):
+        pass
+    finally:
+        try:
+            stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+
+def tail_log(artifacts_dir: Path, session_id: str, lines: int = 50) -> List[str]:
+    """Last lines of a session's current log file"""
+    log_path = Path(artifacts_dir) / session_id / LOG_NAME
+    if not log_path.exists():
+        return []
+
+    with open(log_path, encoding="utf-8", errors="replace") as f:
+        return [line.rstrip("\n") for line in deque(f, maxlen=lines)]
+
+
+def follow_log(artifacts_dir: Path, session_id: str, poll_interval: float = 0.5,
+               stop: Callable[[], bool] = None) -> Iterator[str]:
+    """
+    Yield new lines from a session's live log, following rotations
+
+    Args:
+        stop: Called between polls; following ends when it returns True
+    """
+    log_path = Path(artifacts_dir) / session_id / LOG_NAME
+    f = None
+    inode = None
+
+    try:
+        while stop is None or not stop():
+            if f is None and log_path.exists():
+                f = open(log_path, encoding="utf-8", errors="replace")
+                f.seek(0, os.SEEK_END)
+                inode = os.fstat(f.fileno()).st_ino
+
+            if f is not None:
+                line = f.readline()
+                if line:
+                    yield line.rstrip("\n")
+                    continue
+
+                # Reopen after rotation replaced the file
+                try:
+                    if os.stat(log_path).st_ino != inode or os.stat(log_path).st_size < f.tell():
+                        f.close()
+                        f = open(log_path, encoding="utf-8", errors="replace")
+                        inode = os.fstat(f.fileno()).st_ino
+                        continue
+                except FileNotFoundError:
+                    pass
+
+            time.sleep(poll_interval)
+    finally:
+        if f is not None:
+            f.close()
+
+
+def main():
+    """CLI interface for session logs"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Read VibeLayer agent session logs")
+    parser.add_argument("session_id", help="Session identifier")
+    parser.add_argument("--project-root", default="/home/omar/Documents/VibeLayer", help="Project root directory")
+    parser.add_argument("--lines", type=int, default=50, help="Number of tail lines to show")
+    parser.add_argument("--follow", action="store_true", help="Keep printing new lines as they are written")
+
+    args = parser.parse_args()
+    artifacts_dir = Path(args.project_root) / ".depot/artifacts"
+
+    for line in tail_log(artifacts_dir, args.session_id, args.lines):
+        print(line)
+
+    if args.follow:
+        try:
+            for line in follow_log(artifacts_dir, args.session_id):
+                print(line, flush=True)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Session Reconciler
+Brings local session records in line with Depot from one bulk list-sessions call per sweep.
+"""
+import json
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import metrics
+from session_store import SessionStore
+
+# Seconds the bulk depot claude list-sessions call may take
+LIST_TIMEOUT = 10.0
+
+# Depot session states by the local status they map to; other states leave records alone
+DEPOT_STATES = {
+    "running": ("running", "in_progress", "active", "started", "starting", "pending", "queued"),
+    "completed": ("completed", "complete", "succeeded", "success", "finished", "done"),
+    "failed": ("failed", "failure", "error", "errored"),
+    "cancelled": ("cancelled", "canceled", "stopped", "killed", "terminated"),
+    "timeout": ("timeout", "timed_out", "expired"),
+}
+_LOCAL_STATUS = {state: status for status, states in DEPOT_STATES.items() for state in states}
+
+
+class ReconcileError(Exception):
+    """depot claude list-sessions failed or returned output that is not a session list"""
+
+
+def fetch_depot_sessions(timeout: float = LIST_TIMEOUT, depot_path: str = "depot", env: Dict = None) -> List[Dict]:
+    """Every session Depot knows about, from one depot claude list-sessions call"""
+    cmd = [depot_path, "claude", "list-sessions", "--output", "json"]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, env=env)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise ReconcileError(f"depot claude list-sessions: {e}") from e
+    if result.returncode != 0:
+        raise ReconcileError(f"depot claude list-sessions exited with {result.returncode}: "
+                             f"{result.stderr.strip()[:200]}")
+
+    try:
+        payload = json.loads(result.stdout or "[]")
+    except json.JSONDecodeError as e:
+        raise ReconcileError(f"depot claude list-sessions returned invalid JSON: {e}") from e
+    if isinstance(payload, dict):
+        payload = payload.get("sessions")
+    if not isinstance(payload, list):
+        raise ReconcileError("depot claude list-sessions returned no session list")
+    return [entry for entry in payload if isinstance(entry, dict)]
+
+
+def cancel_depot_session(session_id: str, timeout: float = LIST_TIMEOUT, depot_path: str = "depot",
+                         env: Dict = None) -> bool:
+    """
+    Stop a session's sandbox on Depot; True once it is known not to be running there
+
+    If the cancel fails, the session still counts as stopped when Depot's listing
+    shows it finished or no longer lists it. When neither can be confirmed (the
+    listing fails, or reports it running or in an unknown state) the result is False.
+    """
+    try:
+        result = subprocess.run([depot_path, "claude", "cancel", session_id],
+                                capture_output=True, text=True, timeout=timeout, env=env)
+        if result.returncode == 0:
+            return True
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+
+    try:
+        listed = [remote_session(entry) for entry in fetch_depot_sessions(timeout, depot_path, env)]
+    except ReconcileError:
+        return False
+    reported = next((entry for entry in listed if entry and entry["session_id"] == session_id), None)
+    return reported is None or reported["status"] not in (None, "running")
+
+
+def remote_session(entry: Dict) -> Optional[Dict]:
+    """
+    One list-sessions entry in local terms, or None if it has no session id
+
+    state is Depot's own (lower-cased) state; status is the local status it maps
+    to, or None when the state is not one we recognise.
+    """
+    session_id = entry.get("session_id") or entry.get("sessionId") or entry.get("id")
+    if not session_id:
+        return None
+    state = str(entry.get("status") or entry.get("state") or "").lower()
+    return {
+        "session_id": str(session_id),
+        "story_id": entry.get("story_id"),
+        "state": state,
+        "status": _LOCAL_STATUS.get(state),
+        "started_at": entry.get("started_at") or entry.get("created_at"),
+        "url": entry.get("session_url") or entry.get("url")
+    }
+
+
+class SessionReconciler:
+    """
+    Applies Depot's view of session state to the local store
+
+    A sweep is one depot claude list-sessions call covering every session, rather
+    than a --resume --wait probe per session. Running local sessions that Depot
+    reports finished take that status, with completed_at set, in one transaction,
+    so SessionWatcher subscribers (the coordinator's scheduler) see every
+    completion of the sweep together. Sessions Depot does not list, or lists in a
+    state we do not recognise, are left alone; their deadlines (SessionReaper)
+    still apply.
+    """
+
+    def __init__(self, store: SessionStore, fetch: Callable[[float], List[Dict]] = None):
+        self.store = store
+        self.fetch = fetch or fetch_depot_sessions
+
+    def reconcile(self, sessions: List[Dict] = None, timeout: float = LIST_TIMEOUT,
+                  now: datetime = None) -> Dict:
+        """
+        Run one sweep
+
+        Args:
+            sessions: Running local sessions to reconcile (all running sessions if None)
+            timeout: Seconds the Depot listing may take
+
+        Returns:
+            {"remote": {session_id: remote_session(...)}, "transitions": [updated records]}
+
+        Raises:
+            ReconcileError: Depot could not be listed; nothing is written
+        """
+        remote = {}
+        for entry in self.fetch(timeout):
+            reported = remote_session(entry)
+            if reported is not None:
+                remote[reported["session_id"]] = reported
+
+        now = now or datetime.utcnow()
+        if sessions is None:
+            sessions = self.store.list_sessions(status="running")
+
+        transitions = []
+        for session in sessions:
+            reported = remote.get(session.get("session_id"))
+            if session.get("status") != "running" or reported is None or reported["status"] in (None, "running"):
+                continue
+            # Finished sessions are few per sweep; re-read so a status that just changed is not overwritten
+            current = self.store.get(session["session_id"])
+            if current is None or current.get("status") != "running":
+                continue
+            updated = {**current, "status": reported["status"], "depot_state": reported["state"],
+                       "completed_at": now.isoformat()}
+            if reported["url"] and not current.get("session_url"):
+                updated["session_url"] = reported["url"]
+            transitions.append(updated)
+
+        if transitions:
+            self.store.save_many(transitions)
+            for session in transitions:
+                metrics.observe_session_duration(session)
+                metrics.SESSIONS_RECONCILED.inc(status=session["status"])
+        return {"remote": remote, "transitions": transitions}
+
+
+def main():
+    """CLI interface for session reconciliation"""
+    import argparse
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Apply Depot's session states to the local VibeLayer session store")
+    parser.add_argument("--project-root", default="/home/omar/Documents/VibeLayer", help="Project root directory")
+    parser.add_argument("--timeout", type=float, default=LIST_TIMEOUT, help="Seconds the Depot listing may take")
+
+    args = parser.parse_args()
+    reconciler = SessionReconciler(SessionStore(Path(args.project_root) / ".depot/sessions"))
+
+    try:
+        swept = reconciler.reconcile(timeout=args.timeout)
+    except ReconcileError as e:
+        print(f"Error: {e}")
+        raise SystemExit(1)
+    for session in swept["transitions"]:
+        print(f"🔁 {session['session_id']} (story {session.get('story_id')}): running → {session['status']}")
+    print(f"Reconciled {len(swept['transitions'])} sessions against {len(swept['remote'])} listed by Depot")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,562 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Session Store
+Indexed, day-partitioned SQLite store for development agent session records under .depot/sessions.
+"""
+import gzip
+import json
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS partitions (
+    day          TEXT PRIMARY KEY,
+    table_name   TEXT NOT NULL,
+    sessions     INTEGER NOT NULL DEFAULT 0,
+    max_revision INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS session_index (
+    session_id   TEXT PRIMARY KEY,
+    story_id     TEXT,
+    status       TEXT,
+    story_hash   TEXT,
+    agent_type   TEXT,
+    started_at   TEXT,
+    completed_at TEXT,
+    day          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_session_index_status ON session_index (status, agent_type, story_id);
+CREATE INDEX IF NOT EXISTS idx_session_index_story_id ON session_index (story_id);
+CREATE INDEX IF NOT EXISTS idx_session_index_story_hash ON session_index (story_hash, started_at);
+CREATE INDEX IF NOT EXISTS idx_session_index_day ON session_index (day);
+"""
+
+# One table per day of started_at, so retention drops whole tables instead of deleting rows.
+# Partitions hold the full records; lookups by story, status or hash go through session_index,
+# so only full-record reads and retention touch them.
+PARTITION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    session_id   TEXT PRIMARY KEY,
+    story_id     TEXT,
+    status       TEXT,
+    story_hash   TEXT,
+    agent_type   TEXT,
+    started_at   TEXT,
+    completed_at TEXT,
+    revision     INTEGER,
+    data         TEXT NOT NULL
+)
+"""
+
+# Partition for sessions without a usable started_at; it sorts before every real day,
+# so any retention cutoff removes it (such records were always treated as corrupted)
+UNDATED_DAY = "0000-00-00"
+
+# SQLite caps the number of SELECTs in one compound statement (SQLITE_MAX_COMPOUND_SELECT)
+MAX_UNION = 500
+
+DAY_PATTERN = re.compile(r"^(\d{4})-(\d{2})-(\d{2})")
+
+# Sessions that make a new spawn for the same story content redundant
+REUSABLE_STATUSES = ("running", "completed")
+
+# Columns indexed alongside the full JSON record
+INDEXED_FIELDS = ("session_id", "story_id", "status", "story_hash", "agent_type", "started_at", "completed_at")
+
+
+def partition_day(started_at: Optional[str]) -> str:
+    """Day partition (YYYY-MM-DD) for a session's started_at timestamp"""
+    match = DAY_PATTERN.match(started_at) if isinstance(started_at, str) else None
+    return "-".join(match.groups()) if match else UNDATED_DAY
+
+
+def _chunks(items: List, size: int = MAX_UNION) -> Iterator[List]:
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
+class SessionStore:
+    """
+    SQLite (WAL mode) session store shared by the spawner, coordinator and orchestrator
+
+    Sessions live in day-keyed tables (sessions_dYYYYMMDD) listed in a partitions
+    catalog, which also tracks each table's size and latest write revision. One
+    unpartitioned session_index table maps every session to its day and carries the
+    indexed fields, so status, story and hash lookups cost the same however many days
+    of history are kept, and a record is read from the one partition that holds it.
+    Watchers only read partitions written since their last revision, and retention
+    drops whole tables without reading the records in them.
+    """
+
+    def __init__(self, session_dir: Path, import_legacy: bool = True):
+        self.session_dir = Path(session_dir)
+        self.session_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.session_dir / "sessions.db"
+
+        # One connection per thread; WAL lets readers run alongside a writer
+        self._local = threading.local()
+
+        # Called after every committed write in this process (see SessionWatcher)
+        self._listeners: List[Callable[[], None]] = []
+
+        self._connection().executescript(SCHEMA)
+        with self._write() as conn:
+            self._migrate(conn)
+            self._build_index(conn)
+
+        if import_legacy:
+            self.import_json_sessions()
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """Move sessions from the single-table layout of older versions into day partitions"""
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sessions'").fetchone():
+            return
+
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+        revision = "revision" if "revision" in columns else "NULL"
+        sessions = []
+        for row in conn.execute(f"SELECT data, {revision} AS revision FROM sessions ORDER BY {revision}, rowid"):
+            try:
+                sessions.append(json.loads(row["data"]))
+            except json.JSONDecodeError:
+                continue
+        self._save_rows(conn, sessions)
+        conn.execute("DROP TABLE sessions")
+
+        if sessions:
+            print(f"📦 Moved {len(sessions)} sessions into day partitions in {self.db_path}")
+
+    def _build_index(self, conn: sqlite3.Connection):
+        """Fill session_index from the partitions of stores written before it existed"""
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'session_index_built'").fetchone():
+            return
+        columns = ", ".join(INDEXED_FIELDS)
+        for row in conn.execute("SELECT day, table_name FROM partitions").fetchall():
+            conn.execute(f"INSERT OR REPLACE INTO session_index ({columns}, day) "
+                         f"SELECT {columns}, ? FROM {row['table_name']}", (row["day"],))
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('session_index_built', '1')")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction; taken immediately so partition DDL and the revision counter serialize"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        """Read snapshot, so the partition catalog and the tables it lists stay consistent"""
+        conn = self._connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.commit()
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @staticmethod
+    def _row_values(session_data: Dict) -> tuple:
+        values = [session_data.get(field) for field in INDEXED_FIELDS]
+        return tuple(values) + (json.dumps(session_data),)
+
+    @staticmethod
+    def _partitions(conn: sqlite3.Connection, written_after: int = None) -> List[str]:
+        """Partition table names in day order, optionally only those written after a revision"""
+        query = "SELECT table_name FROM partitions"
+        params = []
+        if written_after is not None:
+            query += " WHERE max_revision > ?"
+            params.append(written_after)
+        query += " ORDER BY day"
+        return [row[0] for row in conn.execute(query, params)]
+
+    @staticmethod
+    def _union(conn: sqlite3.Connection, tables: List[str], select: str, params: Iterable = (),
+               suffix: str = "") -> Iterator[List[sqlite3.Row]]:
+        """
+        Run select (with a {table} placeholder) over tables as UNION ALL statements
+
+        Yields one result list per statement of at most MAX_UNION partitions; suffix
+        (ORDER BY / LIMIT) applies to each statement.
+        """
+        params = list(params)
+        for chunk in _chunks(tables):
+            sql = " UNION ALL ".join(select.format(table=table) for table in chunk) + suffix
+            yield conn.execute(sql, params * len(chunk)).fetchall()
+
+    @staticmethod
+    def _ensure_partition(conn: sqlite3.Connection, day: str) -> str:
+        row = conn.execute("SELECT table_name FROM partitions WHERE day = ?", (day,)).fetchone()
+        if row:
+            return row[0]
+        table = "sessions_d" + day.replace("-", "")
+        for statement in PARTITION_SCHEMA.format(table=table).split(";"):
+            conn.execute(statement)
+        conn.execute("INSERT INTO partitions (day, table_name) VALUES (?, ?)", (day, table))
+        return table
+
+    @staticmethod
+    def _next_revision(conn: sqlite3.Connection, count: int) -> int:
+        """Reserve count store-wide write revisions and return the first"""
+        row = conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        current = int(row[0]) if row else 0
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('revision', ?)", (str(current + count),))
+        return current + 1
+
+    def _save_rows(self, conn: sqlite3.Connection, sessions: List[Dict]):
+        # Last write wins within a batch, as with sequential saves
+        latest = {session["session_id"]: session for session in sessions if session.get("session_id")}
+        if not latest:
+            return
+
+        by_day: Dict[str, List[Dict]] = {}
+        for session in latest.values():
+            by_day.setdefault(partition_day(session.get("started_at")), []).append(session)
+
+        # Day each session is stored under now, if any
+        stored_day = {}
+        ids = list(latest)
+        for chunk in _chunks(ids):
+            stored_day.update(conn.execute(
+                f"SELECT session_id, day FROM session_index WHERE session_id IN ({', '.join('?' * len(chunk))})",
+                chunk).fetchall())
+
+        # Earlier copies of sessions whose started_at now falls on another day
+        for day, day_sessions in by_day.items():
+            for session in day_sessions:
+                old_day = stored_day.get(session["session_id"])
+                if old_day is not None and old_day != day:
+                    self._delete_from_partition(conn, old_day, session["session_id"])
+
+        # Every write bumps a store-wide revision so watchers can fetch just the changes
+        revision = self._next_revision(conn, len(latest))
+        index_rows = []
+        for day, day_sessions in sorted(by_day.items()):
+            table = self._ensure_partition(conn, day)
+            rows = []
+            for session in day_sessions:
+                values = self._row_values(session)
+                rows.append(values + (revision,))
+                index_rows.append(values[:-1] + (day,))
+                revision += 1
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {table} ({', '.join(INDEXED_FIELDS)}, data, revision) "
+                f"VALUES ({', '.join('?' * (len(INDEXED_FIELDS) + 2))})",
+                rows
+            )
+            added = sum(1 for session in day_sessions if stored_day.get(session["session_id"]) != day)
+            conn.execute("UPDATE partitions SET sessions = sessions + ?, max_revision = ? WHERE day = ?",
+                         (added, revision - 1, day))
+
+        conn.executemany(
+            f"INSERT OR REPLACE INTO session_index ({', '.join(INDEXED_FIELDS)}, day) "
+            f"VALUES ({', '.join('?' * (len(INDEXED_FIELDS) + 1))})",
+            index_rows
+        )
+
+    @staticmethod
+    def _delete_from_partition(conn: sqlite3.Connection, day: str, session_id: str):
+        row = conn.execute("SELECT table_name FROM partitions WHERE day = ?", (day,)).fetchone()
+        if row is None:
+            return
+        cursor = conn.execute(f"DELETE FROM {row[0]} WHERE session_id = ?", (session_id,))
+        conn.execute("UPDATE partitions SET sessions = sessions - ? WHERE day = ?", (cursor.rowcount, day))
+
+    # Index rows joined to the partition holding each session, for _read_records
+    LOCATE = ("SELECT i.session_id AS session_id, p.table_name AS table_name "
+              "FROM session_index AS i JOIN partitions AS p ON p.day = i.day")
+
+    @staticmethod
+    def _read_records(conn: sqlite3.Connection, located: List[sqlite3.Row]) -> List[Dict]:
+        """Full records for (session_id, table_name) rows from LOCATE, in the given order"""
+        ids_by_table: Dict[str, List[str]] = {}
+        for row in located:
+            ids_by_table.setdefault(row["table_name"], []).append(row["session_id"])
+
+        records = {}
+        for table, ids in ids_by_table.items():
+            for chunk in _chunks(ids):
+                for row in conn.execute(f"SELECT session_id, data FROM {table} "
+                                        f"WHERE session_id IN ({', '.join('?' * len(chunk))})", chunk):
+                    records[row["session_id"]] = json.loads(row["data"])
+        return [records[row["session_id"]] for row in located if row["session_id"] in records]
+
+    def save(self, session_data: Dict):
+        """Insert or replace a session record"""
+        self.save_many([session_data])
+
+    def save_many(self, sessions: Iterable[Dict]):
+        """Insert or replace several session records in a single transaction"""
+        sessions = list(sessions)
+        if not sessions:
+            return
+
+        with self._write() as conn:
+            self._save_rows(conn, sessions)
+        self._notify()
+
+    def add_listener(self, listener: Callable[[], None]):
+        """Register a callback invoked after each write made through this store"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self):
+        for listener in list(self._listeners):
+            listener()
+
+    def max_revision(self) -> int:
+        """Latest write revision in the store"""
+        row = self._connection().execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return int(row[0]) if row else 0
+
+    def changes_since(self, revision: int) -> List[Dict]:
+        """Session records written after the given revision, oldest first"""
+        with self._read() as conn:
+            tables = self._partitions(conn, written_after=revision)
+            rows = [row for chunk in self._union(
+                conn, tables, "SELECT data, revision FROM {table} WHERE revision > ?", (revision,)) for row in chunk]
+        rows.sort(key=lambda row: row["revision"])
+        return [{**json.loads(row["data"]), "revision": row["revision"]} for row in rows]
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        """Get a session record by ID"""
+        with self._read() as conn:
+            located = conn.execute(f"{self.LOCATE} WHERE i.session_id = ?", (session_id,)).fetchall()
+            records = self._read_records(conn, located)
+        return records[0] if records else None
+
+    def latest_by_hash(self, story_hash: str, statuses: Iterable[str] = None,
+                       agent_type: str = None) -> Optional[Dict]:
+        """Most recently started session for the given story content hash, optionally limited to statuses and agent type"""
+        query = f"{self.LOCATE} WHERE i.story_hash = ?"
+        params = [story_hash]
+        if agent_type is not None:
+            query += " AND i.agent_type = ?"
+            params.append(agent_type)
+        if statuses is not None:
+            statuses = list(statuses)
+            query += f" AND i.status IN ({', '.join('?' * len(statuses))})"
+            params.extend(statuses)
+
+        with self._read() as conn:
+            located = conn.execute(query + " ORDER BY i.day DESC, i.started_at DESC LIMIT 1", params).fetchall()
+            records = self._read_records(conn, located)
+        return records[0] if records else None
+
+    @staticmethod
+    def _filters(prefix: str = "", **values) -> tuple:
+        clauses = []
+        params = []
+        for column, value in values.items():
+            if value is not None:
+                clauses.append(f"{prefix}{column} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def list_sessions(self, status: str = None, agent_type: str = None, story_id: str = None) -> List[Dict]:
+        """List session records, optionally filtered by indexed fields"""
+        where, params = self._filters("i.", status=status, agent_type=agent_type, story_id=story_id)
+
+        with self._read() as conn:
+            if where:
+                # The index picks the sessions; only the partitions holding them are read
+                located = conn.execute(f"{self.LOCATE}{where} ORDER BY i.day, i.started_at", params).fetchall()
+                return self._read_records(conn, located)
+
+            # Chunks cover consecutive day ranges, so per-chunk ordering is a global ordering
+            return [json.loads(row["data"])
+                    for rows in self._union(conn, self._partitions(conn), "SELECT data, started_at FROM {table}",
+                                            suffix=" ORDER BY started_at")
+                    for row in rows]
+
+    def story_ids_with_status(self, status: str, agent_type: str = None) -> Set[str]:
+        """Get the IDs of stories that have at least one session in the given status"""
+        where, params = self._filters(status=status, agent_type=agent_type)
+        with self._read() as conn:
+            return {row[0] for row in conn.execute(f"SELECT DISTINCT story_id FROM session_index{where}", params)}
+
+    def story_durations(self) -> Dict[str, float]:
+        """Mean duration in seconds of each story's completed sessions"""
+        query = ("SELECT story_id, AVG((julianday(completed_at) - julianday(started_at)) * 86400) AS seconds "
+                 "FROM session_index WHERE status = 'completed' AND completed_at IS NOT NULL "
+                 "AND started_at IS NOT NULL GROUP BY story_id")
+        with self._read() as conn:
+            return {row["story_id"]: row["seconds"] for row in conn.execute(query)
+                    if row["seconds"] is not None and row["seconds"] > 0}
+
+    def count(self, status: str = None, agent_type: str = None) -> int:
+        """Count session records, optionally by status and agent type"""
+        where, params = self._filters(status=status, agent_type=agent_type)
+        with self._read() as conn:
+            if not where:
+                # Partition sizes are kept in the catalog
+                return conn.execute("SELECT COALESCE(SUM(sessions), 0) FROM partitions").fetchone()[0]
+            return conn.execute(f"SELECT COUNT(*) FROM session_index{where}", params).fetchone()[0]
+
+    def partitions(self) -> List[Dict]:
+        """Day partitions with their session counts, oldest first"""
+        with self._read() as conn:
+            return [dict(row) for row in conn.execute(
+                "SELECT day, table_name, sessions, max_revision FROM partitions ORDER BY day")]
+
+    def delete_started_before(self, cutoff_iso: str, archive_dir: Path = None) -> int:
+        """
+        Delete sessions started before the cutoff (or with no start time at all)
+
+        Days wholly before the cutoff are dropped as tables without reading their
+        records; only the cutoff's own day is trimmed row by row.
+
+        Args:
+            cutoff_iso: ISO timestamp; sessions started before it are removed
+            archive_dir: Append removed records to gzip JSON-lines files here
+                (sessions-YYYY-MM-DD.jsonl.gz) instead of discarding them
+
+        Returns:
+            Number of session records removed
+        """
+        cutoff_day = partition_day(cutoff_iso)
+        removed = 0
+
+        with self._write() as conn:
+            expired = conn.execute(
+                "SELECT day, table_name, sessions FROM partitions WHERE day < ? ORDER BY day", (cutoff_day,)
+            ).fetchall()
+            for partition in expired:
+                if archive_dir is not None:
+                    self._archive(conn, partition["table_name"], partition["day"], archive_dir)
+                conn.execute(f"DROP TABLE IF EXISTS {partition['table_name']}")
+                conn.execute("DELETE FROM partitions WHERE day = ?", (partition["day"],))
+                conn.execute("DELETE FROM session_index WHERE day = ?", (partition["day"],))
+                removed += partition["sessions"]
+
+            boundary = conn.execute("SELECT table_name FROM partitions WHERE day = ?", (cutoff_day,)).fetchone()
+            if boundary is not None and cutoff_day != UNDATED_DAY:
+                table = boundary[0]
+                where = "started_at IS NULL OR started_at < ?"
+                if archive_dir is not None:
+                    self._archive(conn, table, cutoff_day, archive_dir, where, (cutoff_iso,))
+                cursor = conn.execute(f"DELETE FROM {table} WHERE {where}", (cutoff_iso,))
+                conn.execute(f"DELETE FROM session_index WHERE day = ? AND ({where})", (cutoff_day, cutoff_iso))
+                conn.execute("UPDATE partitions SET sessions = sessions - ? WHERE day = ?",
+                             (cursor.rowcount, cutoff_day))
+                removed += cursor.rowcount
+
+        return removed
+
+    @staticmethod
+    def _archive(conn: sqlite3.Connection, table: str, day: str, archive_dir: Path,
+                 where: str = None, params: tuple = ()):
+        """Append a partition's records (or those matching where) to the day's gzip JSONL archive"""
+        archive_dir = Path(archive_dir)
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        query = f"SELECT data FROM {table}" + (f" WHERE {where}" if where else "") + " ORDER BY started_at"
+        # Appending adds a gzip member; readers (gzip.open, zcat) see one continuous stream
+        with gzip.open(archive_dir / f"sessions-{day}.jsonl.gz", "at", encoding="utf-8") as archive:
+            for row in conn.execute(query, params):
+                archive.write(row["data"] + "\n")
+
+    def import_json_sessions(self, force: bool = False) -> int:
+        """
+        One-time import of legacy per-session JSON files from the session directory
+
+        Args:
+            force: Re-run the import even if it already completed
+
+        Returns:
+            Number of session records imported
+        """
+        conn = self._connection()
+        if not force and conn.execute("SELECT 1 FROM meta WHERE key = 'json_import_completed'").fetchone():
+            return 0
+
+        sessions = []
+        for session_file in self.session_dir.glob("*.json"):
+            try:
+                session_data = json.loads(session_file.read_text())
+                if session_data.get("session_id"):
+                    sessions.append(session_data)
+            except (json.JSONDecodeError, OSError):
+                print(f"⚠️  Warning: Skipping unreadable session file {session_file}")
+                continue
+
+        self.save_many(sessions)
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_import_completed', '1')")
+
+        if sessions:
+            print(f"📥 Imported {len(sessions)} legacy session files into {self.db_path}")
+        return len(sessions)
+
+
+def main():
+    """CLI interface for the session store"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect the VibeLayer session store")
+    parser.add_argument("--project-root", default="/home/omar/Documents/VibeLayer", help="Project root directory")
+    parser.add_argument("--import-json", action="store_true", help="Re-import legacy JSON session files")
+    parser.add_argument("--status", help="List sessions with this status")
+    parser.add_argument("--partitions", action="store_true", help="List day partitions and their session counts")
+
+    args = parser.parse_args()
+
+    store = SessionStore(Path(args.project_root) / ".depot/sessions")
+
+    if args.import_json:
+        imported = store.import_json_sessions(force=True)
+        print(json.dumps({"imported": imported}, indent=2))
+        return
+
+    if args.status:
+        print(json.dumps(store.list_sessions(status=args.status), indent=2))
+        return
+
+    if args.partitions:
+        print(json.dumps(store.partitions(), indent=2))
+        return
+
+    print(json.dumps({
+        "database": str(store.db_path),
+        "total_sessions": store.count(),
+        "partitions": len(store.partitions()),
+        "running": store.count("running"),
+        "completed": store.count("completed")
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Session Watcher
+Change notifications for the session store: inotify on Linux, polling elsewhere.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from session_store import SessionStore
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+
+def _open_inotify(path: str) -> Optional[int]:
+    """Open an inotify descriptor watching path, or None if inotify is unavailable"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, path.encode(), WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+class SessionWatcher:
+    """
+    Wakes callers as soon as session records change
+
+    Writes made through the same SessionStore object are seen immediately; writes
+    from other processes are seen through inotify on the session directory, or on
+    the next poll when inotify is not available.
+    """
+
+    def __init__(self, store: SessionStore, poll_interval: float = 5.0):
+        self.store = store
+        self.poll_interval = poll_interval
+
+        self._revision = store.max_revision()
+        self._statuses: Dict[str, str] = {
+            session["session_id"]: session.get("status") for session in store.list_sessions(status="running")
+        }
+
+        self._inotify_fd = _open_inotify(str(store.session_dir))
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        store.add_listener(self._wake)
+
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify_fd is not None else "polling"
+
+    def _wake(self):
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            pass
+
+    @staticmethod
+    def _drain(fd: int):
+        try:
+            while os.read(fd, 4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def wait_for_change(self, timeout: float = None) -> bool:
+        """
+        Block until the session store may have changed
+
+        Returns:
+            True if a change notification arrived, False on timeout. In polling mode
+            the wait is capped at poll_interval and always returns True.
+        """
+        fds = [self._wake_r]
+        if self._inotify_fd is not None:
+            fds.append(self._inotify_fd)
+        else:
+            timeout = self.poll_interval if timeout is None else min(timeout, self.poll_interval)
+
+        try:
+            readable, _, _ = select.select(fds, [], [], timeout)
+        except (OSError, ValueError):
+            # Watcher was closed while waiting
+            return False
+        for fd in readable:
+            self._drain(fd)
+        return bool(readable) or self._inotify_fd is None
+
+    def poll_transitions(self) -> List[Dict]:
+        """
+        Status transitions written since the last call
+
+        Returns:
+            List of {session_id, story_id, agent_type, old_status, status, revision} events
+        """
+        events = []
+        for session in self.store.changes_since(self._revision):
+            self._revision = max(self._revision, session["revision"])
+            session_id = session.get("session_id")
+            old_status = self._statuses.get(session_id)
+            status = session.get("status")
+            if status == old_status:
+                continue
+            self._statuses[session_id] = status
+            events.append({
+                "session_id": session_id,
+                "story_id": session.get("story_id"),
+                "agent_type": session.get("agent_type"),
+                "old_status": old_status,
+                "status": status,
+                "revision": session["revision"]
+            })
+        return events
+
+    def subscribe(self, timeout: float = None) -> Iterator[Dict]:
+        """
+        Iterate over status transitions as they happen
+
+        Args:
+            timeout: Stop after this many seconds without any transition (None waits forever)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._stopping.is_set():
+            events = self.poll_transitions()
+            if events:
+                yield from events
+                deadline = None if timeout is None else time.monotonic() + timeout
+                continue
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return
+            self.wait_for_change(remaining)
+
+    def start(self, callback: Callable[[List[Dict]], None]):
+        """Invoke callback(events) from a background thread whenever statuses change"""
+        def run():
+            while not self._stopping.is_set():
+                self.wait_for_change(self.poll_interval)
+                if self._stopping.is_set():
+                    break
+                events = self.poll_transitions()
+                if events:
+                    callback(events)
+            self.store.close()
+
+        self._thread = threading.Thread(target=run, name="session-watcher", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop the background thread and release descriptors"""
+        self._stopping.set()
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.store.remove_listener(self._wake)
+        for fd in (self._inotify_fd, self._wake_r, self._wake_w):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._inotify_fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -9,14 +9,40 @@ import subprocess
 import hashlib
 import time
 from pathlib import Path
-from typing import Dict, Optional, Tuple
-from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+from datetime import datetime, timedelta
+
+from async_spawn_engine import AsyncSpawnEngine
+from credential_cache import SourceUnavailable, get_token_cache
+from prompt_compactor import DEFAULT_PROMPT_BUDGET, compact_story
+from session_deadlines import DeadlinePolicy
+from session_logs import OutputStalled, SessionLogSpooler, run_with_spooling
+from session_reconciler import cancel_depot_session
+from session_store import REUSABLE_STATUSES, SessionStore
+from spawn_prefetch import SpawnPrefetcher
+from spawn_retry import SpawnError
 
 class VibeLayerDevAgentSpawner:
-    def __init__(self, project_root: str = "/home/omar/Documents/VibeLayer"):
+    def __init__(self, project_root: str = "/home/omar/Documents/VibeLayer", prompt_budget: int = DEFAULT_PROMPT_BUDGET):
         self.project_root = Path(project_root)
+        self.prompt_budget = prompt_budget
         self.session_store = self.project_root / ".depot/sessions"
-        self.session_store.mkdir(parents=True, exist_ok=True)
+        self.artifacts_dir = self.project_root / ".depot/artifacts"
+        self.store = SessionStore(self.session_store)
+        self.engine = AsyncSpawnEngine()
+        self.deadlines = DeadlinePolicy()
+        # Story ID -> estimated duration in seconds; the coordinator fills this from its
+        # story graph, otherwise deadlines come from story size and session history
+        self.duration_estimates: Dict[str, float] = {}
+        # Specs prepared ahead of launch; the reuse check is repeated when one is taken
+        self.prefetcher = SpawnPrefetcher(lambda path, story_id: self._prepare_spawn(path, story_id, force=True))
+        
+        # Try Doppler first, then the environment, then the GitHub CLI
+        self.token_cache = get_token_cache("github-token", [
+            ("doppler", self._doppler_token),
+            ("env", self._env_token),
+            ("gh", self._gh_cli_token)
+        ])
         
     def generate_session_id(self, story_id: str, story_hash: str) -> str:
         """Generate deterministic session ID for story-based development"""
@@ -27,16 +53,22 @@ class VibeLayerDevAgentSpawner:
         """Generate hash of story content for change detection"""
         return hashlib.sha256(story_content.encode()).hexdigest()
     
-    def spawn_development_agent(self, story_file_path: str, story_id: str = None) -> Dict:
+    def story_deadline(self, story_id: str, story_content: str) -> float:
+        """Seconds a story's agent run may take before it is treated as hung"""
+        estimate = self.duration_estimates.get(story_id)
+        if estimate is not None:
+            return self.deadlines.deadline(estimate)
+        return self.deadlines.story_deadline(story_id, story_content.count('\n') + 1, self.store.story_durations())
+    
+    def _prepare_spawn(self, story_file_path: str, story_id: str = None, force: bool = False) -> Dict:
         """
-        Spawn a development agent in Depot sandbox for a specific story
+        Read and hash the story and build the Depot launch command
         
         Args:
-            story_file_path: Path to the story file containing development context
-            story_id: Optional story identifier (extracted from filename if not provided)
-            
+            force: Spawn even if a running or completed session exists for the same story content
+        
         Returns:
-            Dict containing session information and monitoring details
+            Spawn spec dict, or {"existing": session_data} if a matching session can be reused
         """
         story_path = Path(story_file_path)
         
@@ -53,17 +85,17 @@ class VibeLayerDevAgentSpawner:
         
         # Generate session ID
         session_id = self.generate_session_id(story_id, story_hash)
-        session_file = self.session_store / f"{session_id}.json"
         
-        # Check for existing session with same story hash
-        if session_file.exists():
-            existing = json.loads(session_file.read_text())
-            if existing.get("story_hash") == story_hash and existing.get("status") in ["running", "completed"]:
-                print(f"Existing session found for story {story_id}: {existing.get('session_url', session_id)}")
-                return existing
+        # Unchanged story content with a live or finished session needs no new sandbox
+        existing = None if force else self._existing_session(story_id, story_hash)
+        if existing:
+            return {"existing": existing}
         
-        # Create development prompt for the agent
-        dev_prompt = self._create_development_prompt(story_content, story_id)
+        # Create development prompt for the agent from the compacted story
+        compacted, prompt_stats = compact_story(story_content, self.prompt_budget, self._story_location(story_path))
+        if prompt_stats["compacted_chars"] < prompt_stats["original_chars"]:
+            print(f"🗜️  Story prompt compacted: {prompt_stats['original_chars']} → {prompt_stats['compacted_chars']} chars")
+        dev_prompt = self._create_development_prompt(compacted, story_id)
         
         # Get GitHub token from Doppler
         github_token = self._get_github_token()
@@ -76,63 +108,216 @@ class VibeLayerDevAgentSpawner:
             "--branch", os.environ.get("GITHUB_REF_NAME", "main")
         ]
         
+        return {
+            "session_id": session_id,
+            "story_id": story_id,
+            "story_file": str(story_file_path),
+            "story_hash": story_hash,
+            "cmd": cmd,
+            "prompt": dev_prompt,
+            "prompt_stats": prompt_stats,
+            "deadline_seconds": self.story_deadline(story_id, story_content),
+            "env": {**os.environ,
+                    "PATH": f"/home/omar/.depot/bin:{os.environ.get('PATH', '')}",
+                    "GITHUB_TOKEN": github_token if github_token else ""}
+        }
+    
+    def _existing_session(self, story_id: str, story_hash: str) -> Optional[Dict]:
+        """Running or completed session for identical story content, marked reused"""
+        # Only sessions the coordinator tracks: it waits on and counts development sessions alone
+        existing = self.store.latest_by_hash(story_hash, REUSABLE_STATUSES, agent_type="development")
+        if existing is None:
+            return None
+        print(f"Existing session found for story {story_id}: "
+              f"{existing.get('session_url', existing['session_id'])} (use --force to respawn)")
+        return {**existing, "reused": True}
+    
+    def prefetch(self, story_file_path: str, story_id: str = None) -> bool:
+        """
+        Prepare a story's spawn (read, hash, prompt, token, deadline) in the background
+        A later spawn of the same story only has to launch; returns False if already prefetched.
+        """
+        return self.prefetcher.prefetch(story_file_path, story_id)
+    
+    def _next_spec(self, story_file_path: str, story_id: str = None, force: bool = False) -> Dict:
+        """The prefetched spawn spec if one is current, otherwise one prepared now"""
+        spec = self.prefetcher.take(story_file_path, story_id)
+        if spec is None:
+            return self._prepare_spawn(story_file_path, story_id, force)
+        # A session may have started for this content since the spec was prepared
+        existing = None if force else self._existing_session(spec["story_id"], spec["story_hash"])
+        return {"existing": existing} if existing else spec
+    
+    def _story_location(self, story_path: Path) -> str:
+        """Story path as the agent sees it in the repository checkout"""
+        try:
+            return str(story_path.resolve().relative_to(self.project_root.resolve()))
+        except ValueError:
+            return str(story_path)
+    
+    @staticmethod
+    def _extract_session_url(line: str) -> Optional[str]:
+        """Session URL from a line of depot CLI output, if present"""
+        if 'depot.dev' in line and 'http' in line:
+            return line.strip()
+        return None
+    
+    def _create_spooler(self, session_id: str) -> SessionLogSpooler:
+        """Stream agent output to .depot/artifacts/<session_id>/ instead of memory"""
+        return SessionLogSpooler(self.artifacts_dir, session_id, url_extractor=self._extract_session_url)
+    
+    def _record_spawned_session(self, spec: Dict, spooler: SessionLogSpooler) -> Dict:
+        """Save session state for a successfully launched agent"""
+        session_url = spooler.session_url
+        started_at = datetime.utcnow()
+        
+        session_data = {
+            "session_id": spec["session_id"],
+            "session_url": session_url,
+            "story_id": spec["story_id"],
+            "story_file": spec["story_file"],
+            "story_hash": spec["story_hash"],
+            "status": "running",
+            "started_at": started_at.isoformat(),
+            "deadline_at": (started_at + timedelta(seconds=spec["deadline_seconds"])).isoformat(),
+            "agent_type": "development",
+            "command_output": spooler.tail_text("stdout", max_chars=1000),  # Last 1000 chars
+            "log": spooler.summary(),
+            "prompt_stats": spec["prompt_stats"]
+        }
+        
+        self.store.save(session_data)
+        
+        print(f"✅ Development agent spawned successfully")
+        print(f"📊 Monitor at: {session_url}")
+        
+        return session_data
+    
+    def spawn_development_agent(self, story_file_path: str, story_id: str = None, force: bool = False,
+                                timeout: float = None) -> Dict:
+        """
+        Spawn a development agent in Depot sandbox for a specific story
+        
+        Args:
+            story_file_path: Path to the story file containing development context
+            story_id: Optional story identifier (extracted from filename if not provided)
+            force: Spawn even if the same story content already has a running or completed session
+            timeout: Seconds before the spawn is terminated (the story's deadline if None);
+                     it is also terminated after deadlines.stall_seconds without output
+            
+        Returns:
+            Dict containing session information and monitoring details
+            
+        Raises:
+            SpawnError: The spawn failed; its transient flag says whether a retry may help
+        """
+        spec = self._next_spec(story_file_path, story_id, force)
+        if "existing" in spec:
+            return spec["existing"]
+        
+        story_id = spec["story_id"]
+        spooler = self._create_spooler(spec["session_id"])
+        
         try:
             print(f"Spawning development agent for story: {story_id}")
-            print(f"Session ID: {session_id}")
+            print(f"Session ID: {spec['session_id']}")
             
-            # Execute Depot command with prompt as stdin
-            result = subprocess.run(
-                cmd,
-                input=dev_prompt,  # Pass prompt via stdin
-                capture_output=True,
-                text=True,
-                timeout=1800,  # 30 minutes timeout
+            # Execute Depot command with prompt as stdin, streaming output to the session log
+            returncode = run_with_spooling(
+                spec["cmd"],
+                spooler,
+                input_text=spec["prompt"],  # Pass prompt via stdin
+                timeout=timeout or spec["deadline_seconds"],
+                stall_timeout=self.deadlines.stall_seconds,
                 cwd=self.project_root,
-                env={**os.environ, 
-                     "PATH": f"/home/omar/.depot/bin:{os.environ.get('PATH', '')}",
-                     "GITHUB_TOKEN": github_token if github_token else ""}
+                env=spec["env"]
             )
             
-            if result.returncode == 0:
-                # Extract session URL from output
-                session_url = None
-                for line in result.stdout.split('\n'):
-                    if 'depot.dev' in line and 'http' in line:
-                        session_url = line.strip()
-                        break
-                
-                # Save session state
-                session_data = {
-                    "session_id": session_id,
-                    "session_url": session_url,
-                    "story_id": story_id,
-                    "story_file": str(story_file_path),
-                    "story_hash": story_hash,
-                    "status": "running",
-                    "started_at": datetime.utcnow().isoformat(),
-                    "agent_type": "development",
-                    "command_output": result.stdout[:1000]  # First 1000 chars
-                }
-                
-                session_file.write_text(json.dumps(session_data, indent=2))
-                
-                print(f"✅ Development agent spawned successfully")
-                print(f"📊 Monitor at: {session_url}")
-                
-                return session_data
+            if returncode == 0:
+                return self._record_spawned_session(spec, spooler)
             else:
-                error_msg = f"Failed to spawn development agent: {result.stderr}"
+                error_msg = f"Failed to spawn development agent: {spooler.tail_text('stderr')}"
                 print(f"❌ {error_msg}")
-                raise RuntimeError(error_msg)
+                raise SpawnError(error_msg)
                 
+        except OutputStalled as e:
+            error_msg = f"Development agent spawn timed out for story: {story_id} (stalled, no output for {e.timeout:.0f}s)"
+            print(f"⏰ {error_msg}")
+            raise SpawnError(error_msg, transient=True, reason="timeout")
         except subprocess.TimeoutExpired:
             error_msg = f"Development agent spawn timed out for story: {story_id}"
             print(f"⏰ {error_msg}")
-            raise RuntimeError(error_msg)
+            raise SpawnError(error_msg, transient=True, reason="timeout")
+        except SpawnError:
+            raise
         except Exception as e:
             error_msg = f"Unexpected error spawning development agent: {str(e)}"
             print(f"💥 {error_msg}")
-            raise RuntimeError(error_msg)
+            raise SpawnError(error_msg) from e
+        finally:
+            spooler.close()
+    
+    async def spawn_development_agent_async(self, story_file_path: str, story_id: str = None,
+                                            timeout: float = None, on_complete: Callable = None,
+                                            force: bool = False) -> Dict:
+        """
+        Async counterpart of spawn_development_agent built on the asyncio spawn engine
+        
+        Args:
+            story_file_path: Path to the story file containing development context
+            story_id: Optional story identifier (extracted from filename if not provided)
+            timeout: Seconds before the spawn is terminated (the story's deadline if None);
+                     it is also terminated after deadlines.stall_seconds without output
+            on_complete: Called (or awaited) with the engine result when the process exits
+            force: Spawn even if the same story content already has a running or completed session
+            
+        Returns:
+            Dict containing session information and monitoring details
+        """
+        spec = self._next_spec(story_file_path, story_id, force)
+        if "existing" in spec:
+            return spec["existing"]
+        
+        story_id = spec["story_id"]
+        print(f"Spawning development agent for story: {story_id}")
+        print(f"Session ID: {spec['session_id']}")
+        
+        spooler = self._create_spooler(spec["session_id"])
+        try:
+            result = await self.engine.run(
+                spec["session_id"],
+                spec["cmd"],
+                input_text=spec["prompt"],
+                env=spec["env"],
+                cwd=str(self.project_root),
+                timeout=timeout or spec["deadline_seconds"],
+                on_complete=on_complete,
+                spooler=spooler,
+                stall_timeout=self.deadlines.stall_seconds
+            )
+        finally:
+            spooler.close()
+        
+        if result["status"] == "completed":
+            return self._record_spawned_session(spec, spooler)
+        if result["status"] == "timeout":
+            error_msg = f"Development agent spawn timed out for story: {story_id}"
+            if result.get("reason") == "stalled":
+                error_msg += f" (stalled, no output for {self.deadlines.stall_seconds:.0f}s)"
+            print(f"⏰ {error_msg}")
+            raise SpawnError(error_msg, transient=True, reason="timeout")
+        error_msg = f"Failed to spawn development agent: {result['stderr']}"
+        print(f"❌ {error_msg}")
+        raise SpawnError(error_msg)
+    
+    def cancel_session(self, session_id: str) -> bool:
+        """Cancel an in-flight async spawn by session ID"""
+        return self.engine.cancel(session_id)
+    
+    def cancel_remote_session(self, session_id: str) -> bool:
+        """Stop a session on Depot (and any spawn of it still running here); True once it is not running there"""
+        self.engine.cancel(session_id)
+        return cancel_depot_session(session_id)
     
     def _create_development_prompt(self, story_content: str, story_id: str) -> str:
         """
@@ -174,51 +359,47 @@ Start implementing Story {story_id} NOW using the *develop-story command."""
     def _get_github_token(self) -> str:
         """
         Get GitHub token from multiple sources
+        Resolved once per TTL and shared by every spawn (and process) via the credential cache
         """
-        # Try Doppler first
-        try:
-            result = subprocess.run(
-                ["doppler", "secrets", "get", "GITHUB_TOKEN", "--plain"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            if result.returncode == 0 and result.stdout.strip():
-                return result.stdout.strip()
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            pass
-        
-        # Try environment variable
-        env_token = os.environ.get("GITHUB_TOKEN", "")
-        if env_token:
-            return env_token
-        
-        # Try GitHub CLI as fallback
+        return self.token_cache.get()
+    
+    @staticmethod
+    def _run_token_command(cmd) -> str:
         try:
             result = subprocess.run(
-                ["gh", "auth", "token"],
+                cmd,
                 capture_output=True,
                 text=True,
                 timeout=5
             )
-            
-            if result.returncode == 0 and result.stdout.strip():
-                return result.stdout.strip()
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            pass
+        except FileNotFoundError:
+            raise SourceUnavailable(cmd[0])
+        except subprocess.TimeoutExpired:
+            return ""
         
+        if result.returncode == 0 and result.stdout.strip():
+            return result.stdout.strip()
         return ""
     
+    @staticmethod
+    def _doppler_token() -> str:
+        return VibeLayerDevAgentSpawner._run_token_command(["doppler", "secrets", "get", "GITHUB_TOKEN", "--plain"])
+    
+    @staticmethod
+    def _env_token() -> str:
+        return os.environ.get("GITHUB_TOKEN", "")
+    
+    @staticmethod
+    def _gh_cli_token() -> str:
+        return VibeLayerDevAgentSpawner._run_token_command(["gh", "auth", "token"])
+    
     def get_session_status(self, session_id: str) -> Dict:
         """Get current status of a development agent session"""
-        session_file = self.session_store / f"{session_id}.json"
+        session_data = self.store.get(session_id)
         
-        if not session_file.exists():
+        if session_data is None:
             return {"error": f"Session {session_id} not found"}
         
-        session_data = json.loads(session_file.read_text())
-        
         # Try to get live status from Depot if possible
         try:
             # This would require Depot CLI status command - placeholder for now
@@ -233,18 +414,16 @@ Start implementing Story {story_id} NOW using the *develop-story command."""
         """List all active development agent sessions"""
         sessions = []
         
-        for session_file in self.session_store.glob("*.json"):
+        for session_data in self.store.list_sessions(agent_type="development"):
             try:
-                session_data = json.loads(session_file.read_text())
-                if session_data.get("agent_type") == "development":
-                    sessions.append({
-                        "session_id": session_data["session_id"],
-                        "story_id": session_data["story_id"],
-                        "status": session_data["status"],
-                        "started_at": session_data["started_at"],
-                        "session_url": session_data.get("session_url")
-                    })
-            except (json.JSONDecodeError, KeyError):
+                sessions.append({
+                    "session_id": session_data["session_id"],
+                    "story_id": session_data["story_id"],
+                    "status": session_data["status"],
+                    "started_at": session_data["started_at"],
+                    "session_url": session_data.get("session_url")
+                })
+            except KeyError:
                 continue
         
         return {
@@ -261,6 +440,7 @@ def main():
     parser.add_argument("--story-id", help="Story identifier (optional)")
     parser.add_argument("--list", action="store_true", help="List active sessions")
     parser.add_argument("--status", help="Get status of specific session")
+    parser.add_argument("--force", action="store_true", help="Spawn even if the unchanged story already has a session")
     
     args = parser.parse_args()
     
@@ -278,7 +458,7 @@ def main():
     
     # Spawn development agent
     try:
-        session_data = spawner.spawn_development_agent(args.story_file, args.story_id)
+        session_data = spawner.spawn_development_agent(args.story_file, args.story_id, force=args.force)
         print(json.dumps(session_data, indent=2))
     except Exception as e:
         print(f"Error: {e}")
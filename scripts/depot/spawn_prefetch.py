@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Spawn Prefetch
+Prepares spawn specs for upcoming stories in the background so a free slot only has to launch.
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+# Ready stories the coordinator prepares ahead while every slot is busy
+DEFAULT_PREFETCH_DEPTH = 2
+
+# Seconds a prepared spec stays usable; well inside the credential cache TTL, so the
+# token it carries is one the cache would still hand out
+PREFETCH_MAX_AGE = 300.0
+
+
+def _fingerprint(story_file) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(story_file)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class SpawnPrefetcher:
+    """
+    Background preparation of spawn specs (story read and hash, compacted prompt,
+    credentials, deadline)
+
+    take() hands back a spec only while it is current: the story file must be
+    unchanged since the spec was requested, and the spec younger than max_age.
+    Otherwise the caller prepares inline as if nothing had been prefetched. A spec
+    still being prepared is waited for, since that work is already under way.
+    """
+
+    def __init__(self, prepare: Callable[[str, Optional[str]], Dict], max_workers: int = 2,
+                 max_age: float = PREFETCH_MAX_AGE):
+        self._prepare = prepare
+        self.max_workers = max_workers
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._prepared: Dict[Tuple[str, Optional[str]], Tuple[Future, Optional[Tuple[int, int]], float]] = {}
+
+    @staticmethod
+    def _key(story_file, story_id: Optional[str]) -> Tuple[str, Optional[str]]:
+        return os.path.abspath(story_file), story_id
+
+    def prefetch(self, story_file, story_id: str = None) -> bool:
+        """Start preparing a story's spawn spec; False if one is already prepared or under way"""
+        key = self._key(story_file, story_id)
+        with self._lock:
+            if key in self._prepared:
+                return False
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="spawn-prefetch")
+            fingerprint = _fingerprint(story_file)
+            future = self._executor.submit(self._prepare, str(story_file), story_id)
+            self._prepared[key] = (future, fingerprint, time.monotonic())
+        return True
+
+    def take(self, story_file, story_id: str = None) -> Optional[Dict]:
+        """The prefetched spec for a story if it is still current, else None"""
+        with self._lock:
+            entry = self._prepared.pop(self._key(story_file, story_id), None)
+        if entry is None:
+            return None
+
+        future, fingerprint, requested_at = entry
+        if (fingerprint is None or _fingerprint(story_file) != fingerprint
+                or time.monotonic() - requested_at > self.max_age):
+            future.cancel()
+            self.misses += 1
+            return None
+        try:
+            spec = future.result()
+        except Exception:
+            # Preparing inline raises the same error where the caller handles it
+            self.misses += 1
+            return None
+        self.hits += 1
+        return spec
+
+    def discard(self, story_file, story_id: str = None):
+        """Drop one story's prefetched spec (e.g. when the story failed validation)"""
+        with self._lock:
+            entry = self._prepared.pop(self._key(story_file, story_id), None)
+        if entry is not None:
+            entry[0].cancel()
+
+    def pending(self) -> int:
+        """Specs prepared or being prepared and not yet taken"""
+        with self._lock:
+            return len(self._prepared)
+
+    def snapshot(self) -> Dict:
+        return {"hits": self.hits, "misses": self.misses, "pending": self.pending()}
+
+    def clear(self):
+        """Drop every untaken spec (they hold credentials)"""
+        with self._lock:
+            entries = list(self._prepared.values())
+            self._prepared.clear()
+        for future, _, _ in entries:
+            future.cancel()
+
+    def close(self):
+        self.clear()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
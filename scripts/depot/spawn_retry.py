@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Spawn Retry
+Failure classification, jittered exponential backoff and a circuit breaker for agent spawns.
+"""
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+# Failures a retry cannot fix: the story, the credentials or the request are wrong
+PERMANENT_PATTERNS = re.compile(
+    r"unauthori[sz]ed|forbidden|\b401\b|\b403\b|authenticat|permission denied|invalid|not found"
+    r"|no such file|validation|bad request|\b400\b",
+    re.IGNORECASE
+)
+
+TIMEOUT_PATTERN = re.compile(r"timed? ?out|timeout", re.IGNORECASE)
+
+
+class SpawnError(RuntimeError):
+    """
+    A development agent spawn failed
+
+    Attributes:
+        transient: True if retrying later may succeed (timeouts, rate limits, 5xx)
+        reason: Short failure category ("timeout", "transient", "permanent")
+    """
+
+    def __init__(self, message: str, transient: bool = None, reason: str = None):
+        super().__init__(message)
+        self.transient = classify_failure(message) if transient is None else transient
+        self.reason = reason or failure_reason(message, self.transient)
+
+
+def classify_failure(message: str) -> bool:
+    """
+    True if a failure message looks transient (timeouts, rate limits, 5xx, network)
+
+    Anything matching a permanent marker is not retried, even if it also mentions a
+    retry hint ("invalid token, try again" is still an auth failure). Unrecognised
+    failures are treated as transient, since the retry budget bounds the cost of
+    being wrong.
+    """
+    if PERMANENT_PATTERNS.search(message or ""):
+        return False
+    return True
+
+
+def failure_reason(message: str, transient: bool = None) -> str:
+    """Short failure category for a failure message (timeout, transient or permanent)"""
+    if transient is None:
+        transient = classify_failure(message)
+    if transient and TIMEOUT_PATTERN.search(message or ""):
+        return "timeout"
+    return "transient" if transient else "permanent"
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, capped at max_attempts per story"""
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 5.0, max_delay: float = 300.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, transient: bool, attempt: int) -> bool:
+        """Whether a failure on the given (1-based) attempt gets another try"""
+        return transient and attempt < self.max_attempts
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before the attempt after the given (1-based) one"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Pauses all spawning when the recent spawn failure rate spikes
+
+    Closed: spawns flow. Open: spawns are held for cooldown seconds after the failure
+    rate over the last window spawns reaches failure_threshold. Half-open: one trial
+    spawn is let through; success closes the breaker, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: float = 0.5, window: int = 10, min_calls: int = 4,
+                 cooldown: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+
+        self.state = self.CLOSED
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+        self._results = deque(maxlen=window)
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a spawn may start now (claims the trial slot when half-open)"""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def retry_after(self) -> Optional[float]:
+        """
+        Seconds until the breaker lets a trial spawn through (0 when not open)
+
+        None while half-open with the trial in flight: only that spawn finishing can
+        let the next one through, so there is no cooldown to wait out.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._trial_in_flight:
+                return None
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self._results.append(False)
+            if self.state == self.HALF_OPEN:
+                self.state = self.CLOSED
+                self._results.clear()
+
+    def release(self):
+        """Record a spawn that says nothing about Depot's health (e.g. an invalid story)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._results.append(True)
+            failures = sum(self._results)
+            if self.state == self.HALF_OPEN or (
+                    len(self._results) >= self.min_calls
+                    and failures / len(self._results) >= self.failure_threshold):
+                self._open()
+
+    def _open(self):
+        if self.state != self.OPEN:
+            self.trips += 1
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self._results.clear()
+
+    def snapshot(self) -> Dict:
+        """Breaker state for inspection"""
+        with self._lock:
+            return {
+                "state": self.state,
+                "trips": self.trips,
+                "recent_failures": sum(self._results),
+                "recent_calls": len(self._results)
+            }
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Story Discovery Cache
+Persistent cache of parsed story metadata keyed by path, mtime, size and content hash.
+"""
+import json
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from story_parser import StoryRecord
+
+CACHE_VERSION = 2
+
+# Files modified this close to the last cache write may change again within the
+# same mtime tick, so their content hash is re-checked instead of trusting stat()
+RACY_WINDOW_NS = 2_000_000_000
+
+
+class StoryDiscoveryCache:
+    """
+    Serves previously parsed stories when a file is unchanged
+    Unchanged files cost one stat(); touched-but-identical files cost a hash; only
+    files whose content changed are re-parsed.
+    """
+
+    def __init__(self, cache_file: Path):
+        self.cache_file = Path(cache_file)
+        self.entries: Optional[Dict[str, Dict]] = None
+        self.written_at_ns = 0
+        self.hits = 0
+        self.parsed = 0
+        self._dirty = False
+
+    def _load(self):
+        if self.entries is not None:
+            return
+
+        self.entries = {}
+        try:
+            data = json.loads(self.cache_file.read_text())
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data.get("entries", {})
+                self.written_at_ns = data.get("written_at_ns", 0)
+        except (OSError, json.JSONDecodeError, AttributeError):
+            # Missing or corrupted cache: start over
+            self._dirty = True
+
+    def get(self, story_file: Path, parse: Callable[[Path, str], StoryRecord]) -> StoryRecord:
+        """
+        Get story metadata for a file, parsing it only if its content changed
+
+        Args:
+            story_file: Story file to look up
+            parse: Called as parse(story_file, content) on a cache miss
+
+        Returns:
+            Parsed story record
+        """
+        self._load()
+
+        key = str(story_file)
+        stat = story_file.stat()
+        entry = self.entries.get(key)
+
+        if (entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size
+                and stat.st_mtime_ns < self.written_at_ns - RACY_WINDOW_NS):
+            self.hits += 1
+            return StoryRecord.from_dict(entry["story"])
+
+        raw = story_file.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+
+        if entry and entry["sha256"] == digest:
+            # Touched but unchanged: keep the parsed record, refresh the stat key
+            self.hits += 1
+            story = entry["story"]
+        else:
+            self.parsed += 1
+            story = parse(story_file, raw.decode('utf-8')).to_dict()
+
+        self.entries[key] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": digest,
+            "story": story
+        }
+        self._dirty = True
+        return StoryRecord.from_dict(story)
+
+    def prune(self, stories_dir: Path, seen_paths: Iterable[str]):
+        """Drop entries for files in stories_dir that no longer exist (deleted or renamed)"""
+        self._load()
+
+        seen = set(seen_paths)
+        stories_dir = str(stories_dir)
+        stale = [
+            key for key in self.entries
+            if os.path.dirname(key) == stories_dir and key not in seen
+        ]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self._dirty = True
+
+    def save(self):
+        """Persist the cache atomically if anything changed"""
+        if not self._dirty or self.entries is None:
+            return
+
+        self.written_at_ns = time.time_ns()
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps({
+            "version": CACHE_VERSION,
+            "written_at_ns": self.written_at_ns,
+            "entries": self.entries
+        }))
+        os.replace(tmp_file, self.cache_file)
+        self._dirty = False
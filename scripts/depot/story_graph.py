@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Story Graph
+Dependency graph over discovered stories with duration estimates and critical-path ordering.
+"""
+import heapq
+from collections import deque
+from statistics import median
+from typing import Dict, Iterable, List, Optional, Set
+
+# Fallback cost of one story line when no completed-session history exists to calibrate against
+DEFAULT_SECONDS_PER_LINE = 30.0
+
+
+def estimate_durations(stories: List[Dict], history: Dict[str, float] = None) -> Dict[str, float]:
+    """
+    Estimate each story's development duration in seconds
+
+    Stories with recorded history use their mean historical duration. The rest are
+    scaled by size_estimate, using seconds-per-line calibrated from the stories that
+    do have history (or DEFAULT_SECONDS_PER_LINE if none do).
+    """
+    history = history or {}
+
+    ratios = [
+        history[story["story_id"]] / story["size_estimate"]
+        for story in stories
+        if story["story_id"] in history and story.get("size_estimate")
+    ]
+    seconds_per_line = median(ratios) if ratios else DEFAULT_SECONDS_PER_LINE
+
+    return {
+        story["story_id"]: history.get(story["story_id"], max(1, story.get("size_estimate") or 1) * seconds_per_line)
+        for story in stories
+    }
+
+
+class DependencyGraphError(ValueError):
+    """
+    The story dependency graph cannot be scheduled
+
+    Attributes:
+        cycles: Dependency cycles, each a list of story IDs that ends where it starts
+        missing: Story ID -> dependencies that are neither discovered stories nor completed
+    """
+
+    def __init__(self, cycles: List[List[str]], missing: Dict[str, List[str]]):
+        self.cycles = cycles
+        self.missing = missing
+
+        problems = []
+        if cycles:
+            problems.append(f"dependency cycle{'s' if len(cycles) != 1 else ''}: "
+                            + "; ".join(" → ".join(cycle) for cycle in cycles))
+        if missing:
+            problems.append("missing dependencies: "
+                            + "; ".join(f"{story_id} needs {', '.join(deps)}" for story_id, deps in sorted(missing.items())))
+        super().__init__("Unschedulable stories, " + ", ".join(problems))
+
+
+class StoryGraph:
+    """
+    Dependency graph of stories weighted by estimated duration
+    A story's critical-path length is its own duration plus the longest chain of
+    stories that (transitively) depend on it.
+    """
+
+    def __init__(self, stories: List[Dict], durations: Dict[str, float] = None):
+        self.stories = {story["story_id"]: story for story in stories}
+        self.durations = durations or estimate_durations(stories)
+
+        # Edges only between stories in the graph; dependencies outside it are
+        # satisfied (or not) by session history, not by scheduling order
+        self.dependents: Dict[str, List[str]] = {story_id: [] for story_id in self.stories}
+        # Number of in-graph dependencies per story (a dependency listed twice counts twice,
+        # matching its two entries in dependents)
+        self.in_degree: Dict[str, int] = dict.fromkeys(self.stories, 0)
+        for story_id, story in self.stories.items():
+            for dep in story["dependencies"]:
+                if dep in self.dependents:
+                    self.dependents[dep].append(story_id)
+                    self.in_degree[story_id] += 1
+
+        self._critical_paths: Optional[Dict[str, float]] = None
+
+    def levels(self) -> List[List[str]]:
+        """
+        Stories grouped by dependency depth
+        Level 0 has no in-graph dependencies; every story in level N depends only on
+        stories in earlier levels, so each level can run fully in parallel. Stories in
+        cycles are omitted (see validate()).
+        """
+        in_degree = dict(self.in_degree)
+        level = sorted(story_id for story_id, degree in in_degree.items() if degree == 0)
+        levels = []
+
+        while level:
+            levels.append(level)
+            next_level = []
+            for story_id in level:
+                for dependent in self.dependents[story_id]:
+                    in_degree[dependent] -= 1
+                    if in_degree[dependent] == 0:
+                        next_level.append(dependent)
+            level = sorted(next_level)
+
+        return levels
+
+    def topological_order(self) -> List[str]:
+        """Story IDs with every dependency before its dependents (stories in cycles are omitted)"""
+        in_degree = dict(self.in_degree)
+        queue = deque(sorted(story_id for story_id, degree in in_degree.items() if degree == 0))
+        order = []
+
+        while queue:
+            story_id = queue.popleft()
+            order.append(story_id)
+            for dependent in self.dependents[story_id]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    queue.append(dependent)
+
+        return order
+
+    def cycles(self) -> List[List[str]]:
+        """
+        Dependency cycles, each as story IDs from a story back to itself
+        One cycle is reported per tangle; stories that only depend on a cycle are not
+        themselves reported.
+        """
+        ordered = set(self.topological_order())
+        if len(ordered) == len(self.stories):
+            return []
+
+        # Every unordered story still depends on another unordered story, so
+        # following those dependencies from any of them must revisit a story
+        cycles = []
+        visited: Set[str] = set()
+        for start in sorted(set(self.stories) - ordered):
+            path = []
+            on_path = {}
+            story_id = start
+            while story_id not in visited:
+                visited.add(story_id)
+                on_path[story_id] = len(path)
+                path.append(story_id)
+                story_id = min(dep for dep in self.stories[story_id]["dependencies"]
+                               if dep in self.stories and dep not in ordered)
+            if story_id in on_path:
+                cycle = path[on_path[story_id]:]
+                # Dependencies were followed backwards; report in dependency order,
+                # starting from the smallest ID so the same cycle always reads the same
+                cycle.reverse()
+                first = cycle.index(min(cycle))
+                cycle = cycle[first:] + cycle[:first]
+                cycles.append(cycle + [cycle[0]])
+        return cycles
+
+    def missing_dependencies(self, satisfied: Iterable[str] = ()) -> Dict[str, List[str]]:
+        """Story ID -> dependencies that are neither in the graph nor in satisfied (e.g. completed stories)"""
+        satisfied = set(satisfied)
+        missing = {}
+        for story_id, story in self.stories.items():
+            deps = [dep for dep in story["dependencies"] if dep not in self.stories and dep not in satisfied]
+            if deps:
+                missing[story_id] = deps
+        return missing
+
+    def validate(self, satisfied: Iterable[str] = ()):
+        """
+        Check that every story can eventually run
+
+        Args:
+            satisfied: Story IDs completed outside the graph (dependencies on them are met)
+
+        Raises:
+            DependencyGraphError: The graph has cycles or dependencies that do not exist
+        """
+        cycles = self.cycles()
+        missing = self.missing_dependencies(satisfied)
+        if cycles or missing:
+            raise DependencyGraphError(cycles, missing)
+
+    def tracker(self, completed: Iterable[str] = ()) -> "ReadyTracker":
+        """Incremental ready-set tracker over this graph, starting from already completed stories"""
+        return ReadyTracker(self, completed)
+
+    def critical_path_lengths(self, completed: Iterable[str] = ()) -> Dict[str, float]:
+        """
+        Critical-path length in seconds from each story to the end of its dependency chain
+
+        Stories in completed take no time and are left out, so the lengths cover only
+        the work still to do.
+        """
+        completed = set(completed)
+        if completed or self._critical_paths is None:
+            lengths = {story_id: self.durations[story_id] for story_id in self.stories if story_id not in completed}
+            for story_id in reversed(self.topological_order()):
+                if story_id in completed:
+                    continue
+                downstream = [lengths[dependent] for dependent in self.dependents[story_id] if dependent in lengths]
+                lengths[story_id] = self.durations[story_id] + max(downstream, default=0)
+            if completed:
+                return lengths
+            self._critical_paths = lengths
+        return self._critical_paths
+
+    def critical_path(self, completed: Iterable[str] = ()) -> List[str]:
+        """The longest duration-weighted dependency chain of stories not yet completed, first story first"""
+        completed = set(completed)
+        lengths = self.critical_path_lengths(completed)
+        roots = [
+            story_id for story_id, story in self.stories.items()
+            if story_id in lengths and not any(dep in lengths for dep in story["dependencies"])
+        ]
+        if not roots:
+            return []
+
+        path = [max(roots, key=lambda story_id: (lengths[story_id], story_id))]
+        while True:
+            next_steps = [story_id for story_id in self.dependents[path[-1]]
+                          if story_id in lengths and story_id not in path]
+            if not next_steps:
+                return path
+            path.append(max(next_steps, key=lambda story_id: (lengths[story_id], story_id)))
+
+    def order(self, stories: List[Dict]) -> List[Dict]:
+        """Sort stories by critical-path length (longest first), then priority, then ID"""
+        lengths = self.critical_path_lengths()
+        return sorted(
+            stories,
+            key=lambda story: (-lengths.get(story["story_id"], 0), story["priority"], story["story_id"])
+        )
+
+    def predicted_makespan(self, max_concurrent: int, completed: Iterable[str] = ()) -> Dict:
+        """
+        Predicted wall-clock for the whole graph at a given concurrency
+        The estimate is the larger of the critical path and the total work spread
+        evenly over max_concurrent slots; completed stories count as no work.
+        """
+        completed = set(completed)
+        lengths = self.critical_path_lengths(completed)
+        critical_path_seconds = max(lengths.values(), default=0)
+        total_work_seconds = sum(seconds for story_id, seconds in self.durations.items()
+                                 if story_id in self.stories and story_id not in completed)
+
+        return {
+            "max_concurrent": max_concurrent,
+            "critical_path_seconds": critical_path_seconds,
+            "total_work_seconds": total_work_seconds,
+            "predicted_makespan_seconds": max(critical_path_seconds, total_work_seconds / max(1, max_concurrent)),
+            "critical_path": self.critical_path(completed)
+        }
+
+    def simulate(self, stories: List[Dict], max_concurrent: int, completed: Iterable[str] = ()) -> Dict:
+        """
+        Discrete-event simulation of dispatching stories on a virtual clock
+
+        Mirrors the coordinator's continuous scheduler: whenever a slot is free, the
+        first ready story in the given order starts, and it occupies the slot for its
+        estimated duration. Nothing is spawned and no real time passes.
+
+        Args:
+            stories: Stories in dispatch order (as returned by order())
+            max_concurrent: Number of slots
+            completed: Story IDs already completed; they satisfy dependencies on them and,
+                if in the graph, finish at t=0 without taking a slot
+
+        Returns:
+            Predicted makespan, slot utilization, critical path and blocked stories
+        """
+        max_concurrent = max(1, max_concurrent)
+        completed = set(completed)
+        position = {story["story_id"]: index for index, story in enumerate(stories)}
+
+        # Dependencies still outstanding per story; missing ones never resolve
+        waiting_on: Dict[str, int] = {}
+        ready = []
+        for story in stories:
+            story_id = story["story_id"]
+            if story_id in completed:
+                # Finished at t=0: never scheduled, and its dependents do not wait on it
+                continue
+            outstanding = [dep for dep in story["dependencies"] if dep not in completed]
+            if any(dep not in self.stories for dep in outstanding):
+                continue
+            waiting_on[story_id] = len(outstanding)
+            if not outstanding:
+                heapq.heappush(ready, position[story_id])
+
+        clock = 0.0
+        busy_seconds = 0.0
+        started = set()
+        running = []  # (finish_time, position, story_id)
+
+        while ready or running:
+            while ready and len(running) < max_concurrent:
+                story_id = stories[heapq.heappop(ready)]["story_id"]
+                started.add(story_id)
+                duration = self.durations[story_id]
+                busy_seconds += duration
+                heapq.heappush(running, (clock + duration, position[story_id], story_id))
+
+            clock, _, story_id = heapq.heappop(running)
+            for dependent in self.dependents[story_id]:
+                if dependent in waiting_on:
+                    waiting_on[dependent] -= 1
+                    if waiting_on[dependent] == 0:
+                        heapq.heappush(ready, position[dependent])
+
+        critical_path = self.critical_path(completed)
+        return {
+            "max_concurrent": max_concurrent,
+            "stories_simulated": len(started),
+            "stories_completed": sum(1 for story in stories if story["story_id"] in completed),
+            "blocked_stories": sorted(story["story_id"] for story in stories
+                                      if story["story_id"] not in started and story["story_id"] not in completed),
+            "makespan_seconds": clock,
+            "busy_seconds": busy_seconds,
+            "utilization": busy_seconds / (clock * max_concurrent) if clock else 0.0,
+            "critical_path": critical_path,
+            "critical_path_seconds": sum(self.durations[story_id] for story_id in critical_path)
+        }
+
+
+class ReadyTracker:
+    """
+    Incremental view of which stories have every in-graph dependency completed
+
+    Each story keeps a count of its unfinished dependencies. Completing a story
+    decrements its dependents' counts, so an unlock costs O(dependents) instead of
+    re-checking the whole backlog against the completed set on every scheduler
+    tick. Dependencies outside the graph are not tracked; StoryGraph.validate()
+    makes sure they were completed before scheduling starts.
+    """
+
+    def __init__(self, graph: StoryGraph, completed: Iterable[str] = ()):
+        self.graph = graph
+        self.waiting_on: Dict[str, int] = dict(graph.in_degree)
+        self.completed: Set[str] = set()
+        for story_id in completed:
+            self.complete(story_id)
+
+    def ready(self) -> List[str]:
+        """Story IDs whose dependencies are all completed (including completed stories themselves)"""
+        return [story_id for story_id, waiting in self.waiting_on.items() if waiting == 0]
+
+    def is_ready(self, story_id: str) -> bool:
+        return self.waiting_on.get(story_id) == 0
+
+    def complete(self, story_id: str) -> List[str]:
+        """
+        Mark a story completed
+
+        Returns:
+            Dependents that became ready because of it (empty if the story was
+            already completed or is not in the graph)
+        """
+        if story_id not in self.waiting_on or story_id in self.completed:
+            return []
+        self.completed.add(story_id)
+
+        unlocked = []
+        for dependent in self.graph.dependents[story_id]:
+            self.waiting_on[dependent] -= 1
+            if self.waiting_on[dependent] == 0:
+                unlocked.append(dependent)
+        return unlocked
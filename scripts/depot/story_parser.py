@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+VibeLayer Story Parser
+Single-pass story parsing shared by discovery, validation and the orchestrator.
+"""
+import hashlib
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+DEFAULT_PRIORITY = 5
+
+# Only the lines discovery and validation care about: headings and "Priority:" /
+# "Depends on:" lines. One scan finds them all, so other lines are never split out
+# or lowercased. Patterns start with a literal newline (the content is scanned with
+# one prepended) and spell out case by hand, which keeps re on its fast literal
+# search path; re.IGNORECASE and ^ with re.MULTILINE both defeat it.
+STORY_LINE = re.compile(
+    r"\n(?:(#{1,6}[ \t][^\n]*)"
+    r"|[Pp][Rr][Ii][Oo][Rr][Ii][Tt][Yy](:[^\n]*)"
+    r"|[Dd][Ee][Pp][Ee][Nn][Dd][Ss] [Oo][Nn](:[^\n]*))"
+)
+
+
+def story_id_from_path(story_file) -> str:
+    """Story ID from a story file name (story_1.2.md -> 1.2)"""
+    return os.path.splitext(os.path.basename(story_file))[0].replace('story_', '')
+
+
+class StoryRecord:
+    """
+    Parsed story metadata
+    Slots keep large backlogs compact; item access (story["priority"], .get) keeps
+    existing dict-style callers working.
+    """
+
+    __slots__ = ("story_id", "file_path", "priority", "dependencies", "sections",
+                 "tasks_total", "tasks_done", "story_hash", "size_bytes", "size_estimate")
+
+    def __init__(self, story_id: str, file_path: str, priority: int = DEFAULT_PRIORITY,
+                 dependencies: List[str] = None, sections: Tuple[str, ...] = (),
+                 tasks_total: int = 0, tasks_done: int = 0, story_hash: str = None,
+                 size_bytes: int = 0, size_estimate: int = 0):
+        self.story_id = story_id
+        self.file_path = file_path
+        self.priority = priority
+        self.dependencies = dependencies if dependencies is not None else []
+        # Interned: the same few section headings recur across every story
+        self.sections = tuple(sys.intern(section) for section in sections)
+        self.tasks_total = tasks_total
+        self.tasks_done = tasks_done
+        self.story_hash = story_hash
+        self.size_bytes = size_bytes
+        self.size_estimate = size_estimate  # line count, a rough complexity measure
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self.__slots__
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, StoryRecord):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"StoryRecord({self.story_id!r}, priority={self.priority}, dependencies={self.dependencies})"
+
+    def has_section(self, heading: str) -> bool:
+        """Whether any heading contains this text, e.g. "## Implementation" (case-insensitive)"""
+        heading = heading.lower()
+        return any(heading in section for section in self.sections)
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable form (for the discovery cache)"""
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "StoryRecord":
+        return cls(**{key: data[key] for key in cls.__slots__ if key in data})
+
+
+def parse_story(content: str, story_file, story_id: str = None) -> StoryRecord:
+    """
+    Parse story markdown into a StoryRecord in one pass over the content
+
+    Args:
+        content: Story file content
+        story_file: Story file path (the ID is derived from its name)
+        story_id: Explicit story ID overriding the file name
+
+    Returns:
+        StoryRecord with priority, dependencies, headings, task counts, hash and size
+    """
+    priority = None
+    dependencies = None
+    sections = []
+
+    for heading, priority_text, deps_text in STORY_LINE.findall("\n" + content):
+        if heading:
+            sections.append(heading.rstrip().lower())
+        elif priority_text:
+            # Only the first "Priority:" line counts, even if it is not a number
+            if priority is None:
+                try:
+                    priority = int(priority_text.split(':')[1].strip())
+                except ValueError:
+                    priority = DEFAULT_PRIORITY
+        elif dependencies is None:
+            dependencies = [d.strip() for d in deps_text[1:].split(',') if d.strip()]
+
+    # Markdown task checkboxes, counted in C rather than matched line by line
+    tasks_open = content.count("- [ ]")
+    tasks_done = content.count("- [x]") + content.count("- [X]")
+
+    raw = content.encode('utf-8')
+    return StoryRecord(
+        story_id=story_id or story_id_from_path(story_file),
+        file_path=str(story_file),
+        priority=DEFAULT_PRIORITY if priority is None else priority,
+        dependencies=dependencies or [],
+        sections=sections,
+        tasks_total=tasks_open + tasks_done,
+        tasks_done=tasks_done,
+        story_hash=hashlib.sha256(raw).hexdigest(),
+        size_bytes=len(raw),
+        size_estimate=content.count('\n') + 1
+    )
+
+
+def parse_story_file(story_file, story_id: str = None) -> StoryRecord:
+    """Read and parse a story file"""
+    return parse_story(Path(story_file).read_text(encoding='utf-8'), story_file, story_id)
@@ -3,15 +3,38 @@
 BMAD-Depot Integration Test
 Test the complete integration between BMAD orchestrator and Depot sandboxes
 """
+import os
 import sys
 import json
+import sqlite3
+import subprocess
+import time
+import asyncio
+import gzip
 import tempfile
+import threading
+import urllib.request
+from datetime import datetime, timedelta
 from pathlib import Path
 
 # Add current directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from bmad_depot_bridge import BMadDepotBridge
+import metrics
+from async_spawn_engine import AsyncSpawnEngine
+from bmad_depot_bridge import BMadDepotBridge, validate_stories
+from concurrency_controller import AdaptiveConcurrencyController
+from coordinator_daemon import SOCKET_ENV, CoordinatorDaemon, DaemonClient, DaemonError
+from credential_cache import SourceUnavailable, TokenCache
+from parallel_agent_orchestrator import ParallelAgentOrchestrator
+from prompt_compactor import compact_story
+from story_parser import StoryRecord, parse_story
+from session_deadlines import DeadlinePolicy, SessionReaper
+from session_logs import OutputStalled, SessionLogSpooler, run_with_spooling, tail_log
+from session_store import SessionStore
+from spawn_prefetch import SpawnPrefetcher
+from spawn_retry import CircuitBreaker, RetryPolicy, SpawnError
+from story_graph import DependencyGraphError, StoryGraph, estimate_durations
 
 def create_test_story(temp_dir: Path, story_id: str = "test001") -> Path:
     """Create a test story file for integration testing"""
@@ -185,6 +208,1412 @@ def test_coordination_discovery():
             print(f"   ❌ FAIL: Expected 3 stories, found {len(stories)}")
             return False
 
+def test_continuous_scheduling():
+    """Test 6: Free slots are refilled without waiting for a whole batch"""
+    print("\n🧪 Test 6: Continuous Scheduling")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        stories_dir = temp_path / "stories"
+        stories_dir.mkdir()
+        
+        for story_id in ["sched001", "sched002", "sched003", "sched004"]:
+            create_test_story(stories_dir, story_id)
+        
+        bridge = BMadDepotBridge(str(temp_path))
+        coordinator = bridge.coordinator
+        
+        # Simulate spawns: one slow story should not hold the other slot idle
+        spawn_times = {"sched001": 0.6}
+        
+        def fake_spawn(story_file_path, story_id=None, force=False):
+            time.sleep(spawn_times.get(story_id, 0.1))
+            return {"session_id": f"fake-{story_id}", "story_id": story_id}
+        
+        coordinator.spawner.spawn_development_agent = fake_spawn
+        
+        start = time.monotonic()
+        result = coordinator.coordinate_parallel_development(str(stories_dir), batch_size=2)
+        elapsed = time.monotonic() - start
+        
+        print(f"   Sessions spawned: {result['sessions_spawned']}")
+        print(f"   Elapsed: {elapsed:.2f}s")
+        
+        if result["sessions_spawned"] == 4 and elapsed < 1.0:
+            print("   ✅ PASS: Slots refilled continuously")
+            return True
+        else:
+            print("   ❌ FAIL: Scheduler waited on batch barrier")
+            return False
+
+def test_session_store():
+    """Test 7: Indexed session store and legacy JSON import"""
+    print("\n🧪 Test 7: Session Store")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        session_dir = Path(temp_dir) / ".depot/sessions"
+        session_dir.mkdir(parents=True)
+        
+        # Legacy per-session JSON files should be imported exactly once
+        for index, status in enumerate(["completed", "running", "completed"]):
+            legacy = {
+                "session_id": f"legacy-{index}",
+                "story_id": f"store00{index}",
+                "status": status,
+                "started_at": f"2025-01-0{index + 1}T00:00:00",
+                "agent_type": "development"
+            }
+            (session_dir / f"legacy-{index}.json").write_text(json.dumps(legacy))
+        (session_dir / "corrupted.json").write_text("{not json")
+        
+        store = SessionStore(session_dir)
+        imported_again = SessionStore(session_dir).import_json_sessions()
+        
+        completed = store.story_ids_with_status("completed", agent_type="development")
+        print(f"   Sessions imported: {store.count()}")
+        print(f"   Completed stories: {sorted(completed)}")
+        
+        # Sessions the coordinator does not own are not counted as its running work
+        store.save({"session_id": "orchestrated", "story_id": "store003", "status": "running",
+                    "started_at": "2025-01-03T00:00:00", "agent_type": "orchestrator"})
+        running = (store.count("running"), store.count("running", agent_type="development"))
+        
+        cleaned = store.delete_started_before("2025-01-02T12:00:00")
+        
+        if (store.count() == 2 and imported_again == 0 and cleaned == 2
+                and completed == {"store000", "store002"} and running == (2, 1)):
+            print("   ✅ PASS: Session store working")
+            return True
+        else:
+            print("   ❌ FAIL: Session store returned unexpected results")
+            return False
+
+def test_discovery_cache():
+    """Test 8: Unchanged stories are served from the discovery cache"""
+    print("\n🧪 Test 8: Discovery Cache")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        stories_dir = temp_path / "stories"
+        stories_dir.mkdir()
+        
+        story1 = create_test_story(stories_dir, "cache001")
+        story2 = create_test_story(stories_dir, "cache002")
+        
+        bridge = BMadDepotBridge(str(temp_path))
+        bridge.coordinator.discover_stories(str(stories_dir))
+        
+        # A fresh coordinator reads the persisted cache
+        coordinator = BMadDepotBridge(str(temp_path)).coordinator
+        coordinator.discover_stories(str(stories_dir))
+        cached_parses = coordinator.discovery_cache.parsed
+        
+        # Changed content is re-parsed, deleted files drop out
+        story1.write_text(story1.read_text() + "\nDepends on: cache002\n")
+        story2.unlink()
+        stories = coordinator.discover_stories(str(stories_dir))
+        
+        print(f"   Parses on unchanged run: {cached_parses}")
+        print(f"   Stories after edit/delete: {[s['story_id'] for s in stories]}")
+        
+        if (cached_parses == 0 and coordinator.discovery_cache.parsed == 1
+                and len(stories) == 1 and stories[0]["dependencies"] == ["cache002"]):
+            print("   ✅ PASS: Discovery cache working")
+            return True
+        else:
+            print("   ❌ FAIL: Discovery cache returned stale or missing stories")
+            return False
+
+def test_async_spawn_engine():
+    """Test 9: Async engine runs sessions concurrently with timeouts and cancellation"""
+    print("\n🧪 Test 9: Async Spawn Engine")
+    
+    async def scenario():
+        engine = AsyncSpawnEngine()
+        completed = []
+        
+        start = time.monotonic()
+        results = await asyncio.gather(*(
+            engine.run(f"sleep-{i}", ["sleep", "0.3"], on_complete=completed.append)
+            for i in range(50)
+        ))
+        elapsed = time.monotonic() - start
+        
+        timed_out = await engine.run("slow", ["sleep", "5"], timeout=0.2)
+        
+        task = asyncio.ensure_future(engine.run("cancel-me", ["sleep", "5"]))
+        await asyncio.sleep(0.2)
+        cancelled = engine.cancel("cancel-me")
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        
+        # Cancelling from another thread (as the daemon's request handlers do)
+        task = asyncio.ensure_future(engine.run("cancel-thread", ["sleep", "5"]))
+        await asyncio.sleep(0.2)
+        cancelled = cancelled and await asyncio.to_thread(engine.cancel, "cancel-thread")
+        try:
+            await asyncio.wait_for(task, 2)
+        except asyncio.CancelledError:
+            pass
+        
+        # A line too long to stream fails the run without leaving its process behind
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pid_file = Path(temp_dir) / "pid"
+            long_line = [sys.executable, "-c",
+                         f"import os, sys, time; open({str(pid_file)!r}, 'w').write(str(os.getpid())); "
+                         "sys.stdout.write('x' * (2 * 1024 * 1024) + '\\n'); sys.stdout.flush(); time.sleep(30)"]
+            spooler = SessionLogSpooler(Path(temp_dir) / "artifacts", "long-line")
+            overflowed = await engine.run("long-line", long_line, spooler=spooler, timeout=30)
+            spooler.close()
+            try:
+                os.kill(int(pid_file.read_text()), 0)
+                overflowed["left_running"] = True
+            except ProcessLookupError:
+                overflowed["left_running"] = False
+        
+        return results, completed, elapsed, timed_out, cancelled, overflowed, engine.active_sessions()
+    
+    results, completed, elapsed, timed_out, cancelled, overflowed, still_active = asyncio.run(scenario())
+    
+    print(f"   50 sessions finished in {elapsed:.2f}s")
+    print(f"   Timeout status: {timed_out['status']}, cancelled: {cancelled}")
+    print(f"   Overlong line: {overflowed['status']}, process left running: {overflowed['left_running']}")
+    
+    if (all(r["status"] == "completed" for r in results) and len(completed) == 50
+            and elapsed < 5 and timed_out["status"] == "timeout" and cancelled and not still_active
+            and overflowed["status"] == "failed" and not overflowed["left_running"]):
+        print("   ✅ PASS: Async spawn engine working")
+        return True
+    else:
+        print("   ❌ FAIL: Async spawn engine misbehaved")
+        return False
+
+def create_fake_depot(bin_dir: Path, body: str) -> Path:
+    """Create a stand-in depot executable that runs the given shell body"""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    fake_depot = bin_dir / "depot"
+    fake_depot.write_text(f"#!/bin/sh\n{body}\n")
+    fake_depot.chmod(0o755)
+    return fake_depot
+
+def test_concurrent_monitor():
+    """Test 10: Monitor sweep resolves every session from one Depot listing"""
+    print("\n🧪 Test 10: Concurrent Monitor")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        orchestrator = ParallelAgentOrchestrator(str(temp_path))
+        
+        session_ids = [f"monitor-{i}" for i in range(20)]
+        orchestrator.store.save_many({"session_id": session_id, "story_id": session_id, "status": "running",
+                                      "started_at": datetime.now().isoformat()} for session_id in session_ids)
+        listing = temp_path / "sessions.json"
+        listing.write_text(json.dumps([{"id": session_id, "status": "completed"} for session_id in session_ids]))
+        calls = temp_path / "calls"
+        orchestrator.depot_path = str(create_fake_depot(
+            temp_path / "bin", f'echo "$@" >> "{calls}"\nsleep 0.5\ncat "{listing}"'))
+        streamed = []
+        
+        start = time.monotonic()
+        statuses = orchestrator.monitor_sessions(session_ids, on_status=lambda sid, status: streamed.append(sid))
+        elapsed = time.monotonic() - start
+        depot_calls = calls.read_text().splitlines()
+        
+        print(f"   Swept {len(statuses)} sessions in {elapsed:.2f}s with {len(depot_calls)} depot call(s)")
+        
+        if (len(statuses) == 20 and len(streamed) == 20 and elapsed < 3 and len(depot_calls) == 1
+                and all(status["status"] == "completed" for status in statuses.values())
+                and orchestrator.store.count("completed") == 20):
+            print("   ✅ PASS: Monitor sweep resolves sessions in one call")
+            return True
+        else:
+            print("   ❌ FAIL: Monitor sweep was serial or incomplete")
+            return False
+
+def test_credential_cache():
+    """Test 11: Token cache resolves once for concurrent callers"""
+    print("\n🧪 Test 11: Credential Cache")
+    
+    calls = {"doppler": 0, "slow": 0}
+    
+    def missing_doppler():
+        calls["doppler"] += 1
+        raise SourceUnavailable("doppler")
+    
+    def slow_resolver():
+        calls["slow"] += 1
+        time.sleep(0.2)
+        return "test-token"
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = TokenCache("test-token", [("doppler", missing_doppler), ("slow", slow_resolver)],
+                           shared_dir=Path(temp_dir))
+        
+        tokens = []
+        threads = [threading.Thread(target=lambda: tokens.append(cache.get())) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        # A second process-local cache reads the shared entry instead of resolving
+        shared = TokenCache("test-token", [("slow", slow_resolver)], shared_dir=Path(temp_dir))
+        shared_token = shared.get()
+        
+        # After expiry the missing source stays negatively cached
+        cache._entry["expires_at"] = 0
+        (Path(temp_dir) / "test-token.json").unlink()
+        cache.get()
+        snapshot = cache.snapshot()
+    
+    print(f"   Resolver calls: {calls}")
+    print(f"   Missing sources: {snapshot['missing_sources']}")
+    
+    if (tokens == ["test-token"] * 20 and shared_token == "test-token"
+            and calls == {"doppler": 1, "slow": 2} and snapshot["missing_sources"] == ["doppler"]):
+        print("   ✅ PASS: Credential cache working")
+        return True
+    else:
+        print("   ❌ FAIL: Credential cache resolved too often")
+        return False
+
+def test_event_driven_wakeup():
+    """Test 12: A completed dependency wakes the scheduler without waiting for the poll"""
+    print("\n🧪 Test 12: Event-Driven Wakeup")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        stories_dir = temp_path / "stories"
+        stories_dir.mkdir()
+        
+        create_test_story(stories_dir, "event001")
+        dependent = create_test_story(stories_dir, "event002")
+        dependent.write_text(dependent.read_text() + "\nDepends on: event001\n")
+        
+        coordinator = BMadDepotBridge(str(temp_path)).coordinator
+        
+        def fake_spawn(story_file_path, story_id=None, force=False):
+            session_data = {
+                "session_id": f"fake-{story_id}",
+                "story_id": story_id,
+                "status": "running",
+                "started_at": "2025-01-01T00:00:00",
+                "agent_type": "development"
+            }
+            coordinator.store.save(session_data)
+            return session_data
+        
+        coordinator.spawner.spawn_development_agent = fake_spawn
+        
+        def complete_dependency():
+            # Another process marks the dependency completed
+            time.sleep(0.5)
+            external = SessionStore(temp_path / ".depot/sessions")
+            session = external.get("fake-event001")
+            session["status"] = "completed"
+            external.save(session)
+        
+        threading.Thread(target=complete_dependency).start()
+        
+        start = time.monotonic()
+        result = coordinator.coordinate_parallel_development(str(stories_dir), batch_size=2, poll_interval=30)
+        elapsed = time.monotonic() - start
+        
+        print(f"   Sessions spawned: {result['sessions_spawned']}")
+        print(f"   Dependent dispatched after {elapsed:.2f}s")
+        
+        if result["sessions_spawned"] == 2 and elapsed < 3:
+            print("   ✅ PASS: Scheduler woke on status transition")
+            return True
+        else:
+            print("   ❌ FAIL: Scheduler waited for the poll interval")
+            return False
+
+def test_critical_path_ordering():
+    """Test 13: Stories blocking long chains are scheduled first"""
+    print("\n🧪 Test 13: Critical Path Ordering")
+    
+    def story(story_id, priority, deps=(), size=100):
+        return {"story_id": story_id, "priority": priority, "dependencies": list(deps), "size_estimate": size}
+    
+    stories = [
+        story("urgent", 1),
+        story("base", 9),
+        story("middle", 5, ["base"]),
+        story("top", 5, ["middle"])
+    ]
+    
+    # History for one story calibrates seconds-per-line for the others
+    durations = estimate_durations(stories, {"urgent": 1000})
+    graph = StoryGraph(stories, durations)
+    ordered = [s["story_id"] for s in graph.order(stories)]
+    makespan = graph.predicted_makespan(2)
+    
+    print(f"   Order: {ordered}")
+    print(f"   Critical path: {makespan['critical_path']} ({makespan['critical_path_seconds']:.0f}s)")
+    
+    if (ordered[0] == "base" and makespan["critical_path"] == ["base", "middle", "top"]
+            and makespan["predicted_makespan_seconds"] == 3000 and durations["top"] == 1000):
+        print("   ✅ PASS: Critical path ordering working")
+        return True
+    else:
+        print("   ❌ FAIL: Ready queue not ordered by critical path")
+        return False
+
+def test_output_spooling():
+    """Test 14: Agent output is streamed to rotating logs with a bounded tail"""
+    print("\n🧪 Test 14: Output Spooling")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        story_file = create_test_story(temp_path, "spool001")
+        
+        orchestrator = ParallelAgentOrchestrator(str(temp_path))
+        orchestrator.depot_path = str(create_fake_depot(
+            temp_path / "bin",
+            'echo "Link: https://depot.dev/sessions/spool"\n'
+            'i=0; while [ $i -lt 5000 ]; do echo "build output line $i"; i=$((i+1)); done\n'
+            'echo "warning from agent" >&2'
+        ))
+        
+        # Small rotation threshold so 5000 lines roll over into compressed backups
+        orchestrator._create_spooler = lambda session_id: SessionLogSpooler(
+            orchestrator.artifacts_dir, session_id, max_bytes=32 * 1024, tail_lines=50,
+            url_extractor=orchestrator._extract_session_url
+        )
+        
+        session_data = orchestrator.spawn_agent(story_file, "spool001", wait=True)
+        log_dir = Path(session_data["log"]["log_dir"])
+        backups = sorted(p.name for p in log_dir.glob("output.log.*.gz"))
+        tail = tail_log(orchestrator.artifacts_dir, session_data["session_id"], lines=3)
+        
+        print(f"   Status: {session_data['status']}, URL: {session_data.get('session_url')}")
+        print(f"   Lines logged: {session_data['log']['lines_written']}, compressed backups: {len(backups)}")
+        print(f"   Tail: {tail[-1] if tail else None}")
+        
+        if (session_data["status"] == "completed"
+                and session_data.get("session_url") == "https://depot.dev/sessions/spool"
+                and session_data["log"]["lines_written"] == 5002 and backups
+                and len(session_data["output"].splitlines()) <= 50
+                and session_data["error"] == "warning from agent"
+                and tail and tail[-1] in ("build output line 4999", "[stderr] warning from agent")):
+            print("   ✅ PASS: Output spooling working")
+            return True
+        else:
+            print("   ❌ FAIL: Output spooling lost or over-buffered output")
+            return False
+
+def test_backlog_simulation():
+    """Test 15: Virtual-clock simulation predicts makespan without spawning"""
+    print("\n🧪 Test 15: Backlog Simulation")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        stories_dir = temp_path / "stories"
+        stories_dir.mkdir()
+        for i in range(4):
+            create_test_story(stories_dir, f"sim{i:03d}")
+        
+        coordinator = BMadDepotBridge(str(temp_path)).coordinator
+        coordinator.spawner.spawn_development_agent = None  # Simulation must never spawn
+        result = coordinator.simulate_development(str(stories_dir), [1, 4])
+        serial, parallel = result["simulations"]
+        
+        print(f"   Makespan: {serial['makespan_seconds']:.0f}s at 1 slot, {parallel['makespan_seconds']:.0f}s at 4 slots")
+    
+    # Completed stories finish at t=0: only the rest of the graph takes slots and time
+    chain = [
+        {"story_id": "done1", "priority": 1, "size_estimate": 100, "dependencies": []},
+        {"story_id": "next1", "priority": 1, "size_estimate": 100, "dependencies": ["done1"]},
+        {"story_id": "next2", "priority": 1, "size_estimate": 100, "dependencies": ["next1"]},
+        {"story_id": "done2", "priority": 1, "size_estimate": 100, "dependencies": []}
+    ]
+    chain_graph = StoryGraph(chain)
+    story_seconds = chain_graph.durations["next1"]
+    partial = chain_graph.simulate(chain_graph.order(chain), 2, {"done1", "done2"})
+    finished = chain_graph.simulate(chain_graph.order(chain), 2, {story["story_id"] for story in chain})
+    
+    print(f"   Half completed: makespan {partial['makespan_seconds']:.0f}s, critical path {partial['critical_path']}; "
+          f"all completed: {finished['makespan_seconds']:.0f}s")
+    
+    # Thousands of stories with dependency chains simulate in well under a second
+    stories = [
+        {"story_id": f"s{i:05d}", "priority": i % 10, "size_estimate": 10 + i % 50,
+         "dependencies": [f"s{i - 7:05d}"] if i >= 7 and i % 3 else []}
+        for i in range(5000)
+    ]
+    graph = StoryGraph(stories)
+    start = time.monotonic()
+    large = graph.simulate(graph.order(stories), 20)
+    elapsed = time.monotonic() - start
+    
+    print(f"   5000 stories: makespan {large['makespan_seconds'] / 3600:.1f}h, "
+          f"utilization {large['utilization']:.0%}, simulated in {elapsed:.2f}s")
+    
+    if (serial["makespan_seconds"] == 4 * parallel["makespan_seconds"] > 0
+            and parallel["utilization"] == 1.0 and not parallel["blocked_stories"]
+            and partial["makespan_seconds"] == partial["busy_seconds"] == 2 * story_seconds
+            and partial["stories_simulated"] == 2 and partial["critical_path"] == ["next1", "next2"]
+            and not partial["blocked_stories"]
+            and finished["makespan_seconds"] == finished["busy_seconds"] == finished["stories_simulated"] == 0
+            and large["stories_simulated"] == 5000
+            and large["makespan_seconds"] >= large["critical_path_seconds"]
+            and large["makespan_seconds"] >= large["busy_seconds"] / 20
+            and elapsed < 2):
+        print("   ✅ PASS: Backlog simulation working")
+        return True
+    else:
+        print("   ❌ FAIL: Simulation results inconsistent")
+        return False
+
+def test_adaptive_concurrency():
+    """Test 16: Concurrency backs off on timeouts and slow spawns, then recovers"""
+    print("\n🧪 Test 16: Adaptive Concurrency")
+    
+    controller = AdaptiveConcurrencyController(min_limit=1, max_limit=8)
+    controller.record(1.0, "timeout")
+    after_timeout = controller.limit
+    for _ in range(40):
+        controller.record(1.0)
+    recovered = controller.limit
+    for _ in range(10):
+        controller.record(10.0)
+    after_slowdown = controller.limit
+    
+    print(f"   Limit: 8 → {after_timeout} (timeout) → {recovered} (healthy) → {after_slowdown} (slow)")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        stories_dir = temp_path / "stories"
+        stories_dir.mkdir()
+        for i in range(6):
+            create_test_story(stories_dir, f"aimd{i:03d}")
+        
+        coordinator = BMadDepotBridge(str(temp_path)).coordinator
+        
+        def flaky_spawn(story_file_path, story_id=None, force=False):
+            if story_id in ("aimd000", "aimd001"):
+                raise RuntimeError(f"Development agent spawn timed out for story: {story_id}")
+            if story_id == "aimd005":
+                # A long story run is not Depot latency
+                time.sleep(0.3)
+            return {"session_id": f"fake-{story_id}", "story_id": story_id}
+        
+        coordinator.spawner.spawn_development_agent = flaky_spawn
+        coordinator.retry_policy = RetryPolicy(max_attempts=1)
+        result = coordinator.coordinate_parallel_development(str(stories_dir), batch_size=4)
+        state = result["concurrency"]
+        
+        print(f"   Coordinator: {state['timeouts']} timeouts, {state['decreases']} backoffs, limit {state['limit']}")
+    
+    if (after_timeout == 4 and recovered == 8 and after_slowdown < 8
+            and state["timeouts"] == 2 and state["decreases"] >= 1 and state["successes"] == 4
+            and result["sessions_spawned"] == 4 and state["baseline_latency_seconds"] is None):
+        print("   ✅ PASS: Adaptive concurrency working")
+        return True
+    else:
+        print("   ❌ FAIL: Concurrency limit not adapting")
+        return False
+
+def test_spawn_retry():
+    """Test 17: Transient spawn failures are retried; permanent ones and outages are not hammered"""
+    print("\n🧪 Test 17: Spawn Retry and Circuit Breaker")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        stories_dir = temp_path / "stories"
+        stories_dir.mkdir()
+        story_files = {story_id: create_test_story(stories_dir, story_id)
+                       for story_id in ("retry001", "retry002", "broken001")}
+        # retry002 depends on the flaky story, so dropping it would strand retry002
+        story_file = story_files["retry002"]
+        story_file.write_text(story_file.read_text() + "\nDepends on: retry001\n")
+        
+        coordinator = BMadDepotBridge(str(temp_path)).coordinator
+        coordinator.retry_policy = RetryPolicy(max_attempts=3, base_delay=0.05)
+        calls = {}
+        
+        def flaky_spawn(story_file_path, story_id=None, force=False):
+            calls[story_id] = calls.get(story_id, 0) + 1
+            if story_id == "broken001":
+                raise SpawnError("Failed to spawn development agent: 401 Unauthorized")
+            if story_id == "retry001" and calls[story_id] == 1:
+                raise SpawnError("Failed to spawn development agent: 429 rate limited")
+            session = {"session_id": f"fake-{story_id}", "story_id": story_id, "status": "completed",
+                       "agent_type": "development", "started_at": "2026-01-01T00:00:00"}
+            coordinator.store.save(session)
+            return session
+        
+        coordinator.spawner.spawn_development_agent = flaky_spawn
+        result = coordinator.coordinate_parallel_development(str(stories_dir), batch_size=2, poll_interval=1)
+        
+        print(f"   Calls: {calls}, retries: {result['retries']}, failed: {result['sessions_failed']}")
+    
+        # A half-open breaker holds the second story until the trial spawn finishes, without spinning
+        trial_dir = temp_path / "trial-stories"
+        trial_dir.mkdir()
+        for story_id in ("trial001", "trial002"):
+            create_test_story(trial_dir, story_id)
+        coordinator = BMadDepotBridge(str(temp_path)).coordinator
+        coordinator.circuit_breaker = CircuitBreaker(failure_threshold=0.5, window=4, min_calls=4, cooldown=0.05)
+        for _ in range(4):
+            coordinator.circuit_breaker.record_failure()
+        time.sleep(0.1)
+        checks = []
+        allow = coordinator.circuit_breaker.allow
+        coordinator.circuit_breaker.allow = lambda: checks.append(1) or allow()
+        
+        def slow_spawn(story_file_path, story_id=None, force=False):
+            time.sleep(0.5)
+            session = {"session_id": f"fake-{story_id}", "story_id": story_id, "status": "completed",
+                       "agent_type": "development", "started_at": "2026-01-01T00:00:00"}
+            coordinator.store.save(session)
+            return session
+        
+        coordinator.spawner.spawn_development_agent = slow_spawn
+        half_open = coordinator.coordinate_parallel_development(str(trial_dir), batch_size=2, poll_interval=1)
+        
+        print(f"   Half-open: {len(checks)} breaker checks for {half_open['sessions_spawned']} spawns")
+    
+    breaker = CircuitBreaker(failure_threshold=0.5, window=4, min_calls=4, cooldown=0.1)
+    for _ in range(4):
+        breaker.record_failure()
+    opened = breaker.allow()
+    time.sleep(0.15)
+    trial, second_trial = breaker.allow(), breaker.allow()
+    held = breaker.retry_after()
+    breaker.record_success()
+    
+    print(f"   Breaker: allowed while open={opened}, trial={trial}, concurrent trial={second_trial}, "
+          f"state after success={breaker.state}")
+    
+    if (calls == {"retry001": 2, "retry002": 1, "broken001": 1} and result["retries"] == 1
+            and result["sessions_spawned"] == 2 and result["sessions_failed"] == 1
+            and SpawnError("Development agent spawn timed out").reason == "timeout"
+            and not opened and trial and not second_trial and held is None and breaker.state == "closed"
+            and half_open["sessions_spawned"] == 2 and len(checks) < 10):
+        print("   ✅ PASS: Spawn retry working")
+        return True
+    else:
+        print("   ❌ FAIL: Spawn failures not retried as expected")
+        return False
+
+def test_story_dedupe():
+    """Test 18: Unchanged stories reuse their session instead of spawning a new sandbox"""
+    print("\n🧪 Test 18: Content-Addressed Dedupe")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        story_file = create_test_story(temp_path, "dedupe001")
+        spawn_log = temp_path / "spawns.log"
+        bin_dir = temp_path / "bin"
+        create_fake_depot(bin_dir, f'echo spawn >> "{spawn_log}"\necho "https://depot.dev/sessions/dedupe"')
+        
+        bridge = BMadDepotBridge(str(temp_path))
+        # The coordinator does not track orchestrator sessions, so development spawns never reuse them
+        orchestrated_file = create_test_story(temp_path, "orch001")
+        bridge.spawner.store.save({
+            "session_id": "orchestrated", "story_id": "orch001", "status": "completed", "agent_type": "orchestrator",
+            "story_hash": bridge.spawner.get_story_hash(orchestrated_file.read_text()),
+            "started_at": datetime.utcnow().isoformat()})
+        original_path = os.environ.get("PATH", "")
+        os.environ["PATH"] = f"{bin_dir}:{original_path}"
+        try:
+            orchestrated = bridge.spawner.spawn_development_agent(str(orchestrated_file), "orch001")
+            first = bridge.spawner.spawn_development_agent(str(story_file), "dedupe001")
+            second = bridge.spawner.spawn_development_agent(str(story_file), "dedupe001")
+            forced = bridge.spawner.spawn_development_agent(str(story_file), "dedupe001", force=True)
+            story_file.write_text(story_file.read_text() + "\n- [ ] New task\n")
+            changed = bridge.spawner.spawn_development_agent(str(story_file), "dedupe001")
+        finally:
+            os.environ["PATH"] = original_path
+        
+        # The orchestrator hashes stories the same way, so it sees the spawner's session
+        orchestrator = ParallelAgentOrchestrator(str(temp_path))
+        orchestrator.depot_path = str(create_fake_depot(bin_dir, "exit 1"))
+        reused_by_orchestrator = orchestrator.spawn_agent(story_file, "dedupe001")
+        
+        # Reuses (e.g. re-running after a crash) never reach Depot, so they leave the concurrency controller alone
+        rerun = orchestrator.spawn_parallel_agents([story_file], max_concurrent=4)["concurrency"]
+        coordinator = bridge.coordinator
+        coordinator.concurrency = AdaptiveConcurrencyController(min_limit=1, max_limit=10)
+        for _ in range(5):
+            coordinator._record_spawn_outcome({"success": True, "duration_seconds": 0.002,
+                                               "session_data": {**changed, "reused": True}})
+        rerun_coordinator = coordinator.concurrency.snapshot()
+        
+        spawns = len(spawn_log.read_text().splitlines())
+        print(f"   Depot spawns: {spawns}, reused: {bool(second.get('reused'))}, "
+              f"orchestrator reused: {bool(reused_by_orchestrator.get('reused'))}")
+    
+    if (spawns == 4 and not orchestrated.get("reused") and second.get("reused") and second["session_id"] == first["session_id"]
+            and not forced.get("reused") and not changed.get("reused")
+            and reused_by_orchestrator.get("reused") and reused_by_orchestrator["session_id"] == changed["session_id"]
+            and all(snapshot["successes"] == 0 and snapshot["baseline_latency_seconds"] is None
+                    for snapshot in (rerun, rerun_coordinator))):
+        print("   ✅ PASS: Dedupe working")
+        return True
+    else:
+        print("   ❌ FAIL: Unchanged story was respawned")
+        return False
+
+def test_prompt_compaction():
+    """Test 19: Completed tasks and run history are summarized and prompts stay within budget"""
+    print("\n🧪 Test 19: Prompt Compaction")
+    
+    story = (
+        "# Story: Compaction\n\n"
+        "## Tasks\n"
+        "- [x] Finished task\n"
+        "  - [x] Finished subtask\n"
+        "- [ ] Open task\n\n"
+        "```markdown\n- [x] Example inside a code block\n```\n\n"
+        "## Dev Agent Record\n"
+        + "".join(f"- Debug entry {i}\n" for i in range(200))
+        + "\n## Acceptance Criteria\n- Works\n"
+    )
+    compacted, stats = compact_story(story, source_path="stories/compaction.md")
+    _, tight = compact_story(story, budget_chars=120)
+    # Budgets too small for the full marker shorten it, then drop it
+    tiny = {budget: compact_story(story, budget_chars=budget, source_path="stories/compaction.md")[0]
+            for budget in (0, 5, 40, 60)}
+    
+    # A checked parent stays when work beneath it is still open; small stories are not grown
+    nested = (
+        "## Tasks\n"
+        "- [x] Parent task\n"
+        "  - [x] Finished subtask with a long description of what was done\n"
+        "  - [ ] Sub b still open\n"
+        "- [x] Closed parent with a long description of what was done\n"
+        "  - [x] Closed child with a long description of what was done\n"
+    )
+    nested_compacted, nested_stats = compact_story(nested)
+    small = "# Story\n- [x] a\n- [ ] b\n"
+    small_compacted, _ = compact_story(small)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        story_file = temp_path / "story_compact001.md"
+        story_file.write_text(story)
+        bin_dir = temp_path / "bin"
+        create_fake_depot(bin_dir, 'echo "https://depot.dev/sessions/compact"')
+        
+        bridge = BMadDepotBridge(str(temp_path))
+        original_path = os.environ.get("PATH", "")
+        os.environ["PATH"] = f"{bin_dir}:{original_path}"
+        try:
+            session = bridge.spawner.spawn_development_agent(str(story_file), "compact001")
+        finally:
+            os.environ["PATH"] = original_path
+        recorded = bridge.spawner.store.get(session["session_id"]) or {}
+    
+    print(f"   {stats['original_chars']} → {stats['compacted_chars']} chars, "
+          f"tasks dropped: {stats['completed_tasks_dropped']}, sections: {stats['sections_dropped']}, "
+          f"budgeted: {tight['compacted_chars']}/120, tiny: { {budget: len(text) for budget, text in tiny.items()} }")
+    
+    if ("Finished" not in compacted and "Open task" in compacted and "Example inside a code block" in compacted
+            and "Debug entry" not in compacted and "## Acceptance Criteria" in compacted
+            and stats["completed_tasks_dropped"] == 1 and stats["sections_dropped"] == ["Dev Agent Record"]
+            and tight["truncated"] and tight["compacted_chars"] <= 120
+            and all(len(text) <= budget for budget, text in tiny.items()) and "omitted]_" in tiny[40]
+            and "- [x] Parent task\n" in nested_compacted and "Sub b still open" in nested_compacted
+            and "Finished subtask" not in nested_compacted and "Closed" not in nested_compacted
+            and nested_stats["completed_tasks_dropped"] == 2 and small_compacted == small
+            and recorded.get("prompt_stats", {}).get("original_chars") == len(story)
+            and recorded["prompt_stats"]["compacted_chars"] < len(story) // 4):
+        print("   ✅ PASS: Prompt compaction working")
+        return True
+    else:
+        print("   ❌ FAIL: Story prompt not compacted as expected")
+        return False
+
+def test_metrics_export():
+    """Test 20: Coordination is instrumented and metrics export as a textfile and over HTTP"""
+    print("\n🧪 Test 20: Metrics Export")
+    
+    spawned_before = metrics.SPAWNS.value(result="spawned")
+    permanent_before = metrics.SPAWN_FAILURES.value(reason="permanent")
+    latency_before = metrics.SPAWN_LATENCY.count(result="spawned")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        stories_dir = temp_path / "stories"
+        stories_dir.mkdir()
+        for story_id in ("metric001", "metric002", "broken001"):
+            create_test_story(stories_dir, story_id)
+        
+        coordinator = BMadDepotBridge(str(temp_path)).coordinator
+        
+        def fake_spawn(story_file_path, story_id=None, force=False):
+            if story_id == "broken001":
+                raise SpawnError("Failed to spawn development agent: invalid story")
+            return {"session_id": f"fake-{story_id}", "story_id": story_id}
+        
+        coordinator.spawner.spawn_development_agent = fake_spawn
+        coordinator.coordinate_parallel_development(str(stories_dir), batch_size=2, poll_interval=1)
+        
+        textfile = temp_path / "metrics" / "vibelayer.prom"
+        metrics.REGISTRY.write_textfile(textfile)
+        exported = textfile.read_text()
+        
+        server = metrics.REGISTRY.serve(0)
+        try:
+            url = "http://127.0.0.1:{}/metrics".format(server.server_address[1])
+            with urllib.request.urlopen(url, timeout=5) as response:
+                served = response.read().decode()
+                content_type = response.headers["Content-Type"]
+        finally:
+            server.shutdown()
+            server.server_close()
+    
+    spawned = metrics.SPAWNS.value(result="spawned") - spawned_before
+    permanent = metrics.SPAWN_FAILURES.value(reason="permanent") - permanent_before
+    print(f"   Spawned: {spawned}, permanent failures: {permanent}, "
+          f"discovered: {metrics.STORIES_DISCOVERED.value():.0f}, textfile: {len(exported)} bytes")
+    
+    if (spawned == 2 and permanent == 1
+            and metrics.SPAWN_LATENCY.count(result="spawned") - latency_before == 2
+            and metrics.STORIES_DISCOVERED.value() == 3 and metrics.SESSIONS_IN_FLIGHT.value() == 0
+            and "# TYPE vibelayer_spawn_latency_seconds histogram" in exported
+            and 'vibelayer_spawn_failures_total{reason="permanent"}' in exported
+            and 'vibelayer_spawn_latency_seconds_bucket{result="spawned",le="+Inf"}' in served
+            and content_type.startswith("text/plain")):
+        print("   ✅ PASS: Metrics export working")
+        return True
+    else:
+        print("   ❌ FAIL: Metrics missing or not exported")
+        return False
+
+def test_partitioned_store():
+    """Test 21: Sessions are stored in day partitions and retention drops or archives whole days"""
+    print("\n🧪 Test 21: Partitioned Session Store")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        session_dir = Path(temp_dir) / ".depot/sessions"
+        session_dir.mkdir(parents=True)
+        
+        # A store from the single-table layout is moved into partitions on open
+        conn = sqlite3.connect(str(session_dir / "sessions.db"))
+        conn.execute("CREATE TABLE sessions (session_id TEXT PRIMARY KEY, story_id TEXT, status TEXT, "
+                     "story_hash TEXT, agent_type TEXT, started_at TEXT, completed_at TEXT, data TEXT NOT NULL)")
+        for day in range(1, 6):
+            legacy = {"session_id": f"part-{day}", "story_id": f"part00{day}", "status": "completed",
+                      "agent_type": "development", "started_at": f"2025-03-0{day}T10:00:00"}
+            conn.execute("INSERT INTO sessions (session_id, status, started_at, data) VALUES (?, ?, ?, ?)",
+                         (legacy["session_id"], legacy["status"], legacy["started_at"], json.dumps(legacy)))
+        conn.commit()
+        conn.close()
+        
+        store = SessionStore(session_dir)
+        migrated_days = [partition["day"] for partition in store.partitions()]
+        
+        # Re-saving a session under a new start day moves it rather than duplicating it
+        store.save({"session_id": "part-5", "story_id": "part005", "status": "running",
+                    "agent_type": "development", "started_at": "2025-03-06T09:00:00"})
+        copies = [s for s in store.list_sessions() if s["session_id"] == "part-5"]
+        
+        archive_dir = session_dir / "archive"
+        cleaned = store.delete_started_before("2025-03-03T12:00:00", archive_dir)
+        archived = []
+        for archive_file in sorted(archive_dir.glob("*.jsonl.gz")):
+            with gzip.open(archive_file, "rt") as archive:
+                archived.extend(json.loads(line)["session_id"] for line in archive)
+        remaining_days = [partition["day"] for partition in store.partitions()]
+        
+        # Status lookups come from the session index, which follows moves and retention
+        indexed = (store.count("completed"), store.story_ids_with_status("completed"),
+                   [s["session_id"] for s in store.list_sessions(status="running")])
+        
+        # Partitioned stores written before the index existed are indexed on open
+        conn = sqlite3.connect(str(session_dir / "sessions.db"))
+        conn.execute("DELETE FROM session_index")
+        conn.execute("DELETE FROM meta WHERE key = 'session_index_built'")
+        conn.commit()
+        conn.close()
+        reindexed = SessionStore(session_dir).get("part-4")
+        
+        print(f"   Migrated days: {len(migrated_days)}, copies of moved session: {len(copies)}")
+        print(f"   Cleaned: {cleaned}, archived: {archived}, remaining days: {remaining_days}")
+    
+    if (migrated_days == [f"2025-03-0{day}" for day in range(1, 6)] and len(copies) == 1
+            and copies[0]["status"] == "running" and cleaned == 3
+            and archived == ["part-1", "part-2", "part-3"]
+            and remaining_days == ["2025-03-03", "2025-03-04", "2025-03-05", "2025-03-06"]
+            and store.count() == 2 and store.get("part-5")["status"] == "running"
+            and indexed == (1, {"part004"}, ["part-5"]) and reindexed["story_id"] == "part004"
+            and store.changes_since(store.max_revision() - 1)[0]["session_id"] == "part-5"):
+        print("   ✅ PASS: Partitioned store working")
+        return True
+    else:
+        print("   ❌ FAIL: Partitioned store returned unexpected results")
+        return False
+
+def test_lazy_bridge_startup():
+    """Test 22: Read-only bridge commands skip the spawner/coordinator imports and never touch .depot"""
+    print("\n🧪 Test 22: Lazy Bridge Startup")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        story_file = create_test_story(temp_path, "lazy001")
+        
+        probe = (
+            "import json, sys\n"
+            "from bmad_depot_bridge import BMadDepotBridge\n"
+            f"bridge = BMadDepotBridge({str(temp_path)!r})\n"
+            f"bridge.validate_story_file({str(story_file)!r})\n"
+            "heavy = ['spawn_dev_agent', 'session_coordinator', 'asyncio', 'sqlite3']\n"
+            "print(json.dumps([m for m in heavy if m in sys.modules]))\n"
+        )
+        result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True,
+                                cwd=Path(__file__).parent)
+        loaded = json.loads(result.stdout or "null")
+        depot_dir_created = (temp_path / ".depot").exists()
+        
+        bridge = BMadDepotBridge(str(temp_path))
+        same_coordinator = bridge.coordinator is bridge.coordinator
+        built_on_use = (temp_path / ".depot/sessions").exists()
+    
+    print(f"   Heavy modules after validate-story: {loaded}, .depot created: {depot_dir_created}")
+    
+    if loaded == [] and not depot_dir_created and same_coordinator and built_on_use:
+        print("   ✅ PASS: Lazy bridge startup working")
+        return True
+    else:
+        print(f"   ❌ FAIL: Bridge built components eagerly {result.stderr[-300:]}")
+        return False
+
+def test_batch_validation():
+    """Test 23: validate-stories streams one result per story, then a summary, in and out of process"""
+    print("\n🧪 Test 23: Batch Story Validation")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        story_files = [str(create_test_story(temp_path, f"batch{i:03d}")) for i in range(40)]
+        (temp_path / "story_brief.md").write_text("# Story: Too brief\n")
+        
+        # Small batches and no threshold force the process pool on a short backlog
+        pooled = list(validate_stories(story_files, max_workers=2, batch_size=8, parallel_threshold=0))
+        in_process = list(validate_stories(story_files, max_workers=1))
+        
+        result = subprocess.run(
+            [sys.executable, str(Path(__file__).parent / "bmad_depot_bridge.py"),
+             "validate-stories", "--pattern", str(temp_path / "story_*.md")],
+            capture_output=True, text=True
+        )
+        lines = [json.loads(line) for line in result.stdout.splitlines() if line.strip()]
+    
+    by_file = lambda results: sorted(results, key=lambda r: r["story_file"])
+    summary = lines[-1].get("summary", {}) if lines else {}
+    print(f"   Pooled: {len(pooled)}, CLI lines: {len(lines)}, summary: {summary.get('total')} total, "
+          f"{summary.get('invalid')} invalid")
+    
+    if (by_file(pooled) == by_file(in_process) and len(pooled) == 40
+            and len(lines) == 42 and summary.get("total") == 41
+            and summary.get("invalid_stories") == ["brief"]):
+        print("   ✅ PASS: Batch validation working")
+        return True
+    else:
+        print(f"   ❌ FAIL: Batch validation results wrong {result.stderr[-300:]}")
+        return False
+
+def test_story_parser():
+    """Test 24: One parse yields the record discovery, validation and the cache all share"""
+    print("\n🧪 Test 24: Story Parser")
+    
+    content = (
+        "# Story 4.2\n"
+        "priority: 2\n"
+        "Priority: 9\n"
+        "Depends on: 4.1, 3.7 \n"
+        "Notes mention depends on: nothing\n"
+        "\n"
+        "## Context\n"
+        "```\n"
+        "## Implementation\n"
+        "```\n"
+        "## Tasks\n"
+        "- [x] Done\n"
+        "  - [ ] Open subtask\n"
+        "- [X] Also done\n"
+    )
+    story = parse_story(content, Path("stories/story_4.2.md"))
+    round_trip = StoryRecord.from_dict(json.loads(json.dumps(story.to_dict())))
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        stories_dir = Path(temp_dir) / "stories"
+        stories_dir.mkdir()
+        story_file = create_test_story(stories_dir, "parse001")
+        coordinator = BMadDepotBridge(temp_dir).coordinator
+        discovered = coordinator.discover_stories(str(stories_dir))
+        cached = coordinator.discover_stories(str(stories_dir))
+        validation = BMadDepotBridge(temp_dir).validate_story_file(str(story_file))
+    
+    print(f"   Parsed: {story!r}, tasks {story['tasks_done']}/{story['tasks_total']}, sections {len(story.sections)}")
+    
+    if (story["story_id"] == "4.2" and story["priority"] == 2 and story.get("dependencies") == ["4.1", "3.7"]
+            and story.tasks_total == 3 and story.tasks_done == 2
+            and story.has_section("## Context") and story.has_section("## tasks")
+            and story.size_bytes == len(content.encode()) and story.size_estimate == content.count("\n") + 1
+            and round_trip == story and not hasattr(story, "__dict__")
+            and discovered == cached and isinstance(cached[0], StoryRecord)
+            and cached[0]["story_hash"] == discovered[0].story_hash and validation["valid"]):
+        print("   ✅ PASS: Story parser working")
+        return True
+    else:
+        print("   ❌ FAIL: Story parser produced unexpected records")
+        return False
+
+def test_dependency_graph():
+    """Test 25: Cycles and missing dependencies are rejected upfront; completions unlock dependents"""
+    print("\n🧪 Test 25: Dependency Graph Engine")
+    
+    def story(story_id, deps=()):
+        return {"story_id": story_id, "priority": 5, "dependencies": list(deps), "size_estimate": 10}
+    
+    graph = StoryGraph([story("base"), story("api", ["base"]), story("ui", ["base"]),
+                        story("e2e", ["api", "ui", "done-earlier"])])
+    levels = graph.levels()
+    tracker = graph.tracker(completed=["done-earlier"])
+    unlocked = [tracker.complete("base"), tracker.complete("api"), tracker.complete("api"), tracker.complete("ui")]
+    
+    try:
+        StoryGraph([story("a", ["c"]), story("b", ["a"]), story("c", ["b"]),
+                    story("d", ["a"]), story("e", ["ghost"])]).validate()
+        rejected = None
+    except DependencyGraphError as e:
+        rejected = e
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        stories_dir = temp_path / "stories"
+        stories_dir.mkdir()
+        for story_id, deps in [("cyc001", "cyc002"), ("cyc002", "cyc001"), ("solo001", None)]:
+            story_file = create_test_story(stories_dir, story_id)
+            if deps:
+                story_file.write_text(story_file.read_text() + f"\nDepends on: {deps}\n")
+        
+        coordinator = BMadDepotBridge(str(temp_path)).coordinator
+        spawned = []
+        coordinator.spawner.spawn_development_agent = lambda path, story_id=None, force=False: spawned.append(story_id)
+        result = coordinator.coordinate_parallel_development(str(stories_dir), batch_size=2, poll_interval=1)
+        
+        (stories_dir / "story_cyc002.md").unlink()
+        create_test_story(stories_dir, "cyc002")
+        plan = coordinator.plan_development(str(stories_dir))
+    
+    print(f"   Levels: {levels}, unlocked: {unlocked}")
+    print(f"   Rejected: {rejected}")
+    print(f"   Plan: {plan.get('levels')}")
+    
+    if (levels == [["base"], ["api", "ui"], ["e2e"]] and unlocked == [["api", "ui"], [], [], ["e2e"]]
+            and rejected is not None and rejected.cycles == [["a", "b", "c", "a"]]
+            and rejected.missing == {"e": ["ghost"]}
+            and not spawned and result.get("cycles") == [["cyc001", "cyc002", "cyc001"]]
+            and plan.get("levels") == [["cyc002", "solo001"], ["cyc001"]] and plan["max_parallelism"] == 2):
+        print("   ✅ PASS: Dependency graph engine working")
+        return True
+    else:
+        print(f"   ❌ FAIL: Unexpected graph behaviour {result}")
+        return False
+
+def test_coordinator_daemon():
+    """Test 26: The daemon answers status from memory, streams transitions and serves the bridge CLI"""
+    print("\n🧪 Test 26: Coordinator Daemon")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        stories_dir = temp_path / "stories"
+        stories_dir.mkdir()
+        create_test_story(stories_dir, "dmn001")
+        sock = temp_path / "coordinator.sock"
+        # Depot stops dmn-session; dmn-stuck refuses to cancel and stays listed as running
+        bin_dir = temp_path / "bin"
+        create_fake_depot(bin_dir, """case "$2" in
+  cancel) [ "$3" = dmn-session ];;
+  list-sessions) echo '[{"id": "dmn-stuck", "status": "running"}]';;
+esac""")
+        original_path = os.environ.get("PATH", "")
+        os.environ["PATH"] = f"{bin_dir}:{original_path}"
+        
+        daemon = CoordinatorDaemon(str(temp_path), sock)
+        server = threading.Thread(target=daemon.serve_forever, daemon=True)
+        server.start()
+        for _ in range(100):
+            if sock.exists():
+                break
+            time.sleep(0.01)
+        
+        # Written by another store (as a CLI process would): only the watcher tells the daemon
+        SessionStore(temp_path / ".depot/sessions").save_many([{
+            "session_id": session_id, "story_id": "dmn001", "status": "running",
+            "agent_type": "development", "started_at": datetime.utcnow().isoformat()}
+            for session_id in ("dmn-stuck", "dmn-session")])
+        
+        # Only the owner can connect
+        socket_mode = sock.stat().st_mode & 0o777
+        
+        with DaemonClient(sock, timeout=10) as client:
+            pong = client.call("ping")
+            for _ in range(200):
+                if client.call("status", session_id="dmn-session")["found"]:
+                    break
+                time.sleep(0.01)
+            story = client.call("story-status", story_id="dmn001")
+            
+            start = time.perf_counter()
+            for _ in range(100):
+                client.call("status")
+            status_ms = (time.perf_counter() - start) * 10
+            
+            try:
+                client.call("no-such-method")
+                bad_method = None
+            except DaemonError as e:
+                bad_method = str(e)
+            plan = client.call("plan", stories_dir=str(stories_dir))
+            
+            with DaemonClient(sock, timeout=10) as subscriber:
+                events = subscriber.subscribe(timeout=5)
+                cancelled = client.call("cancel", session_id="dmn-session")
+                # The cancel response already reflects in the index, before any watcher event
+                after_cancel = client.call("status", session_id="dmn-session")["session"]
+                event = next(events, None)
+            
+            refused = client.call("cancel", session_id="dmn-stuck")
+            still_running = client.call("status", session_id="dmn-stuck")["session"]["status"]
+        os.environ["PATH"] = original_path
+        
+        env = {**os.environ, SOCKET_ENV: str(sock)}
+        cli = subprocess.run([sys.executable, "bmad_depot_bridge.py", "story-status", "--story-id", "dmn001"],
+                             capture_output=True, text=True, env=env, cwd=Path(__file__).parent)
+        cli_result = json.loads(cli.stdout or "{}")
+        
+        with DaemonClient(sock) as client:
+            client.call("shutdown")
+        server.join(timeout=5)
+        socket_removed = not sock.exists()
+    
+    print(f"   Story status: {story.get('message')}, status request: {status_ms:.2f}ms")
+    print(f"   Cancel: {cancelled.get('cancelled')}, event: {event}")
+    print(f"   Unconfirmed cancel: {refused.get('error')}, session {still_running}")
+    print(f"   CLI via daemon: {cli_result.get('message')}")
+    
+    if (pong["pid"] == os.getpid() and story.get("session_found") and status_ms < 50 and not socket_mode & 0o077
+            and bad_method and "Unknown method" in bad_method and plan["plan"].get("levels") == [["dmn001"]]
+            and cancelled.get("cancelled") == "session" and after_cancel["status"] == "cancelled"
+            and event and event["session_id"] == "dmn-session" and event["status"] == "cancelled"
+            and not refused["success"] and still_running == "running"
+            and cli_result.get("session_status", {}).get("status") == "cancelled"
+            and not server.is_alive() and socket_removed):
+        print("   ✅ PASS: Coordinator daemon working")
+        return True
+    else:
+        print(f"   ❌ FAIL: Unexpected daemon behaviour {cli.stderr[-300:]}")
+        return False
+
+def test_session_deadlines():
+    """Test 27: Deadlines scale with story size and history; stalled or overdue sessions are reclaimed"""
+    print("\n🧪 Test 27: Session Deadlines and Stall Detection")
+    
+    policy = DeadlinePolicy(factor=2.0, min_seconds=60, max_seconds=3600, stall_seconds=0.5)
+    small, large, known = (policy.story_deadline("s", 10), policy.story_deadline("l", 1000),
+                           policy.story_deadline("k", 10, {"k": 100.0}))
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        quiet = [sys.executable, "-c", "import time; print('started', flush=True); time.sleep(30)"]
+        
+        spooler = SessionLogSpooler(temp_path / "artifacts", "stall-sync")
+        start = time.monotonic()
+        try:
+            run_with_spooling(quiet, spooler, timeout=30, stall_timeout=0.5)
+            sync_stalled = False
+        except OutputStalled:
+            sync_stalled = True
+        finally:
+            spooler.close()
+        sync_seconds = time.monotonic() - start
+        
+        spooler = SessionLogSpooler(temp_path / "artifacts", "stall-async")
+        async_result = asyncio.run(AsyncSpawnEngine().run("stall-async", quiet, timeout=30, spooler=spooler,
+                                                          stall_timeout=0.5))
+        spooler.close()
+        
+        store = SessionStore(temp_path / "sessions")
+        now = datetime.utcnow()
+        
+        def running(session_id, **fields):
+            return {"session_id": session_id, "story_id": session_id, "status": "running",
+                    "agent_type": "development", "started_at": (now - timedelta(seconds=10)).isoformat(), **fields}
+        
+        store.save_many([
+            running("overdue", deadline_at=(now - timedelta(seconds=1)).isoformat()),
+            running("silent", deadline_at=(now + timedelta(hours=1)).isoformat(),
+                    last_progress_at=(now - timedelta(seconds=5)).isoformat()),
+            running("alive", last_progress_at=now.isoformat()),
+            running("no-heartbeat")
+        ])
+        reaper = SessionReaper(store, temp_path / "artifacts", policy, cancel=lambda session_id: session_id != "silent")
+        reclaimed = {session["session_id"]: (session["timeout_reason"], session["remote_cancelled"])
+                     for session in reaper.reap()}
+        still_running = sorted(session["session_id"] for session in store.list_sessions(status="running"))
+        overdue = store.get("overdue")
+        
+        stories_dir = temp_path / "stories"
+        stories_dir.mkdir()
+        create_test_story(stories_dir, "hang001")
+        dependent = create_test_story(stories_dir, "after001")
+        dependent.write_text(dependent.read_text() + "\nDepends on: hang001\n")
+        stuck_dir = temp_path / "stuck-stories"
+        stuck_dir.mkdir()
+        create_test_story(stuck_dir, "stuck001")
+        blocked = create_test_story(stuck_dir, "blocked001")
+        blocked.write_text(blocked.read_text() + "\nDepends on: stuck001\n")
+        
+        # Depot cancels succeed until refuse exists; then the stuck session stays listed as running
+        bin_dir, cancels, refuse = temp_path / "bin", temp_path / "cancels.log", temp_path / "refuse"
+        create_fake_depot(bin_dir, f"""case "$2" in
+  cancel) echo "$3" >> "{cancels}"; [ -f "{refuse}" ] && exit 1;;
+  list-sessions) if [ -f "{refuse}" ]; then echo '[{{"session_id": "stuck001-1", "status": "running"}}]'; else echo "[]"; fi;;
+esac""")
+        
+        coordinator = BMadDepotBridge(str(temp_path)).coordinator
+        spawned = []
+        
+        def hanging_spawn(story_file_path, story_id=None, force=False):
+            # The first hang001 session never finishes; its retry and the dependent complete at once
+            spawned.append(story_id)
+            started = datetime.utcnow()
+            session_data = {"session_id": f"{story_id}-{len(spawned)}", "story_id": story_id,
+                            "agent_type": "development", "started_at": started.isoformat()}
+            if spawned.count(story_id) == 1 and story_id in ("hang001", "stuck001"):
+                session_data.update(status="running", deadline_at=(started + timedelta(seconds=0.3)).isoformat())
+            else:
+                session_data.update(status="completed", completed_at=started.isoformat())
+            coordinator.store.save(session_data)
+            return session_data
+        
+        coordinator.spawner.spawn_development_agent = hanging_spawn
+        original_path = os.environ.get("PATH", "")
+        os.environ["PATH"] = f"{bin_dir}:{original_path}"
+        try:
+            start = time.monotonic()
+            result = coordinator.coordinate_parallel_development(str(stories_dir), batch_size=2, poll_interval=1)
+            coordination_seconds = time.monotonic() - start
+            estimated = sorted(coordinator.spawner.duration_estimates)
+            
+            spawned_before_refusal = list(spawned)
+            spawned.clear()
+            refuse.touch()
+            stuck = coordinator.coordinate_parallel_development(str(stuck_dir), batch_size=2, poll_interval=1)
+        finally:
+            os.environ["PATH"] = original_path
+        cancelled = cancels.read_text().split()
+    
+    print(f"   Deadlines: small {small:.0f}s, large {large:.0f}s, with history {known:.0f}s")
+    print(f"   Stalled spawn killed after {sync_seconds:.1f}s; async: {async_result['status']} ({async_result.get('reason')})")
+    print(f"   Reclaimed: {reclaimed}, still running: {still_running}")
+    print(f"   Spawns: {spawned_before_refusal}, timed out: {result.get('sessions_timed_out')} in {coordination_seconds:.1f}s")
+    print(f"   Cancelled on Depot: {cancelled}; unconfirmed cancel spawns: {spawned}, errors: {stuck.get('errors')}")
+    
+    if (small == 600 and large == 3600 and known == 200
+            and sync_stalled and sync_seconds < 5
+            and async_result["status"] == "timeout" and async_result.get("reason") == "stalled"
+            and reclaimed == {"overdue": ("deadline", True), "silent": ("stalled", False)}
+            and still_running == ["alive", "no-heartbeat"]
+            and overdue["status"] == "timeout" and overdue.get("completed_at")
+            and spawned_before_refusal == ["hang001", "hang001", "after001"] and result.get("sessions_timed_out") == 1
+            and estimated == ["after001", "hang001"] and coordination_seconds < 10
+            and cancelled == ["hang001-1", "stuck001-1"] and spawned == ["stuck001"]
+            and any("could not be confirmed stopped" in error for error in stuck.get("errors", []))):
+        print("   ✅ PASS: Session deadlines working")
+        return True
+    else:
+        print(f"   ❌ FAIL: Unexpected deadline behaviour {result}")
+        return False
+
+def test_spawn_prefetch():
+    """Test 28: Spawns are prepared ahead of launch and reused only while the story is unchanged"""
+    print("\n🧪 Test 28: Spawn Prefetch")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        prepared = []
+        
+        def slow_prepare(story_file, story_id):
+            time.sleep(0.3)
+            prepared.append(story_id)
+            return {"story_id": story_id}
+        
+        prefetcher = SpawnPrefetcher(slow_prepare)
+        ready, busy, edited = (create_test_story(temp_path, story_id) for story_id in ("pf001", "pf002", "pf003"))
+        for story_file, story_id in ((ready, "pf001"), (busy, "pf002"), (edited, "pf003")):
+            prefetcher.prefetch(story_file, story_id)
+        duplicate = prefetcher.prefetch(ready, "pf001")
+        time.sleep(0.4)
+        start = time.perf_counter()
+        ready_spec = prefetcher.take(ready, "pf001")
+        take_ms = (time.perf_counter() - start) * 1000
+        busy_spec = prefetcher.take(busy, "pf002")
+        edited.write_text(edited.read_text() + "\n- [ ] Late change\n")
+        edited_spec = prefetcher.take(edited, "pf003")
+        prefetcher.close()
+        
+        bin_dir = temp_path / "bin"
+        create_fake_depot(bin_dir, 'sleep 0.2\necho "https://depot.dev/sessions/prefetch"')
+        stories_dir = temp_path / "stories"
+        stories_dir.mkdir()
+        for index in range(3):
+            create_test_story(stories_dir, f"pipe00{index}")
+        
+        coordinator = BMadDepotBridge(str(temp_path)).coordinator
+        original_prepare = coordinator.spawner._prepare_spawn
+        inline = []
+        
+        def counting_prepare(story_file_path, story_id=None, force=False):
+            if not threading.current_thread().name.startswith("spawn-prefetch"):
+                inline.append(story_id)
+            return original_prepare(story_file_path, story_id, force)
+        
+        coordinator.spawner._prepare_spawn = counting_prepare
+        original_path = os.environ.get("PATH", "")
+        os.environ["PATH"] = f"{bin_dir}:{original_path}"
+        try:
+            result = coordinator.coordinate_parallel_development(str(stories_dir), batch_size=1, poll_interval=1)
+        finally:
+            os.environ["PATH"] = original_path
+    
+    prefetch = result.get("spawn_prefetch", {})
+    print(f"   Take: {take_ms:.2f}ms, duplicate prefetch: {duplicate}, edited story reused: {edited_spec is not None}")
+    print(f"   Coordination: {result.get('sessions_spawned')} spawned, prefetch {prefetch}, prepared inline: {inline}")
+    
+    if (ready_spec == {"story_id": "pf001"} and take_ms < 50 and not duplicate
+            and busy_spec == {"story_id": "pf002"} and edited_spec is None
+            and prefetcher.hits == 2 and prefetcher.misses == 1
+            and result.get("sessions_spawned") == 3 and prefetch.get("hits") == 2
+            and prefetch.get("pending") == 0 and len(inline) == 1):
+        print("   ✅ PASS: Spawn prefetch working")
+        return True
+    else:
+        print(f"   ❌ FAIL: Unexpected prefetch behaviour {result.get('errors')}")
+        return False
+
+def test_bulk_reconciliation():
+    """Test 29: One Depot listing reconciles every running session and unlocks dependents"""
+    print("\n🧪 Test 29: Bulk Status Reconciliation")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        bin_dir = temp_path / "bin"
+        listing = temp_path / "sessions.json"
+        calls = temp_path / "calls"
+        create_fake_depot(bin_dir, f'echo "$@" >> "{calls}"\ncat "{listing}"')
+        
+        orchestrator = ParallelAgentOrchestrator(str(temp_path / "orchestrator"))
+        orchestrator.depot_path = str(bin_dir / "depot")
+        started_at = datetime.utcnow().isoformat()
+        orchestrator.store.save_many([
+            {"session_id": "rec-done", "story_id": "rec1", "status": "running", "started_at": started_at},
+            {"session_id": "rec-busy", "story_id": "rec2", "status": "running", "started_at": started_at},
+            {"session_id": "rec-lost", "story_id": "rec3", "status": "running", "started_at": started_at},
+            {"session_id": "rec-old", "story_id": "rec4", "status": "completed", "started_at": started_at}
+        ])
+        listing.write_text(json.dumps({"sessions": [
+            {"id": "rec-done", "status": "COMPLETED", "url": "https://depot.dev/claude/sessions/rec-done"},
+            {"id": "rec-busy", "status": "running"},
+            {"id": "rec-lost", "state": "errored"},
+            {"id": "rec-old", "status": "completed"},
+            {"id": "rec-remote", "status": "running", "story_id": "rec5"}
+        ]}))
+        
+        writes = []
+        orchestrator.store.add_listener(lambda: writes.append(1))
+        statuses = orchestrator.monitor_sessions()
+        sweep_calls, sweep_writes = len(calls.read_text().splitlines()), len(writes)
+        done = orchestrator.store.get("rec-done")
+        listed = [session["session_id"] for session in orchestrator.list_sessions()]
+        
+        # Unreadable listings leave the store untouched
+        listing.write_text("not json")
+        broken = orchestrator.monitor_sessions(["rec-busy"])
+        
+        # An orchestrator-started session's reconciled duration is not skewed by the local UTC offset
+        clock_story = create_test_story(temp_path, "clock001")
+        original_tz = os.environ.get("TZ")
+        os.environ["TZ"] = "EST+5"
+        time.tzset()
+        try:
+            clocked = orchestrator.spawn_agent(clock_story, "clock001")
+            listing.write_text(json.dumps([{"id": clocked["session_id"], "status": "completed"}]))
+            orchestrator.monitor_sessions([clocked["session_id"]])
+        finally:
+            if original_tz is None:
+                os.environ.pop("TZ", None)
+            else:
+                os.environ["TZ"] = original_tz
+            time.tzset()
+        clocked = orchestrator.store.get(clocked["session_id"])
+        clocked_seconds = (datetime.fromisoformat(clocked["completed_at"])
+                           - datetime.fromisoformat(clocked["started_at"])).total_seconds()
+        
+        # The coordinator learns of a dependency's completion from the listing alone
+        stories_dir = temp_path / "stories"
+        stories_dir.mkdir()
+        create_test_story(stories_dir, "bulk001")
+        dependent = create_test_story(stories_dir, "bulk002")
+        dependent.write_text(dependent.read_text() + "\nDepends on: bulk001\n")
+        listing.write_text(json.dumps([]))
+        
+        coordinator = BMadDepotBridge(str(temp_path / "coordinator")).coordinator
+        
+        def fake_spawn(story_file_path, story_id=None, force=False):
+            now = datetime.utcnow()
+            session_data = {"session_id": f"fake-{story_id}", "story_id": story_id, "status": "running",
+                            "started_at": now.isoformat(), "deadline_at": (now + timedelta(hours=1)).isoformat(),
+                            "agent_type": "development"}
+            coordinator.store.save(session_data)
+            return session_data
+        
+        coordinator.spawner.spawn_development_agent = fake_spawn
+        
+        def finish_remotely():
+            time.sleep(0.5)
+            listing.write_text(json.dumps([{"id": "fake-bulk001", "status": "completed"}]))
+        
+        original_path = os.environ.get("PATH", "")
+        os.environ["PATH"] = f"{bin_dir}:{original_path}"
+        threading.Thread(target=finish_remotely).start()
+        try:
+            start = time.monotonic()
+            result = coordinator.coordinate_parallel_development(str(stories_dir), batch_size=2, poll_interval=1)
+            elapsed = time.monotonic() - start
+        finally:
+            os.environ["PATH"] = original_path
+        dependency = coordinator.store.get("fake-bulk001")
+    
+    print(f"   Sweep: {sweep_calls} depot call(s), {sweep_writes} store write(s), statuses "
+          f"{ {sid: status['status'] for sid, status in statuses.items()} }")
+    print(f"   Listed: {listed}")
+    print(f"   Orchestrator-started session reconciled {clocked['status']} after {clocked_seconds:.1f}s")
+    print(f"   Dependent dispatched after {elapsed:.2f}s; dependency {dependency['status']}")
+    
+    if (sweep_calls == 1 and sweep_writes == 1
+            and statuses == {"rec-done": {"status": "completed", "depot_state": "completed", "changed": True},
+                             "rec-busy": {"status": "running", "depot_state": "running"},
+                             "rec-lost": {"status": "failed", "depot_state": "errored", "changed": True}}
+            and done["completed_at"] and done["session_url"].endswith("rec-done")
+            and sorted(listed) == ["rec-busy", "rec-done", "rec-lost", "rec-old", "rec-remote"]
+            and broken["rec-busy"]["status"] == "unknown" and orchestrator.store.get("rec-busy")["status"] == "running"
+            and clocked["status"] == "completed" and 0 <= clocked_seconds < 60
+            and result.get("sessions_spawned") == 2 and dependency["status"] == "completed" and elapsed < 3):
+        print("   ✅ PASS: Bulk reconciliation working")
+        return True
+    else:
+        print(f"   ❌ FAIL: Unexpected reconciliation result {result.get('errors')}")
+        return False
+
 def run_integration_tests():
     """Run all integration tests"""
     print("🌉 BMAD-Depot Integration Test Suite")
@@ -195,7 +1624,31 @@ def run_integration_tests():
         test_story_validation,
         test_session_management,
         test_story_spawning_simulation,
-        test_coordination_discovery
+        test_coordination_discovery,
+        test_continuous_scheduling,
+        test_session_store,
+        test_discovery_cache,
+        test_async_spawn_engine,
+        test_concurrent_monitor,
+        test_credential_cache,
+        test_event_driven_wakeup,
+        test_critical_path_ordering,
+        test_output_spooling,
+        test_backlog_simulation,
+        test_adaptive_concurrency,
+        test_spawn_retry,
+        test_story_dedupe,
+        test_prompt_compaction,
+        test_metrics_export,
+        test_partitioned_store,
+        test_lazy_bridge_startup,
+        test_batch_validation,
+        test_story_parser,
+        test_dependency_graph,
+        test_coordinator_daemon,
+        test_session_deadlines,
+        test_spawn_prefetch,
+        test_bulk_reconciliation
     ]
     
     passed = 0